@@ -1,24 +1,149 @@
 import base64
+import binascii
+import tempfile
 
-from django.core.files.base import ContentFile
+from django.conf import settings
+from django.core.files import File
 from rest_framework import serializers
 
+from info.waveforms import peaks_list
 
-class Base64ImageField(serializers.ImageField):
-    def to_internal_value(self, data):
-        if isinstance(data, str) and data.startswith('data:image'):
-            format, imgstr = data.split(';base64,')
-            ext = format.split('/')[-1]
-            data = ContentFile(base64.b64decode(imgstr), name='temp.' + ext)
 
-        return super().to_internal_value(data)
+# Base64 characters decoded per step, a multiple of 4 so that every
+# chunk decodes on its own.
+DECODE_CHUNK_SIZE = 64 * 1024
 
 
-class Base64AudioField(serializers.FileField):
-    def to_internal_value(self, data):
-        if isinstance(data, str) and data.startswith('data:audio'):
-            format, audstr = data.split(';base64,')
-            ext = format.split('/')[-1]
-            data = ContentFile(base64.b64decode(audstr), name='temp.' + ext)
+def sniff_image(head):
+    """Extension of an image judging by its leading bytes."""
+
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'png'
+    if head.startswith(b'\xff\xd8\xff'):
+        return 'jpg'
+    if head[:6] in (b'GIF87a', b'GIF89a'):
+        return 'gif'
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+
+def sniff_audio(head):
+    """Extension of an audio file judging by its leading bytes."""
+
+    if head[:4] == b'RIFF' and head[8:12] == b'WAVE':
+        return 'wav'
+    if head[:3] == b'ID3':
+        return 'mp3'
+    # Bare MPEG audio frame: 11 sync bits, then layer III.
+    if len(head) > 1 and head[0] == 0xFF and head[1] & 0xE6 == 0xE2:
+        return 'mp3'
+    return None
+
 
+class Base64FileMixin:
+    """Decode ``data:<type>;base64,...`` strings into a temporary file.
+
+    The payload is decoded chunk by chunk into a spooled temporary file,
+    so a large upload is not held in memory a second and a third time.
+    Its size is checked before decoding and its real type is taken from
+    its first bytes rather than from the data URI prefix.
+    """
+
+    data_prefix = None
+    max_size_setting = None
+    default_error_messages = {
+        'invalid_base64': 'Upload a valid base64 encoded file.',
+        'too_large': 'Ensure the file is not larger than {max_size} bytes.',
+        'unknown_type': 'Upload a file of a supported type.',
+    }
+
+    def __init__(self, *args, max_size=None, **kwargs):
+        self.max_size = max_size
+        super().__init__(*args, **kwargs)
+
+    def sniff(self, head):
+        raise NotImplementedError
+
+    def get_max_size(self):
+        if self.max_size is not None:
+            return self.max_size
+        return getattr(settings, self.max_size_setting)
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) and data.startswith(self.data_prefix):
+            data = self.decode(data)
         return super().to_internal_value(data)
+
+    def decode(self, data):
+        start = data.find(';base64,')
+        if start == -1:
+            self.fail('invalid_base64')
+        start += len(';base64,')
+
+        encoded_size = len(data) - start
+        if encoded_size == 0 or encoded_size % 4:
+            self.fail('invalid_base64')
+        padding = 2 if data.endswith('==') else int(data.endswith('='))
+        size = encoded_size // 4 * 3 - padding
+        max_size = self.get_max_size()
+        if size > max_size:
+            self.fail('too_large', max_size=max_size)
+
+        decoded = tempfile.SpooledTemporaryFile(
+            max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE
+        )
+        ext = None
+        for offset in range(start, len(data), DECODE_CHUNK_SIZE):
+            try:
+                chunk = base64.b64decode(
+                    data[offset:offset + DECODE_CHUNK_SIZE], validate=True
+                )
+            except (binascii.Error, ValueError):
+                decoded.close()
+                self.fail('invalid_base64')
+            if ext is None:
+                ext = self.sniff(chunk)
+                if ext is None:
+                    decoded.close()
+                    self.fail('unknown_type')
+            decoded.write(chunk)
+
+        decoded.seek(0)
+        return File(decoded, name='temp.' + ext)
+
+
+class Base64ImageField(Base64FileMixin, serializers.ImageField):
+    data_prefix = 'data:image'
+    max_size_setting = 'BASE64_IMAGE_MAX_SIZE'
+
+    def sniff(self, head):
+        return sniff_image(head)
+
+
+class Base64AudioField(Base64FileMixin, serializers.FileField):
+    data_prefix = 'data:audio'
+    max_size_setting = 'BASE64_AUDIO_MAX_SIZE'
+
+    def sniff(self, head):
+        return sniff_audio(head)
+
+
+class AudioMetaField(serializers.Field):
+    """Read-only duration, format and waveform peaks of ``audio``."""
+
+    def __init__(self, **kwargs):
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, instance):
+        if instance.audio_duration is None:
+            return None
+        peaks = instance.audio_peaks
+        return {
+            'duration': instance.audio_duration,
+            'sample_rate': instance.audio_sample_rate,
+            'channels': instance.audio_channels,
+            'peaks': None if peaks is None else peaks_list(peaks),
+        }
@@ -0,0 +1,25 @@
+# Generated by Django 4.1.3 on 2026-10-18 08:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReferenceVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.CharField(blank=True, max_length=32, verbose_name='version')),
+            ],
+            options={
+                'verbose_name': 'Reference Version',
+                'verbose_name_plural': 'Reference Versions',
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+from django.db import models
+
+
+class ReferenceVersion(models.Model):
+    """Reference Data Version Model.
+
+    A single row given a new random version whenever categories,
+    instruments, tags or genres change.
+    """
+
+    version = models.CharField(
+        verbose_name='version', max_length=32, blank=True
+    )
+
+    class Meta:
+        verbose_name = 'Reference Version'
+        verbose_name_plural = 'Reference Versions'
+
+    def __str__(self):
+        return self.version
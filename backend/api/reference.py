@@ -0,0 +1,106 @@
+"""Reference data clients load once: categories, instruments, tags and
+genres in one payload.
+
+Each process renders the payload once, together with a gzip copy and a
+SHA-256 ETag of the JSON, and serves both from memory. Which payload is
+current is decided by the ``ReferenceVersion`` row, which signals bump
+in the transaction saving or deleting one of the models. A process reads
+it at most every ``REFERENCE_CHECK_INTERVAL`` seconds, right away after
+its own changes, and renders again when it moved. Writes that skip
+signals, such as ``QuerySet.update()``, show up once the payload is
+``REFERENCE_MAX_AGE`` seconds old.
+"""
+import gzip
+import hashlib
+import threading
+import time
+import uuid
+from collections import namedtuple
+
+from django.conf import settings
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from info.models import Genre, Instrument, InstrumentCategory, Tag
+
+from .models import ReferenceVersion
+from .serializers import (GenreSerializer, InstrumentCategorySerializer,
+                          InstrumentSerailizer, TagSerializer)
+
+
+VERSION_PK = 1
+
+Reference = namedtuple('Reference', 'version rendered body gzipped etag')
+
+_lock = threading.Lock()
+_reference = None
+# When this process last read the version, ``None`` to read it now.
+_checked = None
+
+
+def get_version():
+    return ReferenceVersion.objects.filter(pk=VERSION_PK).values_list(
+        'version', flat=True
+    ).first()
+
+
+def render_reference():
+    payload = {
+        'categories': InstrumentCategorySerializer(
+            InstrumentCategory.objects.order_by('pk'), many=True
+        ).data,
+        'instruments': InstrumentSerailizer(
+            Instrument.objects.order_by('pk'), many=True
+        ).data,
+        'tags': TagSerializer(Tag.objects.order_by('pk'), many=True).data,
+        'genres': GenreSerializer(
+            Genre.objects.order_by('pk'), many=True
+        ).data,
+    }
+    return JSONRenderer().render(payload)
+
+
+def get_reference():
+    """The current payload, rendered again only after a change."""
+
+    global _reference, _checked
+
+    with _lock:
+        now = time.monotonic()
+        if _reference is not None and _checked is not None and (
+                now - _checked < settings.REFERENCE_CHECK_INTERVAL):
+            return _reference
+
+        version = get_version()
+        _checked = now
+        if _reference is None or _reference.version != version or (
+                now - _reference.rendered >= settings.REFERENCE_MAX_AGE):
+            body = render_reference()
+            _reference = Reference(
+                version, now, body, gzip.compress(body, mtime=0),
+                hashlib.sha256(body).hexdigest()
+            )
+        return _reference
+
+
+def forget_version():
+    global _checked
+
+    with _lock:
+        _checked = None
+
+
+def invalidate_reference():
+    """Bump the version with the change, and make this process read it
+    again now and once the transaction commits."""
+
+    version = uuid.uuid4().hex
+    updated = ReferenceVersion.objects.filter(pk=VERSION_PK).update(
+        version=version
+    )
+    if not updated:
+        ReferenceVersion.objects.update_or_create(
+            pk=VERSION_PK, defaults={'version': version}
+        )
+    forget_version()
+    transaction.on_commit(forget_version)
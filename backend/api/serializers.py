@@ -1,11 +1,19 @@
+import os
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from rest_framework import serializers
 
-from .fields import Base64AudioField, Base64ImageField
-from info.models import (Band, Bookmark, Review, Instrument,
+from .fields import AudioMetaField, Base64AudioField, Base64ImageField
+from info.models import (Band, BandSlot, Bookmark, Genre, Review, Instrument,
                          InstrumentCategory, Post,
-                         Request, Tag, UserBandInstrument)
-from users.serializers import UserInstrumentSerializer, UserListSerializer
+                         Request, Tag, Upload, UserBandInstrument)
+from info.inbox import create_pending
+from info.membership import MembershipError, join_band, set_quantity
+from info.renditions import rendition_urls
+from info.timeline import deliver
+from users.serializers import UserListSerializer
 
 
 User = get_user_model()
@@ -20,7 +28,69 @@ class TagSerializer(serializers.ModelSerializer):
         fields = ('id', 'title', 'color', 'slug')
 
 
-class PostSerializer(serializers.ModelSerializer):
+class GenreSerializer(serializers.ModelSerializer):
+    """Genre Serializer."""
+
+    class Meta:
+        model = Genre
+        fields = ('id', 'title', 'color', 'slug')
+
+
+class UploadSerializer(serializers.ModelSerializer):
+    """Resumable Upload Serializer."""
+
+    class Meta:
+        model = Upload
+        fields = ('id', 'size', 'offset', 'is_complete', 'created')
+        read_only_fields = ('offset', 'is_complete', 'created')
+
+    def validate_size(self, value):
+        if not 0 < value <= settings.UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(
+                f'Size must be between 1 and {settings.UPLOAD_MAX_SIZE}'
+            )
+        return value
+
+    def create(self, validated_data):
+        upload = Upload.objects.create(
+            user=self.context['request'].user, **validated_data
+        )
+        os.makedirs(os.path.dirname(upload.get_path()), exist_ok=True)
+        open(upload.get_path(), 'wb').close()
+        return upload
+
+
+class AudioUploadMixin(serializers.Serializer):
+    """Taking audio from a completed Upload instead of a base64 blob."""
+
+    audio_upload = serializers.PrimaryKeyRelatedField(
+        queryset=Upload.objects.filter(is_complete=True),
+        write_only=True,
+        required=False
+    )
+
+    def validate_audio_upload(self, upload):
+        if upload.user != self.context['request'].user:
+            raise serializers.ValidationError('It is not your upload')
+        return upload
+
+    def attach_audio(self, instance, upload):
+        audio = upload.get_file()
+        try:
+            instance.audio.save(audio.name, audio)
+        finally:
+            audio.close()
+        upload.delete()
+
+    def update(self, instance, validated_data):
+        upload = validated_data.pop('audio_upload', None)
+        instance = super().update(instance, validated_data)
+        if upload is not None:
+            self.attach_audio(instance, upload)
+        return instance
+
+
+class PostSerializer(AudioUploadMixin, serializers.ModelSerializer):
     """Post Serializer."""
 
     author = UserListSerializer(read_only=True)
@@ -30,15 +100,26 @@ class PostSerializer(serializers.ModelSerializer):
     )
     image = Base64ImageField(required=False)
     audio = Base64AudioField(required=False)
-    likes = serializers.SerializerMethodField()
+    audio_meta = AudioMetaField()
+    likes = serializers.IntegerField(source='likes_count', read_only=True)
+    reviews = serializers.IntegerField(source='reviews_count', read_only=True)
+    bookmarks = serializers.IntegerField(
+        source='bookmarks_count', read_only=True
+    )
+    image_renditions = serializers.SerializerMethodField()
+    is_liked = serializers.SerializerMethodField()
+    is_bookmarked = serializers.SerializerMethodField()
+    has_reviewed = serializers.SerializerMethodField()
 
     class Meta:
         model = Post
         fields = (
-            'id', 'title', 'tags', 'author', 'image',
-            'audio', 'text', 'likes', 'pub_date'
+            'id', 'title', 'tags', 'author', 'image', 'image_renditions',
+            'audio', 'audio_meta', 'audio_upload', 'text', 'likes', 'reviews',
+            'bookmarks', 'is_liked', 'is_bookmarked', 'has_reviewed',
+            'pub_date'
         )
-        read_only_fields = ('author', 'likes', 'pub_date')
+        read_only_fields = ('author', 'pub_date')
 
     def add_tags(self, post, tags):
         for tag in tags:
@@ -47,12 +128,27 @@ class PostSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         author = self.context.get('request').user
         tags = validated_data.pop('tags')
+        upload = validated_data.pop('audio_upload', None)
         post = Post.objects.create(author=author, **validated_data)
         self.add_tags(post, tags)
+        if upload is not None:
+            self.attach_audio(post, upload)
+        transaction.on_commit(lambda: deliver(post))
         return post
 
-    def get_likes(self, obj):
-        return obj.likes.count()
+    def get_image_renditions(self, obj):
+        return rendition_urls(
+            obj.image, obj.image_renditions, self.context.get('request')
+        )
+
+    def get_is_liked(self, obj):
+        return getattr(obj, 'is_liked', False)
+
+    def get_is_bookmarked(self, obj):
+        return getattr(obj, 'is_bookmarked', False)
+
+    def get_has_reviewed(self, obj):
+        return getattr(obj, 'has_reviewed', False)
 
 
 class InstrumentCategorySerializer(serializers.ModelSerializer):
@@ -76,38 +172,83 @@ class InstrumentSerailizer(serializers.ModelSerializer):
         fields = ('id', 'title', 'category')
 
 
+class BandMemberSerializer(serializers.ModelSerializer):
+    """Band Participant and the Instrument They Play Serializer."""
+
+    id = serializers.IntegerField(source='user.id')
+    username = serializers.CharField(source='user.username')
+    first_name = serializers.CharField(source='user.first_name')
+    last_name = serializers.CharField(source='user.last_name')
+    instrument = serializers.CharField(source='instrument.title')
+
+    class Meta:
+        model = UserBandInstrument
+        fields = ('id', 'username', 'first_name', 'last_name', 'instrument')
+
+
 class BandSerializer(serializers.ModelSerializer):
     """Band Serializer."""
 
-    author = UserInstrumentSerializer(read_only=True)
-    participants = UserInstrumentSerializer(read_only=True, many=True)
+    author = serializers.SerializerMethodField()
+    participants = BandMemberSerializer(
+        source='band_user', read_only=True, many=True
+    )
+    needs = serializers.SlugRelatedField(
+        slug_field='title', queryset=Instrument.objects.all(),
+        many=True, required=False, write_only=True
+    )
+    open_slots = serializers.SerializerMethodField()
     poster = Base64ImageField()
+    poster_renditions = serializers.SerializerMethodField()
 
     class Meta:
         model = Band
         fields = (
             'id', 'author', 'title', 'description', 'participants',
-            'quantity', 'pub_date', 'is_visible', 'poster'
+            'quantity', 'needs', 'open_slots', 'pub_date', 'is_visible',
+            'poster', 'poster_renditions'
         )
         read_only_fields = ('author', 'participants', 'pub_date')
         extra_kwargs = {
             'is_visible': {'write_only': True}
         }
 
-    def create_or_refuse_user_in_band(self, user, band, instrument):
-        if UserBandInstrument.objects.filter(user=user).exists():
-            band.delete()
-            raise serializers.ValidationError(
-                'You are forbidden to join more than one band'
-            )
-        else:
-            UserBandInstrument.objects.create(
-                user=user,
-                band=band,
-                instrument=instrument
+    def get_author(self, obj):
+        # The author is one of the members, whose roster is prefetched.
+        for member in obj.band_user.all():
+            if member.user_id == obj.author_id:
+                return BandMemberSerializer(member).data
+        author = obj.author
+        return {
+            'id': author.id, 'username': author.username,
+            'first_name': author.first_name, 'last_name': author.last_name,
+            'instrument': None,
+        }
+
+    def get_poster_renditions(self, obj):
+        return rendition_urls(
+            obj.poster, obj.poster_renditions, self.context.get('request')
+        )
+
+    def get_open_slots(self, obj):
+        open_slots = getattr(obj, 'open_slots', None)
+        if open_slots is None:
+            open_slots = obj.slots.filter(is_open=True).select_related(
+                'instrument'
             )
-            return True
+        return [slot.instrument.title for slot in open_slots]
+
+    def set_needs(self, band, instruments):
+        """Replace the open slots of ``band`` with ``instruments``."""
+
+        band.slots.filter(is_open=True).delete()
+        BandSlot.objects.bulk_create(
+            BandSlot(band=band, instrument=instrument)
+            for instrument in instruments
+        )
+        band.__dict__.pop('open_slots', None)
 
+    @transaction.atomic
     def create(self, validated_data):
         request = self.context['request']
         author = request.user
@@ -120,27 +261,31 @@ class BandSerializer(serializers.ModelSerializer):
                 'Fill your instument field correctly'
             )
 
+        needs = validated_data.pop('needs', [])
         band = Band.objects.create(author=author, **validated_data)
-        self.create_or_refuse_user_in_band(author, band, instrument)
-        band.participants.add(author)
+        try:
+            join_band(band, author, instrument)
+        except MembershipError as error:
+            raise serializers.ValidationError(str(error))
+        band.refresh_from_db(fields=('members_count', 'is_full'))
+        self.set_needs(band, needs)
 
         return band
 
     def update(self, instance, validated_data):
         if 'quantity' in validated_data:
-            quantity = validated_data.pop('quantity')
-            if instance.participants.count() == quantity:
-                instance.is_full = True
-            elif instance.participants.count() < quantity:
-                instance.is_full = False
-            else:
-                raise serializers.ValidationError(
-                    'Number of Participants must be bigger than quantity'
-                )
-            instance.quantity = quantity
-        print(validated_data)
-        instance.save()
-        return super().update(instance, validated_data)
+            try:
+                set_quantity(instance, validated_data.pop('quantity'))
+            except MembershipError as error:
+                raise serializers.ValidationError(str(error))
+        if 'needs' in validated_data:
+            self.set_needs(instance, validated_data.pop('needs'))
+
+        # The member count and is_full belong to the membership service.
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        instance.save(update_fields=[*validated_data, 'features_updated'])
+        return instance
 
 
 class RequestSerializer(serializers.ModelSerializer):
@@ -185,17 +330,99 @@ class RequestSerializer(serializers.ModelSerializer):
         return attrs
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class InboxEntrySerializer(serializers.Serializer):
+    """Pending Invite or Request Serializer."""
+
+    kind = serializers.CharField()
+    id = serializers.IntegerField()
+    created = serializers.DateTimeField()
+    band = serializers.StringRelatedField()
+    instrument = serializers.StringRelatedField()
+    author = serializers.PrimaryKeyRelatedField(read_only=True)
+
+
+class BulkRequestListSerializer(serializers.ListSerializer):
+    """Asking to join many bands at once with a fixed number of queries."""
+
+    def create(self, validated_data):
+        author = self.context['request'].user
+        band_ids = {item['band'] for item in validated_data}
+        leaders = dict(Band.objects.filter(pk__in=band_ids).values_list(
+            'pk', 'author_id'
+        ))
+        instruments = Instrument.objects.in_bulk(
+            {item['instrument'] for item in validated_data},
+            field_name='title'
+        )
+        requested = set(Request.objects.filter(
+            author=author, user__in=leaders.values()
+        ).values_list('user_id', flat=True))
+        joined = set(UserBandInstrument.objects.filter(
+            user=author, band__in=band_ids
+        ).values_list('band_id', flat=True))
+
+        results = []
+        requests = []
+        for item in validated_data:
+            band = item['band']
+            result = dict(item)
+            if band not in leaders:
+                result['error'] = 'There is no such band'
+            elif item['instrument'] not in instruments:
+                result['error'] = 'Fill instrument field correctly'
+            elif leaders[band] in requested:
+                result['error'] = (
+                    'You have already send request into this band'
+                )
+            elif band in joined or leaders[band] == author.pk:
+                result['error'] = 'You are already in this band'
+            else:
+                requested.add(leaders[band])
+                requests.append(Request(
+                    author=author, user_id=leaders[band], band_id=band,
+                    instrument=instruments[item['instrument']]
+                ))
+            results.append(result)
+
+        ids = create_pending(Request, requests, 'band_id')
+        for result in results:
+            if 'error' not in result:
+                result['id'] = ids.get(result['band'])
+        return results
+
+
+class BulkRequestSerializer(serializers.Serializer):
+    """One ``(band, instrument)`` pair of a bulk request."""
+
+    band = serializers.IntegerField()
+    instrument = serializers.CharField()
+
+    class Meta:
+        list_serializer_class = BulkRequestListSerializer
+
+
+class ReviewSerializer(AudioUploadMixin, serializers.ModelSerializer):
     """Comment Serializer."""
 
     image = Base64ImageField(required=False)
     audio = Base64AudioField(required=False)
+    audio_meta = AudioMetaField()
 
     class Meta:
         model = Review
-        fields = ('id', 'post', 'author', 'text', 'image', 'audio', 'created')
+        fields = (
+            'id', 'post', 'author', 'text', 'image', 'audio', 'audio_meta',
+            'audio_upload', 'created'
+        )
         read_only_fields = ('created',)
 
+    def create(self, validated_data):
+        upload = validated_data.pop('audio_upload', None)
+        review = super().create(validated_data)
+        if upload is not None:
+            self.attach_audio(review, upload)
+        return review
+
     def validate(self, attrs):
         post = attrs['post']
         author = attrs['author']
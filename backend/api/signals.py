@@ -0,0 +1,18 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from info.models import Genre, Instrument, InstrumentCategory, Tag
+
+from .reference import invalidate_reference
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_save, sender=Instrument)
+@receiver(post_save, sender=InstrumentCategory)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Genre)
+@receiver(post_delete, sender=Instrument)
+@receiver(post_delete, sender=InstrumentCategory)
+@receiver(post_delete, sender=Tag)
+def reference_changed(sender, **kwargs):
+    invalidate_reference()
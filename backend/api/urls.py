@@ -1,16 +1,20 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import (BandViewSet, InstrumentCategoryViewSet, InstrumentViewSet,
-                    PostViewSet, RequestViewSet, TagViewSet)
+from .views import (BandViewSet, FeedViewSet, InboxViewSet,
+                    InstrumentCategoryViewSet, InstrumentViewSet, PostViewSet,
+                    ReferenceView, RequestViewSet, TagViewSet, UploadViewSet)
 
 
 router = DefaultRouter()
 router.register(r'bands', BandViewSet, basename='bands')
+router.register(r'feed', FeedViewSet, basename='feed')
+router.register(r'inbox', InboxViewSet, basename='inbox')
 router.register(r'instruments', InstrumentViewSet, basename='instruments')
 router.register(r'posts', PostViewSet, basename='posts')
 router.register(r'tags', TagViewSet, basename='tags')
 router.register(r'requests', RequestViewSet, basename='requests')
+router.register(r'uploads', UploadViewSet, basename='uploads')
 router.register(
     r'instrument_categories',
     InstrumentCategoryViewSet,
@@ -19,5 +23,6 @@ router.register(
 
 
 urlpatterns = [
+    path('reference/', ReferenceView.as_view(), name='reference'),
     path('', include(router.urls))
 ]
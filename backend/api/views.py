@@ -1,40 +1,164 @@
+import fcntl
+import math
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Prefetch, Q
+from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
-from rest_framework import status, viewsets
+from django.utils.cache import get_conditional_response
+from rest_framework import mixins, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import (NotFound, ParseError,
+                                       ValidationError)
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
-from info.models import (Band, Bookmark, Review, Instrument,
+from info.models import (Band, BandSlot, Bookmark, Review, Instrument,
                          InstrumentCategory, Invite, Post,
-                         Request, Tag, UserBandInstrument)
-from utils.pagination import ResponseOnlyPagination
-
+                         Request, Tag, Upload, UserBandInstrument)
+from info.inbox import inbox, pending_counts
+from info.membership import MembershipError, join_band, leave_band
+from info.recommendations import recommend_bands
+from info.search import search_posts
+from info.timeline import home_timeline
+from users.serializers import BULK_LIMIT
+from users.stats import change_stats
+from utils.events import send_events
+from utils.pagination import (InboxPagination, KeysetPagination,
+                              RankedPagination, ResponseOnlyPagination,
+                              TimelinePagination)
+
+from .fields import sniff_audio
 from .permissions import IsAdminOrReadOnly, IsAuthorOrReadOnly
+from .reference import get_reference
 from .serializers import (BandSerializer, BookmarkSeriazlier,
+                          BulkRequestSerializer, InboxEntrySerializer,
                           InstrumentCategorySerializer, InstrumentSerailizer,
                           PostSerializer, RequestSerializer, ReviewSerializer,
-                          TagSerializer)
+                          TagSerializer, UploadSerializer)
 
 
 User = get_user_model()
 
+RECOMMENDED_LIMIT = 10
+RECOMMENDED_MAX_LIMIT = 50
+
+
+def accepts_gzip(accept_encoding):
+    """Whether an ``Accept-Encoding`` header allows a gzip body.
+
+    A coding refused with ``q=0`` is not acceptable, and ``*`` stands
+    for every coding the header does not name.
+    """
+
+    qualities = {}
+    for item in accept_encoding.split(','):
+        coding, *params = item.split(';')
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.strip().lower()] = quality
+    for coding in ('gzip', 'x-gzip', '*'):
+        if coding in qualities:
+            return qualities[coding] > 0
+    return False
+
+
+def get_post_queryset(user):
+    """Posts with everything PostSerializer renders fetched up front."""
+
+    queryset = Post.objects.select_related('author').prefetch_related(
+        'tags', 'author__instruments'
+    )
+    if user.is_anonymous:
+        return queryset
+
+    return queryset.annotate(
+        is_liked=Exists(Post.likes.through.objects.filter(
+            post=OuterRef('pk'), user=user
+        )),
+        is_bookmarked=Exists(Bookmark.objects.filter(
+            post=OuterRef('pk'), user=user
+        )),
+        has_reviewed=Exists(Review.objects.filter(
+            post=OuterRef('pk'), author=user
+        )),
+    )
+
 
 class BandViewSet(viewsets.ModelViewSet):
     serializer_class = BandSerializer
     permission_classes = [IsAuthorOrReadOnly]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
-        base_queryset = Band.objects.filter(is_visible=True)
+        visible = Q(is_visible=True)
+        if self.request.user.is_authenticated:
+            visible |= Q(author=self.request.user)
 
-        if not self.request.user.is_anonymous:
-            base_queryset += Band.objects.filter(
-                is_visible=False,
-                author=self.request.user
-            )
+        roster = UserBandInstrument.objects.select_related(
+            'user', 'instrument'
+        )
+        open_slots = BandSlot.objects.filter(
+            is_open=True
+        ).select_related('instrument')
+        queryset = Band.objects.filter(visible).select_related(
+            'author'
+        ).prefetch_related(
+            Prefetch('band_user', queryset=roster),
+            Prefetch('slots', queryset=open_slots, to_attr='open_slots')
+        )
 
-        return base_queryset
+        needs = self.request.query_params.get('needs')
+        if needs and self.action == 'list':
+            queryset = queryset.filter(pk__in=BandSlot.objects.filter(
+                instrument__title=needs, is_open=True
+            ).values('band'))
+        return queryset
+
+    @action(
+        methods=['GET'],
+        detail=False,
+        permission_classes=[IsAuthenticated]
+    )
+    def recommended(self, request):
+        """Bands looking for someone like the user, best match first."""
+
+        try:
+            limit = int(request.query_params.get('limit', RECOMMENDED_LIMIT))
+        except ValueError:
+            raise ParseError('limit must be a whole number')
+        limit = min(max(limit, 1), RECOMMENDED_MAX_LIMIT)
+
+        ids = recommend_bands(request.user, limit)
+        bands = self.get_queryset().in_bulk(ids)
+        bands = [bands[pk] for pk in ids if pk in bands]
+        serializer = self.get_serializer(bands, many=True)
+        return Response(serializer.data)
+
+    @action(
+        methods=['POST'],
+        detail=True,
+        permission_classes=[IsAuthenticated]
+    )
+    def leave(self, request, pk):
+        """Leaving the band and reopening your slot."""
+
+        band = get_object_or_404(self.get_queryset(), pk=pk)
+        try:
+            leave_band(band, request.user)
+        except MembershipError as error:
+            raise ValidationError(str(error))
+
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(
         methods=['POST', 'DELETE'],
@@ -79,10 +203,80 @@ class TagViewSet(viewsets.ModelViewSet):
     lookup_field = 'slug'
 
 
+class ReferenceView(APIView):
+    """Categories, Instruments, Tags and Genres in one Payload.
+
+    Revalidate with ``If-None-Match``, the payload only changes when
+    one of them does.
+    """
+
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        reference = get_reference()
+        body, etag = reference.body, f'"{reference.etag}"'
+        accepted = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        gzipped = accepts_gzip(accepted)
+        if gzipped:
+            body, etag = reference.gzipped, f'"{reference.etag}-gzip"'
+        headers = {
+            'ETag': etag,
+            'Cache-Control': 'no-cache',
+            'Vary': 'Accept-Encoding',
+        }
+
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(body, content_type='application/json')
+            if gzipped:
+                response['Content-Encoding'] = 'gzip'
+        for header, value in headers.items():
+            response[header] = value
+        return response
+
+
 class PostViewSet(viewsets.ModelViewSet):
-    queryset = Post.objects.all()
     serializer_class = PostSerializer
     permission_classes = [IsAuthorOrReadOnly]
+    pagination_class = KeysetPagination
+
+    def get_search_query(self):
+        return self.request.query_params.get('search', '').strip()
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator') and self.get_search_query():
+            self._paginator = RankedPagination()
+        return super().paginator
+
+    def get_queryset(self):
+        queryset = get_post_queryset(self.request.user)
+        if self.action != 'list':
+            return queryset
+
+        tag = self.request.query_params.get('tag')
+        if tag:
+            queryset = queryset.filter(tags__slug=tag)
+
+        for param, lookup in (('min_duration', 'gte'),
+                              ('max_duration', 'lte')):
+            value = self.request.query_params.get(param)
+            if value:
+                try:
+                    value = float(value)
+                except ValueError:
+                    value = math.nan
+                if not math.isfinite(value):
+                    raise ParseError(f'{param} must be a number of seconds')
+                queryset = queryset.filter(
+                    **{f'audio_duration__{lookup}': value}
+                )
+
+        query = self.get_search_query()
+        if query:
+            queryset = search_posts(queryset, query)
+        return queryset
 
     @action(
         methods=['POST', 'DELETE'],
@@ -97,14 +291,33 @@ class PostViewSet(viewsets.ModelViewSet):
         except Post.DoesNotExist:
             raise ValidationError('THERE IS NO SUCH POST')
 
+        like_model = Post.likes.through
+
         if request.method == 'POST':
-            post.likes.add(request.user)
+            with transaction.atomic():
+                _, created = like_model.objects.get_or_create(
+                    post=post, user=request.user
+                )
+                if created:
+                    post.change_counter('likes_count', 1)
+                    change_stats('likes_received', [post.author_id])
+                    if post.author_id != request.user.id:
+                        send_events([(post.author_id, {
+                            'type': 'like', 'post': post.id,
+                            'user': request.user.id,
+                        })])
             return Response(
                 'Your like was submitted',
                 status=status.HTTP_200_OK
             )
 
-        post.likes.remove(request.user)
+        with transaction.atomic():
+            deleted, _ = like_model.objects.filter(
+                post=post, user=request.user
+            ).delete()
+            if deleted:
+                post.change_counter('likes_count', -deleted)
+                change_stats('likes_received', [post.author_id], -deleted)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(
@@ -119,18 +332,27 @@ class PostViewSet(viewsets.ModelViewSet):
             context = {'request': request}
 
             for key, value in request.data.items():
-                if key not in ('text', 'image', 'audio'):
+                if key not in ('text', 'image', 'audio', 'audio_upload'):
                     raise ValidationError('Wrong Field')
                 data[key] = value
 
             serializer = ReviewSerializer(data=data, context=context)
             serializer.is_valid(raise_exception=True)
-            serializer.save()
+            with transaction.atomic():
+                review = serializer.save()
+                review.post.change_counter('reviews_count', 1)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
 
         post = get_object_or_404(Post, id=pk)
-        review = get_object_or_404(Review, post=post, author=request.user)
-        review.delete()
+        with transaction.atomic():
+            # A concurrent DELETE may have taken the review already.
+            _, deleted = Review.objects.filter(
+                post=post, author=request.user
+            ).delete()
+            deleted = deleted.get(Review._meta.label, 0)
+            if not deleted:
+                raise NotFound()
+            post.change_counter('reviews_count', -deleted)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(
@@ -157,18 +379,161 @@ class PostViewSet(viewsets.ModelViewSet):
             serializer = BookmarkSeriazlier(
                 data=data, context={'request': request})
             serializer.is_valid(raise_exception=True)
-            serializer.save()
+            with transaction.atomic():
+                bookmark = serializer.save()
+                bookmark.post.change_counter('bookmarks_count', 1)
 
             return Response(serializer.data, status=status.HTTP_201_CREATED)
 
-        user = request.user
         post = get_object_or_404(Post, id=pk)
-        obj = get_object_or_404(Bookmark, post=post, user=user)
-        obj.delete()
+        with transaction.atomic():
+            _, deleted = Bookmark.objects.filter(
+                post=post, user=request.user
+            ).delete()
+            deleted = deleted.get(Bookmark._meta.label, 0)
+            if not deleted:
+                raise NotFound()
+            post.change_counter('bookmarks_count', -deleted)
 
         return Response('DELETED', status=status.HTTP_204_NO_CONTENT)
 
 
+class FeedViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    """Home Timeline: Posts of the Users you Follow."""
+
+    serializer_class = PostSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = TimelinePagination
+
+    def get_queryset(self):
+        return get_post_queryset(self.request.user)
+
+    def get_timeline(self, position, limit):
+        # Entries of posts the queryset leaves out are skipped, and the
+        # page is filled from further down the timeline.
+        posts = []
+        while len(posts) < limit:
+            wanted = limit - len(posts)
+            entries = home_timeline(self.request.user, position, wanted)
+            found = self.get_queryset().in_bulk(
+                [post_id for _, post_id in entries]
+            )
+            posts += [
+                found[post_id] for _, post_id in entries if post_id in found
+            ]
+            if len(entries) < wanted:
+                break
+            position = entries[-1]
+        return posts
+
+    def list(self, request):
+        posts = self.paginator.paginate_timeline(request, self.get_timeline)
+        serializer = self.get_serializer(posts, many=True)
+        return self.paginator.get_paginated_response(serializer.data)
+
+
+class InboxViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    """Pending Invites and Requests Addressed to you, Newest First."""
+
+    serializer_class = InboxEntrySerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = InboxPagination
+
+    def get_inbox(self, position, limit):
+        return inbox(self.request.user, position, limit)
+
+    def list(self, request):
+        entries = self.paginator.paginate_timeline(request, self.get_inbox)
+        serializer = self.get_serializer(entries, many=True)
+        return self.paginator.get_paginated_response(serializer.data)
+
+    @action(methods=['GET'], detail=False)
+    def counts(self, request):
+        return Response(pending_counts(request.user))
+
+
+class UploadViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin,
+                    mixins.DestroyModelMixin, viewsets.GenericViewSet):
+    """Resumable Audio Uploads.
+
+    ``POST`` opens a session for a file of the given ``size``. Raw chunks
+    are then sent with ``PATCH`` and an ``Upload-Offset`` header equal to
+    the number of bytes the server already has, which ``GET`` and
+    ``HEAD`` report after an interruption. A complete upload is attached
+    to a post or a review through their ``audio_upload`` field.
+    """
+
+    serializer_class = UploadSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return Upload.objects.filter(user=self.request.user)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        offset = getattr(response, 'data', None)
+        if isinstance(offset, dict) and 'offset' in offset:
+            response['Upload-Offset'] = offset['offset']
+        return super().finalize_response(request, response, *args, **kwargs)
+
+    def perform_destroy(self, instance):
+        instance.discard()
+
+    def partial_update(self, request, pk=None):
+        upload = self.get_object()
+        try:
+            offset = int(request.headers['Upload-Offset'])
+            length = int(request.headers['Content-Length'])
+        except (KeyError, ValueError):
+            raise ParseError('Upload-Offset header is required')
+
+        with open(upload.get_path(), 'r+b') as part:
+            try:
+                fcntl.flock(part, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return self.conflict(upload)
+
+            upload.refresh_from_db()
+            if upload.is_complete or offset != upload.offset:
+                return self.conflict(upload)
+            if offset + length > upload.size:
+                raise ParseError('Chunk exceeds the upload size')
+
+            part.seek(offset)
+            part.truncate()
+            remaining = length
+            while remaining:
+                chunk = request.stream.read(
+                    min(remaining, settings.UPLOAD_CHUNK_SIZE)
+                )
+                if not chunk:
+                    break
+                part.write(chunk)
+                remaining -= len(chunk)
+            part.flush()
+
+            upload.offset = offset + length - remaining
+            if upload.offset == upload.size:
+                part.seek(0)
+                extension = sniff_audio(part.read(16))
+                if extension is None:
+                    upload.discard()
+                    return Response(
+                        'Upload a file of a supported type',
+                        status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+                    )
+                upload.extension = extension
+                upload.is_complete = True
+            upload.save(update_fields=['offset', 'extension', 'is_complete'])
+
+        return Response(self.get_serializer(upload).data)
+
+    def conflict(self, upload):
+        upload.refresh_from_db()
+        return Response(
+            self.get_serializer(upload).data, status=status.HTTP_409_CONFLICT
+        )
+
+
 class RequestViewSet(viewsets.ModelViewSet):
     serializer_class = RequestSerializer
     permission_classes = [IsAuthorOrReadOnly]
@@ -176,6 +541,21 @@ class RequestViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         return Request.objects.filter(user=self.request.user)
 
+    @action(
+        methods=['POST'],
+        detail=False,
+        permission_classes=[IsAuthenticated]
+    )
+    def bulk(self, request):
+        """Asking to join many bands, each item succeeding on its own."""
+
+        serializer = BulkRequestSerializer(
+            data=request.data, many=True, max_length=BULK_LIMIT,
+            context={'request': request}
+        )
+        serializer.is_valid(raise_exception=True)
+        return Response(serializer.save())
+
     @action(
         methods=['POST'],
         detail=True,
@@ -192,17 +572,14 @@ class RequestViewSet(viewsets.ModelViewSet):
         if request_obj.user != request.user:
             raise ValidationError('hey, its not yours')
 
-        band = Band.objects.get(author=request.user)
-
-        if band.quantity <= band.participants.count():
-            raise ValidationError('Your band is full')
-
-        band.participants.add(request_obj.author)
-        UserBandInstrument.objects.create(
-            user=request_obj.author,
-            instrument=request_obj.instrument,
-            band=band
-        )
-        request_obj.delete()
+        with transaction.atomic():
+            try:
+                join_band(
+                    request_obj.band, request_obj.author,
+                    request_obj.instrument
+                )
+            except MembershipError as error:
+                raise ValidationError(str(error))
+            request_obj.delete()
 
         return Response(status=status.HTTP_204_NO_CONTENT)
@@ -115,6 +115,8 @@ STATIC_ROOT = BASE_DIR / 'static_backend'
 MEDIA_URL = '/media_backend/'
 MEDIA_ROOT = BASE_DIR / 'media_backend'
 
+DEFAULT_FILE_STORAGE = 'utils.storage.ContentAddressedStorage'
+
 
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
@@ -122,7 +124,7 @@ REST_FRAMEWORK = {
     ],
 
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'utils.authentication.CachedTokenAuthentication',
     ],
 
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
@@ -133,3 +135,73 @@ REST_FRAMEWORK = {
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = 'users.User'
+
+
+TIMELINE_STORE = 'info.timeline.DatabaseTimelineStore'
+
+TIMELINE_FANOUT_LIMIT = 1000
+
+TIMELINE_MAX_LENGTH = 800
+
+FOLLOW_GRAPH_MAX_AGE = 10 * 60
+
+BASE64_IMAGE_MAX_SIZE = 10 * 1024 * 1024
+
+BASE64_AUDIO_MAX_SIZE = 50 * 1024 * 1024
+
+UPLOAD_SESSION_DIR = 'uploads'
+
+UPLOAD_MAX_SIZE = 50 * 1024 * 1024
+
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+MEDIA_WORKERS = int(os.getenv('MEDIA_WORKERS', default=2))
+
+IMAGE_RENDITIONS = {
+    'thumb': (320, 320),
+    'full': None,
+}
+
+WAVEFORM_PEAKS = 1600
+
+# None to send media from the app, 'x-accel-redirect' for nginx or
+# 'x-sendfile' for Apache and lighttpd.
+MEDIA_SENDFILE_MODE = os.getenv('MEDIA_SENDFILE_MODE') or None
+
+MEDIA_ACCEL_PREFIX = '/protected_media/'
+
+MEDIA_CACHE_MAX_AGE = 24 * 60 * 60
+
+MEDIA_GC_GRACE_PERIOD = 24 * 60 * 60
+
+MEDIA_GC_CHECKPOINT = BASE_DIR / 'media_gc.checkpoint'
+
+INBOX_PENDING_TTL = 30 * 24 * 60 * 60
+
+EVENTS_PATH = '/api/events/'
+
+# 'utils.events.PostgresEventBroker' once more than one worker serves
+# the event stream.
+EVENTS_BROKER = os.getenv(
+    'EVENTS_BROKER', default='utils.events.MemoryEventBroker'
+)
+
+EVENTS_HEARTBEAT = 15
+
+EVENTS_QUEUE_SIZE = 100
+
+# Where CachedTokenAuthentication keeps tokens it resolved. The memory
+# cache is private to each process; with several workers
+# 'utils.authentication.DjangoTokenCache' shares one through a cache
+# such as Redis and also forgets tokens in every worker at once.
+TOKEN_CACHE = os.getenv(
+    'TOKEN_CACHE', default='utils.authentication.MemoryTokenCache'
+)
+TOKEN_CACHE_ALIAS = 'default'
+TOKEN_CACHE_SIZE = 10_000
+TOKEN_CACHE_TTL = 60
+
+# Seconds a process serves the reference payload before checking its
+# version in the database, and before rendering it again regardless.
+REFERENCE_CHECK_INTERVAL = 5
+REFERENCE_MAX_AGE = 300
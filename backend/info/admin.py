@@ -4,6 +4,7 @@ from .forms import GenreForm
 from .models import (Band, Bookmark, Review, Instrument, Invite,
                      InstrumentCategory, Post, Request,
                      Tag, UserBandInstrument, Genre)
+from .search import search_posts
 
 
 @admin.register(Band)
@@ -70,6 +71,11 @@ class PostAdmin(admin.ModelAdmin):
     search_fields = ('title',)
     empty_value_display = '-empty-'
 
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return queryset, False
+        return search_posts(queryset, search_term), False
+
 
 @admin.register(Request)
 class RequestAdmin(admin.ModelAdmin):
@@ -1,6 +1,13 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class InfoConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'info'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .search import reinstall_search
+
+        post_migrate.connect(reinstall_search, sender=self)
@@ -0,0 +1,187 @@
+"""The inbox: pending invites and requests addressed to a user.
+
+Both tables are read newest first through their ``(user, is_accepted,
+-created, -id)`` indexes and merged, so a page costs two range scans no
+matter how long the inbox is. Entries are keyed by ``(created, kind,
+id)``, ``kind`` telling apart the two id sequences.
+
+How many entries are pending is stored on the user and moved by signals
+whenever an entry is created or deleted, accepting one deletes it too.
+Bulk writes skip the signals and call ``change_pending`` once per batch.
+"""
+import heapq
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F, Q, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from utils.events import send_events
+
+from .models import Invite, Request
+
+
+User = get_user_model()
+
+KINDS = {'invite': Invite, 'request': Request}
+PENDING_FIELDS = {Invite: 'pending_invites', Request: 'pending_requests'}
+
+SWEEP_BATCH_SIZE = 1000
+
+counting_paused = ContextVar('counting_paused', default=False)
+
+
+@contextmanager
+def pause_counting():
+    """Have the signals leave the pending counters to the caller."""
+
+    token = counting_paused.set(True)
+    try:
+        yield
+    finally:
+        counting_paused.reset(token)
+
+
+def change_pending(model, user_ids, delta=1):
+    """Shift the pending counter of every user in ``user_ids`` by
+    ``delta`` per occurrence."""
+
+    field = PENDING_FIELDS[model]
+    by_change = {}
+    for user_id, times in Counter(user_ids).items():
+        by_change.setdefault(delta * times, []).append(user_id)
+    for change, users in by_change.items():
+        User.objects.filter(pk__in=users).update(
+            **{field: Greatest(F(field) + change, 0)}
+        )
+
+
+def entry_event(entry):
+    """What the recipient of a new invite or request is pushed."""
+
+    return {
+        'type': entry._meta.model_name, 'id': entry.id,
+        'band': entry.band_id, 'author': entry.author_id,
+    }
+
+
+def create_pending(model, entries, key):
+    """Insert new ``entries`` of one author, skipping conflicts.
+
+    Each entry gets the id of the row now holding its ``key``, the field
+    telling the author's entries apart. Only rows actually inserted are
+    counted and announced to their recipients: the entries share one
+    ``created`` stamp that a row written by a concurrent duplicate does
+    not carry. Returns the ids by ``key``.
+    """
+
+    if not entries:
+        return {}
+    created = timezone.now()
+    for entry in entries:
+        entry.created = created
+    model.objects.bulk_create(entries, ignore_conflicts=True)
+
+    rows = model.objects.filter(
+        author_id=entries[0].author_id,
+        **{f'{key}__in': [getattr(entry, key) for entry in entries]}
+    ).values_list(key, 'pk', 'created')
+    ids = {}
+    inserted = set()
+    for value, pk, stamp in rows:
+        ids[value] = pk
+        if stamp == created:
+            inserted.add(pk)
+
+    new = []
+    for entry in entries:
+        entry.id = ids.get(getattr(entry, key))
+        if entry.id in inserted:
+            new.append(entry)
+    change_pending(model, [entry.user_id for entry in new])
+    send_events((entry.user_id, entry_event(entry)) for entry in new)
+    return ids
+
+
+def pending_counts(user):
+    invites, requests = User.objects.filter(pk=user.pk).values_list(
+        'pending_invites', 'pending_requests'
+    ).get()
+    return {'invites': invites, 'requests': requests}
+
+
+def after(kind, position):
+    """Rows of ``kind`` that come after ``position`` newest first."""
+
+    created, position_kind, pk = position
+    condition = Q(created__lt=created)
+    if kind < position_kind:
+        condition |= Q(created=created)
+    elif kind == position_kind:
+        condition |= Q(created=created, id__lt=pk)
+    return condition
+
+
+def inbox(user, position=None, limit=None):
+    """Pending invites and requests of ``user``, newest first."""
+
+    if position is not None:
+        created, kind, pk = position
+        if isinstance(created, str):
+            created = parse_datetime(created)
+        if created is None or kind not in KINDS:
+            raise ValueError('Inbox position needs a created and a kind')
+        position = (created, kind, int(pk))
+
+    streams = []
+    for kind, model in KINDS.items():
+        entries = model.objects.filter(
+            user=user, is_accepted=False
+        ).select_related('band', 'instrument').annotate(kind=Value(kind))
+        if position is not None:
+            entries = entries.filter(after(kind, position))
+        entries = entries.order_by('-created', '-id')
+        if limit is not None:
+            entries = entries[:limit]
+        streams.append(list(entries))
+
+    merged = heapq.merge(
+        *streams, key=lambda entry: (entry.created, entry.kind, entry.id),
+        reverse=True
+    )
+    return list(merged)[:limit]
+
+
+def expire_pending(ttl=None, batch_size=SWEEP_BATCH_SIZE, dry_run=False):
+    """Delete invites and requests left pending longer than ``ttl``
+    seconds, returning how many of each kind went."""
+
+    if ttl is None:
+        ttl = settings.INBOX_PENDING_TTL
+    cutoff = timezone.now() - timedelta(seconds=ttl)
+    expired = {}
+    for kind, model in KINDS.items():
+        stale = model.objects.filter(is_accepted=False, created__lt=cutoff)
+        if dry_run:
+            expired[kind] = stale.count()
+            continue
+
+        expired[kind] = 0
+        while True:
+            with transaction.atomic(), pause_counting():
+                batch = list(stale.order_by('created').values_list(
+                    'pk', 'user_id'
+                )[:batch_size])
+                if not batch:
+                    break
+                model.objects.filter(pk__in=[pk for pk, _ in batch]).delete()
+                change_pending(model, [user for _, user in batch], -1)
+            expired[kind] += len(batch)
+    return expired
@@ -0,0 +1,52 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from info.models import Post
+from info.timeline import get_store, over_fanout_limit
+from users.models import Follow
+
+
+class Command(BaseCommand):
+    """Building home timelines from existing Follow rows."""
+
+    help = 'Fill the timeline store with posts of followed authors.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', type=int, action='append', dest='users',
+            help='Only backfill the timeline of this user id.'
+        )
+
+    def handle(self, **options):
+        store = get_store()
+        length = settings.TIMELINE_MAX_LENGTH
+
+        follows = Follow.objects.exclude(over_fanout_limit()).order_by(
+            'user_id'
+        )
+        if options['users']:
+            follows = follows.filter(user_id__in=options['users'])
+
+        timelines = 0
+        current_user, authors = None, []
+        rows = follows.values_list('user_id', 'author_id').iterator()
+        for user_id, author_id in rows:
+            if user_id != current_user and authors:
+                self.backfill(store, current_user, authors, length)
+                timelines += 1
+                authors = []
+            current_user = user_id
+            authors.append(author_id)
+        if authors:
+            self.backfill(store, current_user, authors, length)
+            timelines += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Timelines built: {timelines}'))
+
+    def backfill(self, store, user_id, authors, length):
+        entries = (
+            Post.objects.filter(author_id__in=authors)
+            .order_by('-pub_date', '-id')
+            .values_list('pub_date', 'id', 'author_id')[:length]
+        )
+        store.backfill(user_id, list(entries))
@@ -0,0 +1,76 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from info.models import Post, Review
+from info.waveforms import META_KEYS, analyze_audio, audio_meta_fields
+
+
+def analyze_row(row, points):
+    pk, path = row
+    return pk, analyze_audio(path, points)
+
+
+class Command(BaseCommand):
+    """Computing duration and waveform peaks of stored audio."""
+
+    help = 'Backfill audio metadata and waveform peaks of posts and reviews.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='Number of worker processes.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Number of rows saved per UPDATE.'
+        )
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Analyze again audio that already has metadata.'
+        )
+
+    def handle(self, **options):
+        analyze = partial(analyze_row, points=settings.WAVEFORM_PEAKS)
+        with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+            for model in (Post, Review):
+                rows = model.objects.exclude(audio='').exclude(
+                    audio__isnull=True
+                )
+                if not options['force']:
+                    rows = rows.filter(audio_duration__isnull=True)
+                rows = (
+                    (pk, default_storage.path(name))
+                    for pk, name in rows.order_by('pk').values_list(
+                        'pk', 'audio'
+                    ).iterator()
+                )
+
+                analyzed = failed = 0
+                batch = []
+                for pk, meta in pool.map(
+                        analyze, rows, chunksize=16):
+                    if meta is None:
+                        failed += 1
+                        continue
+                    batch.append(model(pk=pk, **audio_meta_fields(meta)))
+                    if len(batch) >= options['batch_size']:
+                        analyzed += self.save(model, batch)
+                        batch = []
+                analyzed += self.save(model, batch)
+
+                self.stdout.write(self.style.SUCCESS(
+                    f'{model._meta.verbose_name_plural}: '
+                    f'{analyzed} analyzed, {failed} unreadable'
+                ))
+
+    def save(self, model, batch):
+        if batch:
+            model.objects.bulk_update(
+                batch, [f'audio_{key}' for key in META_KEYS]
+            )
+        return len(batch)
@@ -0,0 +1,69 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from info.models import Band, Post, Review
+from info.renditions import render_renditions, renditions_field
+
+
+IMAGE_FIELDS = (
+    (Post, 'image'),
+    (Review, 'image'),
+    (Band, 'poster'),
+)
+
+
+def stored_images():
+    for model, field in IMAGE_FIELDS:
+        names = (
+            model.objects.exclude(**{field: ''})
+            .exclude(**{f'{field}__isnull': True})
+            .values_list(field, flat=True)
+            .distinct()
+            .iterator()
+        )
+        for name in names:
+            yield model, field, name
+
+
+class Command(BaseCommand):
+    """Rendering missing thumbnails and WebP variants of stored images
+    and recording them on the rows showing the images."""
+
+    help = 'Backfill renditions of Post, Review and Band images.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='Number of worker processes.'
+        )
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Render again even if renditions are up to date.'
+        )
+
+    def handle(self, **options):
+        render = partial(
+            render_renditions,
+            renditions=settings.IMAGE_RENDITIONS,
+            force=options['force']
+        )
+        images = list(stored_images())
+        paths = [default_storage.path(name) for _, _, name in images]
+        written = 0
+        with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+            results = pool.map(render, paths, chunksize=16)
+            for (model, field, name), (rendered, count) in zip(
+                    images, results):
+                model.objects.filter(**{field: name}).update(
+                    **{renditions_field(field): rendered}
+                )
+                written += count
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Images: {len(images)}, renditions written: {written}'
+        ))
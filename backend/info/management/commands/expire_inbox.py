@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from info.inbox import SWEEP_BATCH_SIZE, expire_pending
+
+
+class Command(BaseCommand):
+    """Expiring invites and requests nobody answered."""
+
+    help = 'Delete invites and requests left pending longer than the TTL.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ttl', type=int, default=settings.INBOX_PENDING_TTL,
+            help='Seconds an invite or request may stay pending.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=SWEEP_BATCH_SIZE,
+            help='Number of rows deleted per transaction.'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Only report how many would expire.'
+        )
+
+    def handle(self, **options):
+        expired = expire_pending(
+            ttl=options['ttl'], batch_size=options['batch_size'],
+            dry_run=options['dry_run']
+        )
+        self.stdout.write(
+            f'Expired invites: {expired["invite"]}, '
+            f'requests: {expired["request"]}'
+        )
+        if not options['dry_run']:
+            self.stdout.write(self.style.SUCCESS('SUCCESS'))
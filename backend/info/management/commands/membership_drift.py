@@ -0,0 +1,59 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from info.models import UserBandInstrument
+
+
+User = get_user_model()
+
+# The automatic table of Band.participants, dropped by info.0016.
+PARTICIPANTS_TABLE = 'info_band_participants'
+
+
+def membership_drift():
+    """How participants and roster rows disagree, counted the way the
+    migration merging them resolves it."""
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT band_id, user_id FROM {PARTICIPANTS_TABLE}')
+        participants = set(cursor.fetchall())
+
+    members = set()
+    repeated = 0
+    for member in UserBandInstrument.objects.order_by('pk').values_list(
+            'band_id', 'user_id'):
+        if member in members:
+            repeated += 1
+        members.add(member)
+
+    missing = participants - members
+    players = set(User.instruments.through.objects.filter(
+        user_id__in={user_id for _, user_id in missing}
+    ).values_list('user_id', flat=True))
+    placed = sum(1 for _, user_id in missing if user_id in players)
+
+    return {
+        'roster rows without a participant': len(members - participants),
+        'participants given a roster row': placed,
+        'participants dropped, no instrument': len(missing) - placed,
+        'repeated roster rows merged': repeated,
+    }
+
+
+class Command(BaseCommand):
+    """Reporting band membership drift before it is merged away."""
+
+    help = (
+        'Report how band participants and roster rows disagree, before '
+        'migration info.0016 merges them.'
+    )
+
+    def handle(self, **options):
+        if PARTICIPANTS_TABLE not in connection.introspection.table_names():
+            self.stdout.write('Participants are already merged into rosters.')
+            return
+
+        for problem, count in membership_drift().items():
+            self.stdout.write(f'{problem}: {count}')
+        self.stdout.write(self.style.SUCCESS('SUCCESS'))
@@ -0,0 +1,72 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import (Count, F, IntegerField, OuterRef, Q,
+                              Subquery)
+from django.db.models.functions import Coalesce
+
+from info.models import Bookmark, Post, Review
+
+
+def count_subquery(model, field='post'):
+    """Correlated COUNT(*) of ``model`` rows pointing at the outer Post."""
+
+    rows = model.objects.filter(**{field: OuterRef('pk')}).order_by()
+    return Coalesce(
+        Subquery(
+            rows.values(field).annotate(total=Count('*')).values('total'),
+            output_field=IntegerField()
+        ),
+        0
+    )
+
+
+def actual_counters():
+    return {
+        'likes_count': count_subquery(Post.likes.through),
+        'reviews_count': count_subquery(Review),
+        'bookmarks_count': count_subquery(Bookmark),
+    }
+
+
+class Command(BaseCommand):
+    """Recomputing stored Post engagement counters that drifted."""
+
+    help = 'Recompute likes, reviews and bookmarks counters of posts.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of drifted posts fixed per UPDATE.'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Only report how many posts drifted.'
+        )
+
+    def handle(self, **options):
+        counters = actual_counters()
+        annotations = {
+            f'actual_{name}': expr for name, expr in counters.items()
+        }
+        drifted = Q()
+        for name in counters:
+            drifted |= ~Q(**{name: F(f'actual_{name}')})
+
+        drifted_ids = list(
+            Post.objects.annotate(**annotations)
+            .filter(drifted)
+            .order_by('pk')
+            .values_list('pk', flat=True)
+        )
+        self.stdout.write(f'Drifted posts: {len(drifted_ids)}')
+
+        if options['dry_run'] or not drifted_ids:
+            return
+
+        batch_size = options['batch_size']
+        for start in range(0, len(drifted_ids), batch_size):
+            batch = drifted_ids[start:start + batch_size]
+            with transaction.atomic():
+                Post.objects.filter(pk__in=batch).update(**actual_counters())
+
+        self.stdout.write(self.style.SUCCESS('SUCCESS'))
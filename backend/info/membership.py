@@ -0,0 +1,103 @@
+"""Joining and leaving bands.
+
+Every change to who plays in a band goes through here. The band row is
+locked with ``SELECT ... FOR UPDATE`` for the length of the change, and
+its stored ``members_count`` is only ever moved by a conditional UPDATE
+that refuses to pass ``quantity``, so concurrent joins cannot overfill a
+band even on databases without row locks.
+"""
+from django.db import transaction
+from django.db.models import BooleanField, ExpressionWrapper, F, Q
+from django.utils import timezone
+
+from .models import Band, BandSlot, UserBandInstrument
+
+
+class MembershipError(Exception):
+    pass
+
+
+class BandFull(MembershipError):
+    pass
+
+
+class AlreadyInBand(MembershipError):
+    pass
+
+
+class NotAMember(MembershipError):
+    pass
+
+
+def lock_band(band):
+    return Band.objects.select_for_update().get(pk=band.pk)
+
+
+def count_members(band, change):
+    """Move the stored member count of ``band`` by ``change``.
+
+    Returns False, changing nothing, when the band has no room left.
+    """
+
+    is_full = ExpressionWrapper(
+        Q(members_count__gte=F('quantity') - change),
+        output_field=BooleanField()
+    )
+    bands = Band.objects.filter(pk=band.pk)
+    if change > 0:
+        bands = bands.filter(members_count__lte=F('quantity') - change)
+    return bool(bands.update(
+        members_count=F('members_count') + change, is_full=is_full,
+        features_updated=timezone.now()
+    ))
+
+
+@transaction.atomic
+def join_band(band, user, instrument):
+    """Add ``user`` playing ``instrument`` to ``band``."""
+
+    band = lock_band(band)
+    if UserBandInstrument.objects.filter(user=user).exists():
+        raise AlreadyInBand('You are forbidden to join more than one band')
+    if not count_members(band, 1):
+        raise BandFull('The band is full')
+    return UserBandInstrument.objects.create(
+        user=user, band=band, instrument=instrument
+    )
+
+
+@transaction.atomic
+def leave_band(band, user):
+    """Remove ``user`` from ``band`` and reopen the slot they filled."""
+
+    band = lock_band(band)
+    if user.pk == band.author_id:
+        raise MembershipError('The author cannot leave their band')
+    _, deleted = UserBandInstrument.objects.filter(
+        band=band, user=user
+    ).delete()
+    deleted = deleted.get(UserBandInstrument._meta.label, 0)
+    if not deleted:
+        raise NotAMember('You are not in this band')
+    count_members(band, -deleted)
+    BandSlot.objects.filter(band=band, member=user).update(
+        is_open=True, member=None
+    )
+
+
+@transaction.atomic
+def set_quantity(band, quantity):
+    """Change how many members ``band`` takes, never below its roster."""
+
+    locked = lock_band(band)
+    if quantity < locked.members_count:
+        raise MembershipError(
+            'Number of Participants must be bigger than quantity'
+        )
+    band.quantity = quantity
+    band.members_count = locked.members_count
+    band.is_full = locked.members_count >= quantity
+    Band.objects.filter(pk=band.pk).update(
+        quantity=band.quantity, is_full=band.is_full,
+        features_updated=timezone.now()
+    )
@@ -0,0 +1,51 @@
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_subquery(model, field='post'):
+    rows = model.objects.filter(**{field: OuterRef('pk')}).order_by()
+    return Coalesce(
+        Subquery(
+            rows.values(field).annotate(total=Count('*')).values('total'),
+            output_field=IntegerField()
+        ),
+        0
+    )
+
+
+def fill_counters(apps, schema_editor):
+    Post = apps.get_model('info', 'Post')
+    Review = apps.get_model('info', 'Review')
+    Bookmark = apps.get_model('info', 'Bookmark')
+    Post.objects.update(
+        likes_count=count_subquery(Post.likes.through),
+        reviews_count=count_subquery(Review),
+        bookmarks_count=count_subquery(Bookmark),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('info', '0005_alter_genre_options_alter_genre_color'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='bookmarks_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='bookmarks count'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='likes count'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='reviews_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='reviews count'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
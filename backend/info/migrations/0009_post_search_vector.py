@@ -0,0 +1,30 @@
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+def install(apps, schema_editor):
+    from info.search import install_search
+
+    install_search(schema_editor.connection, rebuild=True)
+
+
+def uninstall(apps, schema_editor):
+    from info.search import uninstall_search
+
+    uninstall_search(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('info', '0008_timelineentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(install, uninstall),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 4.1.3 on 2026-10-18 07:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('info', '0010_upload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='audio_channels',
+            field=models.PositiveSmallIntegerField(editable=False, null=True, verbose_name='audio channels'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='audio_duration',
+            field=models.FloatField(editable=False, null=True, verbose_name='audio duration'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='audio_peaks',
+            field=models.BinaryField(null=True, verbose_name='audio waveform peaks'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='audio_sample_rate',
+            field=models.PositiveIntegerField(editable=False, null=True, verbose_name='audio sample rate'),
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='audio_channels',
+            field=models.PositiveSmallIntegerField(editable=False, null=True, verbose_name='audio channels'),
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='audio_duration',
+            field=models.FloatField(editable=False, null=True, verbose_name='audio duration'),
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='audio_peaks',
+            field=models.BinaryField(null=True, verbose_name='audio waveform peaks'),
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='audio_sample_rate',
+            field=models.PositiveIntegerField(editable=False, null=True, verbose_name='audio sample rate'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.1.3 on 2026-10-18 07:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('info', '0011_post_review_audio_meta'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='band',
+            index=models.Index(fields=['is_visible', 'author', '-pub_date'], name='band_visible_author_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.1.3 on 2026-10-18 07:51
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('info', '0012_band_visible_author_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BandSlot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_open', models.BooleanField(default=True, verbose_name='is_open')),
+                ('band', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='slots', to='info.band', verbose_name='band')),
+                ('instrument', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='band_slots', to='info.instrument', verbose_name='instrument')),
+                ('member', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='band_slots', to=settings.AUTH_USER_MODEL, verbose_name='member')),
+            ],
+            options={
+                'verbose_name': 'Band slot',
+                'verbose_name_plural': 'Band slots',
+                'ordering': ('id',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='bandslot',
+            index=models.Index(fields=['instrument', 'is_open', 'band'], name='band_slot_open_idx'),
+        ),
+    ]
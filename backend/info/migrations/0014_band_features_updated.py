@@ -0,0 +1,19 @@
+# Generated by Django 4.1.3 on 2026-10-18 07:53
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('info', '0013_bandslot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='band',
+            name='features_updated',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now, editable=False, verbose_name='features updated'),
+        ),
+    ]
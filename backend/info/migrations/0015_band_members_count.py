@@ -0,0 +1,34 @@
+from django.db import migrations, models
+from django.db.models import (BooleanField, Count, ExpressionWrapper, F,
+                              IntegerField, OuterRef, Q, Subquery)
+from django.db.models.functions import Coalesce
+
+
+def fill_members_count(apps, schema_editor):
+    Band = apps.get_model('info', 'Band')
+    UserBandInstrument = apps.get_model('info', 'UserBandInstrument')
+    members = UserBandInstrument.objects.filter(
+        band=OuterRef('pk')
+    ).order_by().values('band').annotate(total=Count('*')).values('total')
+    Band.objects.update(members_count=Coalesce(
+        Subquery(members, output_field=IntegerField()), 0
+    ))
+    Band.objects.update(is_full=ExpressionWrapper(
+        Q(members_count__gte=F('quantity')), output_field=BooleanField()
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('info', '0014_band_features_updated'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='band',
+            name='members_count',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='members count'),
+        ),
+        migrations.RunPython(fill_members_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,106 @@
+import logging
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import (BooleanField, Count, ExpressionWrapper, F,
+                              IntegerField, OuterRef, Q, Subquery)
+from django.db.models.functions import Coalesce
+
+
+logger = logging.getLogger(__name__)
+
+
+def merge_participants(apps, schema_editor):
+    """Fold ``Band.participants`` into ``UserBandInstrument``.
+
+    Participants without a roster row get one for the first instrument
+    they play; those who play none cannot be placed and are dropped.
+    Repeated roster rows of one member are merged into the oldest one.
+    Every mismatch found is logged; ``manage.py membership_drift``
+    reports them before migrating.
+    """
+
+    Band = apps.get_model('info', 'Band')
+    UserBandInstrument = apps.get_model('info', 'UserBandInstrument')
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    Participant = Band.participants.through
+
+    participants = set(Participant.objects.values_list('band_id', 'user_id'))
+    members = {}
+    repeated = []
+    for pk, band_id, user_id in UserBandInstrument.objects.order_by(
+            'pk').values_list('pk', 'band_id', 'user_id'):
+        if (band_id, user_id) in members:
+            repeated.append(pk)
+        else:
+            members[band_id, user_id] = pk
+    UserBandInstrument.objects.filter(pk__in=repeated).delete()
+
+    missing = sorted(participants - set(members))
+    instruments = {}
+    for user_id, instrument_id in User.instruments.through.objects.filter(
+            user_id__in={user_id for _, user_id in missing}).order_by(
+            '-pk').values_list('user_id', 'instrument_id'):
+        instruments[user_id] = instrument_id
+    placed = [
+        UserBandInstrument(
+            band_id=band_id, user_id=user_id,
+            instrument_id=instruments[user_id]
+        )
+        for band_id, user_id in missing if user_id in instruments
+    ]
+    UserBandInstrument.objects.bulk_create(placed)
+
+    members_count = UserBandInstrument.objects.filter(
+        band=OuterRef('pk')
+    ).order_by().values('band').annotate(total=Count('*')).values('total')
+    Band.objects.update(members_count=Coalesce(
+        Subquery(members_count, output_field=IntegerField()), 0
+    ))
+    Band.objects.update(is_full=ExpressionWrapper(
+        Q(members_count__gte=F('quantity')), output_field=BooleanField()
+    ))
+
+    drift = {
+        'roster rows without a participant': len(set(members) - participants),
+        'participants given a roster row': len(placed),
+        'participants dropped, no instrument': len(missing) - len(placed),
+        'repeated roster rows merged': len(repeated),
+    }
+    if any(drift.values()):
+        logger.warning('Band membership drift: %s', ', '.join(
+            f'{problem}: {count}' for problem, count in drift.items()
+        ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('users', '0001_initial'),
+        ('info', '0015_band_members_count'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_participants, migrations.RunPython.noop),
+        migrations.SeparateDatabaseAndState(
+            # Dropping the field drops the automatic participants table.
+            database_operations=[
+                migrations.RemoveField(
+                    model_name='band',
+                    name='participants',
+                ),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name='band',
+                    name='participants',
+                    field=models.ManyToManyField(related_name='band_participant', through='info.UserBandInstrument', to=settings.AUTH_USER_MODEL, verbose_name='participants'),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='userbandinstrument',
+            constraint=models.UniqueConstraint(fields=('band', 'user'), name='unique_band_member'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def drop_repeated(apps, schema_editor):
+    """Keep the oldest invite and request of every author and user."""
+
+    for name in ('Invite', 'Request'):
+        model = apps.get_model('info', name)
+        oldest = model.objects.order_by().values('author', 'user').annotate(
+            oldest=Min('pk')
+        ).values_list('oldest', flat=True)
+        model.objects.exclude(pk__in=list(oldest)).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('info', '0016_band_participants_through'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_repeated, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='invite',
+            constraint=models.UniqueConstraint(fields=('author', 'user'), name='unique_invite'),
+        ),
+        migrations.AddConstraint(
+            model_name='request',
+            constraint=models.UniqueConstraint(fields=('author', 'user'), name='unique_request'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+import django.utils.timezone
+
+
+def count_pending(model):
+    rows = model.objects.filter(
+        user=OuterRef('pk'), is_accepted=False
+    ).order_by().values('user').annotate(total=Count('*')).values('total')
+    return Coalesce(Subquery(rows, output_field=IntegerField()), 0)
+
+
+def fill_pending_counts(apps, schema_editor):
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    User.objects.update(
+        pending_invites=count_pending(apps.get_model('info', 'Invite')),
+        pending_requests=count_pending(apps.get_model('info', 'Request')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_user_pending_counts'),
+        ('info', '0017_invite_request_unique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='invite',
+            name='created',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='created'),
+        ),
+        migrations.AddField(
+            model_name='request',
+            name='created',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='created'),
+        ),
+        migrations.AddIndex(
+            model_name='invite',
+            index=models.Index(fields=['user', 'is_accepted', '-created', '-id'], name='invite_inbox_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='invite',
+            index=models.Index(fields=['is_accepted', 'created'], name='invite_pending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='request',
+            index=models.Index(fields=['user', 'is_accepted', '-created', '-id'], name='request_inbox_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='request',
+            index=models.Index(fields=['is_accepted', 'created'], name='request_pending_idx'),
+        ),
+        migrations.RunPython(fill_pending_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.1.3 on 2026-10-18 08:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('info', '0018_inbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='band',
+            name='poster_renditions',
+            field=models.JSONField(default=list, editable=False, verbose_name='poster renditions'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_renditions',
+            field=models.JSONField(default=list, editable=False, verbose_name='image renditions'),
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='image_renditions',
+            field=models.JSONField(default=list, editable=False, verbose_name='image renditions'),
+        ),
+    ]
@@ -1,7 +1,14 @@
+import os
+import uuid
+
 from colorfield.fields import ColorField
+from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
+from django.core.files import File
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator, FileExtensionValidator
 from django.db import models
+from django.db.models import F
 from django.utils import timezone
 
 
@@ -127,30 +134,65 @@ class Post(models.Model):
         verbose_name='image', upload_to='posts/images/',
         blank=True, null=True, default=None
     )
+    image_renditions = models.JSONField(
+        verbose_name='image renditions', default=list, editable=False
+    )
     audio = models.FileField(
         verbose_name='audio', upload_to='posts/audios/',
         blank=True, null=True,
         validators=[FileExtensionValidator(allowed_extensions=['wav', 'mp3'])],
         default=None
     )
+    audio_duration = models.FloatField(
+        verbose_name='audio duration', null=True, editable=False
+    )
+    audio_sample_rate = models.PositiveIntegerField(
+        verbose_name='audio sample rate', null=True, editable=False
+    )
+    audio_channels = models.PositiveSmallIntegerField(
+        verbose_name='audio channels', null=True, editable=False
+    )
+    audio_peaks = models.BinaryField(
+        verbose_name='audio waveform peaks', null=True
+    )
     text = models.TextField(
         verbose_name='text', blank=True, null=True
     )
     likes = models.ManyToManyField(
         User, related_name='posts_liked', blank=True
     )
+    likes_count = models.PositiveIntegerField(
+        verbose_name='likes count', default=0, editable=False
+    )
+    reviews_count = models.PositiveIntegerField(
+        verbose_name='reviews count', default=0, editable=False
+    )
+    bookmarks_count = models.PositiveIntegerField(
+        verbose_name='bookmarks count', default=0, editable=False
+    )
+    search_vector = SearchVectorField(null=True, editable=False)
     pub_date = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ('-pub_date',)
         verbose_name = 'Post'
         verbose_name_plural = 'Posts'
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'], name='post_pub_date_id_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.title[:20]
 
     def get_like_number(self):
-        return self.likes.count()
+        return self.likes_count
+
+    def change_counter(self, field, delta):
+        """Atomically shift one of the stored engagement counters."""
+
+        Post.objects.filter(pk=self.pk).update(**{field: F(field) + delta})
 
 
 class Review(models.Model):
@@ -167,12 +209,27 @@ class Review(models.Model):
         verbose_name='image', upload_to='posts/images/',
         blank=True, null=True, default=None
     )
+    image_renditions = models.JSONField(
+        verbose_name='image renditions', default=list, editable=False
+    )
     audio = models.FileField(
         verbose_name='audio', upload_to='posts/audios/',
         blank=True, null=True,
         validators=[FileExtensionValidator(allowed_extensions=['wav', 'mp3'])],
         default=None
     )
+    audio_duration = models.FloatField(
+        verbose_name='audio duration', null=True, editable=False
+    )
+    audio_sample_rate = models.PositiveIntegerField(
+        verbose_name='audio sample rate', null=True, editable=False
+    )
+    audio_channels = models.PositiveSmallIntegerField(
+        verbose_name='audio channels', null=True, editable=False
+    )
+    audio_peaks = models.BinaryField(
+        verbose_name='audio waveform peaks', null=True
+    )
     created = models.DateTimeField(default=timezone.now)
 
     class Meta:
@@ -220,8 +277,12 @@ class Band(models.Model):
         verbose_name='poster', upload_to='bands/posters/',
         blank=True, null=True, default=None
     )
+    poster_renditions = models.JSONField(
+        verbose_name='poster renditions', default=list, editable=False
+    )
     participants = models.ManyToManyField(
-        User, related_name='band_participant', verbose_name='participants'
+        User, through='UserBandInstrument',
+        related_name='band_participant', verbose_name='participants'
     )
     quantity = models.PositiveSmallIntegerField(
         validators=[MinValueValidator(1)]
@@ -229,6 +290,9 @@ class Band(models.Model):
     description = models.TextField(
         verbose_name='description', blank=False, null=False
     )
+    members_count = models.PositiveSmallIntegerField(
+        verbose_name='members count', default=0, editable=False
+    )
     is_full = models.BooleanField(
         verbose_name='is_full', null=True, default=False
     )
@@ -236,15 +300,45 @@ class Band(models.Model):
         verbose_name='is_visible', null=True, default=True
     )
     pub_date = models.DateTimeField(auto_now_add=True)
+    features_updated = models.DateTimeField(
+        verbose_name='features updated', default=timezone.now,
+        db_index=True, editable=False
+    )
 
     class Meta:
         ordering = ('-pub_date',)
         verbose_name = 'Band'
         verbose_name_plural = 'Bands'
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'], name='band_pub_date_id_idx'
+            ),
+            models.Index(
+                fields=['is_visible', 'author', '-pub_date'],
+                name='band_visible_author_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
+    def fill_slot(self, instrument_id, user_id):
+        """Close an open slot for the instrument taken by the user.
+
+        The slot is claimed with a conditional UPDATE, so two members
+        joining at once never fill the same slot.
+        """
+
+        while True:
+            slot = self.slots.filter(
+                instrument_id=instrument_id, is_open=True
+            ).values_list('pk', flat=True).first()
+            if slot is None:
+                return False
+            if BandSlot.objects.filter(pk=slot, is_open=True).update(
+                    is_open=False, member_id=user_id):
+                return True
+
 
 class UserBandInstrument(models.Model):
     """Band, User and User\'s Instrument that User Play in this Band Model."""
@@ -266,11 +360,48 @@ class UserBandInstrument(models.Model):
         ordering = ('id',)
         verbose_name = 'User, band and instrument'
         verbose_name_plural = 'Users, bands and instruments'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['band', 'user'], name='unique_band_member'
+            ),
+        ]
 
     def __str__(self):
         return f'{self.band} - {self.user.username} - {self.instrument}'
 
 
+class BandSlot(models.Model):
+    """Instrument a Band Wants Played Model."""
+
+    band = models.ForeignKey(
+        Band, on_delete=models.CASCADE,
+        related_name='slots', verbose_name='band'
+    )
+    instrument = models.ForeignKey(
+        Instrument, on_delete=models.CASCADE,
+        related_name='band_slots', verbose_name='instrument'
+    )
+    member = models.ForeignKey(
+        User, on_delete=models.SET_NULL, blank=True, null=True,
+        related_name='band_slots', verbose_name='member'
+    )
+    is_open = models.BooleanField(verbose_name='is_open', default=True)
+
+    class Meta:
+        ordering = ('id',)
+        verbose_name = 'Band slot'
+        verbose_name_plural = 'Band slots'
+        indexes = [
+            models.Index(
+                fields=['instrument', 'is_open', 'band'],
+                name='band_slot_open_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.band} - {self.instrument}'
+
+
 class Request(models.Model):
     """Request to Join some Band Model."""
 
@@ -293,11 +424,28 @@ class Request(models.Model):
     is_accepted = models.BooleanField(
         verbose_name='is_accepted', default=False
     )
+    created = models.DateTimeField(
+        verbose_name='created', default=timezone.now
+    )
 
     class Meta:
         ordering = ('id',)
         verbose_name = 'Request'
         verbose_name_plural = 'Requests'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['author', 'user'], name='unique_request'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', 'is_accepted', '-created', '-id'],
+                name='request_inbox_idx'
+            ),
+            models.Index(
+                fields=['is_accepted', 'created'], name='request_pending_idx'
+            ),
+        ]
 
     def __str__(self):
         return f'{self.pk}'
@@ -325,11 +473,119 @@ class Invite(models.Model):
     is_accepted = models.BooleanField(
         verbose_name='is_accepted', default=False
     )
+    created = models.DateTimeField(
+        verbose_name='created', default=timezone.now
+    )
 
     class Meta:
         ordering = ('id',)
         verbose_name = 'Invite'
         verbose_name_plural = 'Invites'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['author', 'user'], name='unique_invite'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', 'is_accepted', '-created', '-id'],
+                name='invite_inbox_idx'
+            ),
+            models.Index(
+                fields=['is_accepted', 'created'], name='invite_pending_idx'
+            ),
+        ]
 
     def __str__(self):
         return f'{self.pk}'
+
+
+class TimelineEntry(models.Model):
+    """Post Delivered into the Home Timeline of Author's Follower Model."""
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE,
+        related_name='timeline', verbose_name='user'
+    )
+    post = models.ForeignKey(
+        Post, on_delete=models.CASCADE,
+        related_name='timeline_entries', verbose_name='post'
+    )
+    author = models.ForeignKey(
+        User, on_delete=models.CASCADE,
+        related_name='+', verbose_name='author'
+    )
+    pub_date = models.DateTimeField(verbose_name='pub_date')
+
+    class Meta:
+        ordering = ('-pub_date', '-post')
+        verbose_name = 'Timeline entry'
+        verbose_name_plural = 'Timeline entries'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'],
+                name='unique_timeline_entry'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='timeline_user_pub_date_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} - {self.post_id}'
+
+
+class UploadedPart(File):
+    """Assembled upload that storages move into place instead of copying."""
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+class Upload(models.Model):
+    """Resumable Chunked Upload of an Audio File Model."""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE,
+        related_name='uploads', verbose_name='user'
+    )
+    size = models.PositiveBigIntegerField(verbose_name='size')
+    offset = models.PositiveBigIntegerField(verbose_name='offset', default=0)
+    extension = models.CharField(
+        verbose_name='extension', max_length=10, blank=True
+    )
+    is_complete = models.BooleanField(
+        verbose_name='is_complete', default=False
+    )
+    created = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ('created',)
+        verbose_name = 'Upload'
+        verbose_name_plural = 'Uploads'
+
+    def __str__(self):
+        return f'{self.id} ({self.offset}/{self.size})'
+
+    def get_path(self):
+        return os.path.join(
+            settings.MEDIA_ROOT, settings.UPLOAD_SESSION_DIR, f'{self.id}.part'
+        )
+
+    def get_file(self):
+        """The assembled file, to be saved into a FileField."""
+
+        return UploadedPart(
+            open(self.get_path(), 'rb'), name=f'upload.{self.extension}'
+        )
+
+    def discard(self):
+        try:
+            os.remove(self.get_path())
+        except FileNotFoundError:
+            pass
+        self.delete()
@@ -0,0 +1,264 @@
+"""Ranking bands for a user with a precomputed sparse feature matrix.
+
+Every band is a sparse row over two kinds of features: the instruments
+of its open slots (what it needs) and the post tags of its members (its
+style; ``Genre`` is not linked to anything yet, so tags stand in for
+genres). A user is a vector over the same features: their instruments
+and the tags of the posts they wrote or liked. A band scores
+
+    NEED_WEIGHT * need overlap + STYLE_WEIGHT * tag cosine
+    + RECENCY_WEIGHT * 0.5 ** (age / RECENCY_HALF_LIFE)
+
+Rows are stored in ELLPACK form, a ``(bands, ROW_WIDTH)`` array of
+feature columns and one of values, so scoring all bands is a single
+gather and sum in NumPy. Changes to bands, rosters, slots and member
+posts bump ``Band.features_updated``; each process keeps its own
+matrix and recomputes just the rows changed since it last looked, and
+drops the rows of deleted bands once the band count tells it some are
+gone.
+"""
+import threading
+from collections import defaultdict
+from datetime import timedelta
+
+import numpy as np
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import Band, BandSlot, Post, UserBandInstrument
+
+
+NEED_WEIGHT = 1.0
+STYLE_WEIGHT = 1.0
+RECENCY_WEIGHT = 0.25
+RECENCY_HALF_LIFE = timedelta(days=30)
+
+# Instrument features plus the strongest tags of a band.
+ROW_WIDTH = 24
+TAG_FEATURES = 16
+
+# Rows committed after a sync may carry a timestamp from before it.
+SYNC_OVERLAP = timedelta(seconds=30)
+SYNC_BATCH_SIZE = 5000
+
+
+def mark_bands_changed(**filters):
+    """Have the matrix recompute the rows of the matching bands."""
+
+    Band.objects.filter(**filters).update(features_updated=timezone.now())
+
+
+class BandFeatures:
+    """Feature rows of every band, kept in sync with the database."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Forget every row, the next sync rebuilds the matrix."""
+
+        self.features = {}
+        self.rows = {}
+        self.band_ids = np.empty(0, dtype=np.int64)
+        self.columns = np.empty((0, ROW_WIDTH), dtype=np.int32)
+        self.values = np.empty((0, ROW_WIDTH), dtype=np.float32)
+        self.pub_dates = np.empty(0, dtype=np.float64)
+        self.eligible = np.empty(0, dtype=bool)
+        self.synced = None
+
+    def feature(self, kind, pk):
+        key = (kind, pk)
+        if key not in self.features:
+            self.features[key] = len(self.features)
+        return self.features[key]
+
+    def sync(self):
+        """Recompute the rows of bands changed since the last sync."""
+
+        with self.lock:
+            started = timezone.now()
+            bands = Band.objects.order_by('pk').values_list(
+                'pk', 'pub_date', 'is_visible', 'is_full'
+            )
+            if self.synced is not None:
+                bands = bands.filter(
+                    features_updated__gt=self.synced - SYNC_OVERLAP
+                )
+
+            batch = []
+            for band in bands.iterator(chunk_size=SYNC_BATCH_SIZE):
+                batch.append(band)
+                if len(batch) == SYNC_BATCH_SIZE:
+                    self.update(batch)
+                    batch = []
+            self.update(batch)
+            self.synced = started
+
+            if Band.objects.count() != len(self.band_ids):
+                self.prune()
+
+    def prune(self):
+        """Drop the rows of bands that no longer exist."""
+
+        live = np.fromiter(
+            Band.objects.values_list('pk', flat=True).iterator(
+                chunk_size=SYNC_BATCH_SIZE
+            ),
+            dtype=np.int64
+        )
+        keep = np.isin(self.band_ids, live)
+        if keep.all():
+            return
+        self.band_ids = self.band_ids[keep]
+        self.columns = self.columns[keep]
+        self.values = self.values[keep]
+        self.pub_dates = self.pub_dates[keep]
+        self.eligible = self.eligible[keep]
+        self.rows = {
+            int(band_id): row for row, band_id in enumerate(self.band_ids)
+        }
+
+    def update(self, bands):
+        if not bands:
+            return
+        ids = [band[0] for band in bands]
+
+        needs = defaultdict(set)
+        for band_id, instrument_id in BandSlot.objects.filter(
+                band_id__in=ids, is_open=True).values_list(
+                'band_id', 'instrument_id'):
+            needs[band_id].add(instrument_id)
+
+        tags = defaultdict(list)
+        for band_id, tag_id, count in Post.tags.through.objects.filter(
+                post__author__is_user_in_band__band_id__in=ids).values(
+                'post__author__is_user_in_band__band_id', 'tag_id').annotate(
+                count=Count('*')).values_list(
+                'post__author__is_user_in_band__band_id', 'tag_id', 'count'):
+            tags[band_id].append((count, tag_id))
+
+        count = len(bands)
+        columns = np.full((count, ROW_WIDTH), -1, dtype=np.int32)
+        values = np.zeros((count, ROW_WIDTH), dtype=np.float32)
+        pub_dates = np.empty(count, dtype=np.float64)
+        eligible = np.empty(count, dtype=bool)
+
+        for row, band in enumerate(bands):
+            band_id, pub_date, is_visible, is_full = band
+            cells = [
+                (self.feature('instrument', instrument_id), NEED_WEIGHT)
+                for instrument_id in sorted(needs[band_id])
+            ][:ROW_WIDTH - TAG_FEATURES]
+
+            strongest = sorted(tags[band_id], reverse=True)[:TAG_FEATURES]
+            norm = sum(count ** 2 for count, _ in strongest) ** 0.5
+            cells += [
+                (self.feature('tag', tag_id), STYLE_WEIGHT * count / norm)
+                for count, tag_id in strongest
+            ]
+
+            for cell, (column, value) in enumerate(cells):
+                columns[row, cell] = column
+                values[row, cell] = value
+            pub_dates[row] = pub_date.timestamp()
+            eligible[row] = bool(is_visible) and not is_full
+
+        self.store(ids, columns, values, pub_dates, eligible)
+
+    def store(self, ids, columns, values, pub_dates, eligible):
+        """Overwrite the rows of known bands and append the new ones."""
+
+        positions = np.array(
+            [self.rows.get(band_id, -1) for band_id in ids], dtype=np.int64
+        )
+        known = positions >= 0
+        target = positions[known]
+        self.columns[target] = columns[known]
+        self.values[target] = values[known]
+        self.pub_dates[target] = pub_dates[known]
+        self.eligible[target] = eligible[known]
+
+        new = ~known
+        start = len(self.band_ids)
+        for offset, band_id in enumerate(np.array(ids)[new]):
+            self.rows[int(band_id)] = start + offset
+        self.band_ids = np.concatenate([self.band_ids, np.array(ids)[new]])
+        self.columns = np.concatenate([self.columns, columns[new]])
+        self.values = np.concatenate([self.values, values[new]])
+        self.pub_dates = np.concatenate([self.pub_dates, pub_dates[new]])
+        self.eligible = np.concatenate([self.eligible, eligible[new]])
+
+    def user_vector(self, user):
+        """Dense feature vector of ``user``, with a trailing zero that
+        the ``-1`` padding of the rows picks up."""
+
+        vector = np.zeros(len(self.features) + 1, dtype=np.float32)
+        for instrument_id in user.instruments.values_list('pk', flat=True):
+            column = self.features.get(('instrument', instrument_id))
+            if column is not None:
+                vector[column] = 1.0
+
+        posts = set(Post.objects.filter(author=user).values_list(
+            'pk', flat=True
+        ))
+        posts.update(Post.likes.through.objects.filter(
+            user=user
+        ).values_list('post_id', flat=True))
+        tags = Post.tags.through.objects.filter(
+            post_id__in=posts
+        ).values('tag_id').annotate(count=Count('*')).values_list(
+            'tag_id', 'count'
+        )
+        tags = list(tags)
+        norm = sum(count ** 2 for _, count in tags) ** 0.5
+        for tag_id, count in tags:
+            column = self.features.get(('tag', tag_id))
+            if column is not None:
+                vector[column] = count / norm
+        return vector
+
+    def scores(self, vector, now=None):
+        """Score of every band against a user vector, ``-inf`` for
+        bands that cannot be joined."""
+
+        now = (now or timezone.now()).timestamp()
+        with self.lock:
+            # Features seen by a sync after the vector was built are
+            # not the user's: pad them with zeros.
+            padded = np.zeros(len(self.features) + 1, dtype=np.float32)
+            padded[:len(vector) - 1] = vector[:-1]
+            scores = (self.values * padded[self.columns]).sum(axis=1)
+            age = np.maximum(now - self.pub_dates, 0)
+            half_life = RECENCY_HALF_LIFE.total_seconds()
+            scores += RECENCY_WEIGHT * np.exp2(-age / half_life)
+            scores[~self.eligible] = -np.inf
+            return self.band_ids, scores
+
+
+_features = BandFeatures()
+
+
+def get_features():
+    return _features
+
+
+def recommend_bands(user, limit):
+    """Ids of the ``limit`` best bands for ``user``, best first."""
+
+    features = get_features()
+    features.sync()
+    band_ids, scores = features.scores(features.user_vector(user))
+
+    own = list(Band.objects.filter(author=user).values_list('pk', flat=True))
+    own += UserBandInstrument.objects.filter(user=user).values_list(
+        'band_id', flat=True
+    )
+    scores[np.isin(band_ids, own)] = -np.inf
+
+    candidates = np.flatnonzero(np.isfinite(scores))
+    if len(candidates) > limit:
+        top = np.argpartition(-scores[candidates], limit - 1)[:limit]
+        candidates = candidates[top]
+    order = candidates[np.argsort(-scores[candidates], kind='stable')]
+    return band_ids[order].tolist()
@@ -0,0 +1,110 @@
+"""Thumbnails and WebP variants of uploaded images.
+
+Renditions are stored next to the original, named after it:
+``posts/images/photo.jpg`` gets ``posts/images/photo.thumb.webp`` and so
+on for every entry of ``IMAGE_RENDITIONS``. They are rendered in the
+media worker pool after the upload is committed, and the ones available
+are recorded on the row next to the image, in ``image_renditions`` or
+``poster_renditions``, so listing them never touches the storage.
+"""
+import os
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from PIL import Image, ImageOps
+
+from utils.storage import rendition_name
+from utils.workers import submit
+
+
+WEBP_QUALITY = 80
+
+
+def renditions_field(field):
+    """Name of the field recording the renditions of image ``field``."""
+    return f'{field}_renditions'
+
+
+def render_renditions(path, renditions, force=False):
+    """Write the renditions of the image at ``path``.
+
+    Runs in worker processes, so it only deals with file paths.
+    ``renditions`` maps a name to a ``(width, height)`` box the image is
+    cropped to, or to ``None`` to keep the original size. Returns the
+    names of the renditions now up to date and how many were written.
+    """
+
+    try:
+        source_mtime = os.stat(path).st_mtime
+    except FileNotFoundError:
+        return [], 0
+
+    rendered = []
+    written = 0
+    image = None
+    for rendition, size in renditions.items():
+        target = rendition_name(path, rendition)
+        if not force and os.path.exists(target) and (
+                os.stat(target).st_mtime >= source_mtime):
+            rendered.append(rendition)
+            continue
+
+        if image is None:
+            try:
+                image = ImageOps.exif_transpose(Image.open(path))
+            except OSError:
+                return rendered, written
+            if image.mode not in ('RGB', 'RGBA'):
+                image = image.convert('RGBA')
+
+        variant = image if size is None else ImageOps.fit(
+            image, tuple(size), Image.LANCZOS
+        )
+        temporary = f'{target}.tmp'
+        variant.save(temporary, 'WEBP', quality=WEBP_QUALITY)
+        os.replace(temporary, target)
+        rendered.append(rendition)
+        written += 1
+    return rendered, written
+
+
+def schedule_renditions(instance, field):
+    """Render the renditions of the saved image ``field`` of ``instance``
+    once the transaction commits and record them on its row."""
+
+    field_file = getattr(instance, field)
+    renditions = settings.IMAGE_RENDITIONS
+    recorded = renditions_field(field)
+    if not field_file or set(getattr(instance, recorded)) >= set(renditions):
+        return
+    model, pk, name = type(instance), instance.pk, field_file.name
+    path = field_file.path
+
+    def store(result):
+        rendered, _ = result
+        # The image may have been replaced in the meantime.
+        model.objects.filter(pk=pk, **{field: name}).update(
+            **{recorded: rendered}
+        )
+
+    transaction.on_commit(lambda: submit(
+        render_renditions, path, renditions, callback=store
+    ))
+
+
+def rendition_urls(field_file, rendered, request=None):
+    """URLs of the renditions ``rendered`` for ``field_file``."""
+
+    if not field_file:
+        return {}
+
+    urls = {}
+    for rendition in settings.IMAGE_RENDITIONS:
+        if rendition not in rendered:
+            continue
+        url = default_storage.url(rendition_name(field_file.name, rendition))
+        if request is not None:
+            url = request.build_absolute_uri(url)
+        urls[rendition] = url
+    return urls
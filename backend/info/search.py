@@ -0,0 +1,177 @@
+"""Full-text search over ``Post.title`` and ``Post.text``.
+
+PostgreSQL keeps ``Post.search_vector`` current with a trigger and
+searches it through a GIN index. SQLite has no ``tsvector``, so there
+the posts are mirrored into an FTS5 table kept current by triggers,
+which makes the feature usable in local runs and tests. Titles weigh
+more than texts on both backends.
+"""
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import F, FloatField, Q, Value
+
+
+SEARCH_CONFIG = 'english'
+
+POSTGRESQL_SETUP = [
+    """
+    CREATE OR REPLACE FUNCTION info_post_search_vector_update()
+    RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('pg_catalog.english',
+                                  coalesce(NEW.title, '')), 'A')
+            || setweight(to_tsvector('pg_catalog.english',
+                                     coalesce(NEW.text, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    'DROP TRIGGER IF EXISTS info_post_search_vector_trigger ON info_post',
+    """
+    CREATE TRIGGER info_post_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, text ON info_post
+    FOR EACH ROW EXECUTE FUNCTION info_post_search_vector_update()
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS post_search_vector_idx
+    ON info_post USING gin (search_vector)
+    """,
+]
+
+POSTGRESQL_TEARDOWN = [
+    'DROP INDEX IF EXISTS post_search_vector_idx',
+    'DROP TRIGGER IF EXISTS info_post_search_vector_trigger ON info_post',
+    'DROP FUNCTION IF EXISTS info_post_search_vector_update()',
+]
+
+SQLITE_SETUP = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS info_post_fts USING fts5(
+        title, text, content='info_post', content_rowid='id',
+        tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS info_post_fts_insert
+    AFTER INSERT ON info_post BEGIN
+        INSERT INTO info_post_fts(rowid, title, text)
+        VALUES (new.id, new.title, new.text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS info_post_fts_delete
+    AFTER DELETE ON info_post BEGIN
+        INSERT INTO info_post_fts(info_post_fts, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS info_post_fts_update
+    AFTER UPDATE OF title, text ON info_post BEGIN
+        INSERT INTO info_post_fts(info_post_fts, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+        INSERT INTO info_post_fts(rowid, title, text)
+        VALUES (new.id, new.title, new.text);
+    END
+    """,
+]
+
+SQLITE_TEARDOWN = [
+    'DROP TRIGGER IF EXISTS info_post_fts_insert',
+    'DROP TRIGGER IF EXISTS info_post_fts_delete',
+    'DROP TRIGGER IF EXISTS info_post_fts_update',
+    'DROP TABLE IF EXISTS info_post_fts',
+]
+
+
+def install_search(connection, rebuild=False):
+    """Create the triggers and indexes search relies on, idempotently.
+
+    SQLite drops triggers together with the table whenever a migration
+    has to rebuild ``info_post``, so this also runs after ``migrate``.
+    """
+
+    if connection.vendor == 'postgresql':
+        statements = POSTGRESQL_SETUP
+        if rebuild:
+            statements = statements + [
+                'UPDATE info_post SET title = title',
+            ]
+    elif connection.vendor == 'sqlite':
+        statements = SQLITE_SETUP
+        if rebuild:
+            statements = statements + [
+                "INSERT INTO info_post_fts(info_post_fts) VALUES ('rebuild')",
+            ]
+    else:
+        return
+
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def reinstall_search(sender, using, **kwargs):
+    """``post_migrate`` receiver restoring SQLite triggers lost to table
+    rebuilds."""
+
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    if 'info_post' in connection.introspection.table_names():
+        install_search(connection)
+
+
+def uninstall_search(connection):
+    statements = {
+        'postgresql': POSTGRESQL_TEARDOWN,
+        'sqlite': SQLITE_TEARDOWN,
+    }.get(connection.vendor, [])
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def fts_query(query):
+    """Turn user input into an FTS5 query matching all of its words."""
+
+    words = re.findall(r'\w+', query)
+    return ' '.join(f'"{word}"' for word in words)
+
+
+def search_posts(queryset, query):
+    """Posts matching ``query`` annotated with a ``rank``, best first."""
+
+    vendor = connections[queryset.db].vendor
+
+    if vendor == 'postgresql':
+        search_query = SearchQuery(
+            query, config=SEARCH_CONFIG, search_type='websearch'
+        )
+        queryset = queryset.filter(search_vector=search_query).annotate(
+            rank=SearchRank(F('search_vector'), search_query)
+        )
+    elif vendor == 'sqlite':
+        match = fts_query(query)
+        if not match:
+            return queryset.none()
+        # bm25() is only available inside the statement doing the MATCH,
+        # so the FTS table has to be joined rather than sub-queried.
+        queryset = queryset.extra(
+            select={'rank': '-bm25(info_post_fts, 10.0, 1.0)'},
+            tables=['info_post_fts'],
+            where=[
+                'info_post_fts.rowid = info_post.id',
+                'info_post_fts MATCH %s',
+            ],
+            params=[match],
+        )
+    else:
+        queryset = queryset.filter(
+            Q(title__icontains=query) | Q(text__icontains=query)
+        ).annotate(rank=Value(0.0, output_field=FloatField()))
+
+    return queryset.order_by('-rank', '-id')
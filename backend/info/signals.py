@@ -0,0 +1,167 @@
+from django.db import transaction
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_save, pre_save
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from utils.events import send_events
+from utils.storage import release
+
+from .inbox import change_pending, counting_paused, entry_event
+from .models import (Band, BandSlot, Invite, Post, Request, Review,
+                     UserBandInstrument)
+from .recommendations import mark_bands_changed
+from .renditions import renditions_field, schedule_renditions
+from .waveforms import clear_audio_meta, schedule_analysis
+
+
+FILE_FIELDS = {
+    Post: ('image', 'audio'),
+    Review: ('image', 'audio'),
+    Band: ('poster',),
+}
+
+
+def release_on_commit(name):
+    if name:
+        transaction.on_commit(lambda: release(name))
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Review)
+def render_image(sender, instance, **kwargs):
+    schedule_renditions(instance, 'image')
+
+
+@receiver(post_save, sender=Band)
+def render_poster(sender, instance, **kwargs):
+    schedule_renditions(instance, 'poster')
+
+
+@receiver(pre_save, sender=Post)
+@receiver(pre_save, sender=Review)
+@receiver(pre_save, sender=Band)
+def remember_files(sender, instance, update_fields=None, **kwargs):
+    fields = FILE_FIELDS[sender]
+    if update_fields is not None:
+        fields = [field for field in fields if field in update_fields]
+    instance._previous_files = {}
+    # Files assigned but not written yet take a new reference on save,
+    # even when identical content makes them keep the same name.
+    instance._replaced_files = {
+        field for field in fields if not getattr(instance, field)._committed
+    }
+    if instance.pk is None or not fields:
+        return
+    instance._previous_files = sender.objects.filter(
+        pk=instance.pk
+    ).values(*fields).first() or {}
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Review)
+@receiver(post_save, sender=Band)
+def release_replaced_files(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_files', {})
+    replaced = getattr(instance, '_replaced_files', set())
+    for field, name in previous.items():
+        if field in replaced or name != getattr(instance, field).name:
+            release_on_commit(name)
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Review)
+@receiver(post_delete, sender=Band)
+def release_files(sender, instance, **kwargs):
+    for field in FILE_FIELDS[sender]:
+        release_on_commit(getattr(instance, field).name)
+
+
+@receiver(pre_save, sender=Post)
+@receiver(pre_save, sender=Review)
+@receiver(pre_save, sender=Band)
+def reset_renditions(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_files', {})
+    # Identical content keeps its name and its renditions.
+    for field, name in previous.items():
+        if field == 'audio':
+            continue
+        if (name or '') != (getattr(instance, field).name or ''):
+            setattr(instance, renditions_field(field), [])
+
+
+@receiver(pre_save, sender=Post)
+@receiver(pre_save, sender=Review)
+def reset_audio_meta(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_files', {})
+    if 'audio' in previous and (
+            (previous['audio'] or '') != (instance.audio.name or '')):
+        clear_audio_meta(instance)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Review)
+def analyze_audio(sender, instance, **kwargs):
+    schedule_analysis(instance)
+
+
+@receiver(post_save, sender=UserBandInstrument)
+def fill_band_slot(sender, instance, created, **kwargs):
+    if created:
+        instance.band.fill_slot(instance.instrument_id, instance.user_id)
+
+
+@receiver(pre_save, sender=Band)
+def touch_band_features(sender, instance, **kwargs):
+    instance.features_updated = timezone.now()
+
+
+@receiver(post_save, sender=UserBandInstrument)
+@receiver(post_delete, sender=UserBandInstrument)
+@receiver(post_save, sender=BandSlot)
+@receiver(post_delete, sender=BandSlot)
+def band_roster_changed(sender, instance, **kwargs):
+    mark_bands_changed(pk=instance.band_id)
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def post_tags_changed(sender, instance, action, reverse, **kwargs):
+    if action.startswith('post_') and not reverse:
+        mark_bands_changed(band_user__user=instance.author_id)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    mark_bands_changed(band_user__user=instance.author_id)
+
+
+@receiver(post_save, sender=Invite)
+@receiver(post_save, sender=Request)
+def count_pending(sender, instance, created, **kwargs):
+    if created and not instance.is_accepted and not counting_paused.get():
+        change_pending(sender, [instance.user_id])
+
+
+@receiver(post_delete, sender=Invite)
+@receiver(post_delete, sender=Request)
+def uncount_pending(sender, instance, **kwargs):
+    if not instance.is_accepted and not counting_paused.get():
+        change_pending(sender, [instance.user_id], -1)
+
+
+@receiver(post_save, sender=Invite)
+@receiver(post_save, sender=Request)
+def announce_entry(sender, instance, created, **kwargs):
+    if created:
+        send_events([(instance.user_id, entry_event(instance))])
+
+
+@receiver(post_save, sender=Review)
+def announce_review(sender, instance, created, **kwargs):
+    author_id = instance.post.author_id
+    if created and instance.author_id != author_id:
+        send_events([(author_id, {
+            'type': 'review', 'id': instance.id, 'post': instance.post_id,
+            'author': instance.author_id,
+        })])
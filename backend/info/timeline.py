@@ -0,0 +1,294 @@
+"""Materialized home timelines built from ``users.Follow``.
+
+A new post is pushed ("fanned out") into the timeline of every follower
+of its author when it is created. Authors followed by more than
+``TIMELINE_FANOUT_LIMIT`` users are not fanned out: their posts are
+merged into the followers' timelines when the timeline is read, so that
+one post never costs thousands of inserts.
+
+Timeline entries are ``(pub_date, post_id, author_id)`` tuples and live
+in a pluggable store chosen by the ``TIMELINE_STORE`` setting. Stores
+keep about the newest ``TIMELINE_MAX_LENGTH`` entries of each user.
+"""
+import bisect
+import heapq
+import threading
+from collections import defaultdict
+from itertools import groupby
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Exists, OuterRef, Q, Subquery
+from django.utils.dateparse import parse_datetime
+from django.utils.module_loading import import_string
+
+from users.models import Follow
+
+from .models import Post, TimelineEntry
+
+
+User = get_user_model()
+
+
+class BaseTimelineStore:
+    """Interface every timeline store implements."""
+
+    def push(self, user_ids, entry):
+        """Add one entry into the timelines of all ``user_ids``."""
+        raise NotImplementedError
+
+    def backfill(self, user_id, entries):
+        """Add many entries into the timeline of one user."""
+        raise NotImplementedError
+
+    def page(self, user_id, position=None, limit=None):
+        """Newest ``(pub_date, post_id)`` pairs strictly older than
+        ``position``."""
+        raise NotImplementedError
+
+    def remove_author(self, user_id, author_id):
+        """Drop every entry of ``author_id`` from the user's timeline."""
+        raise NotImplementedError
+
+
+class DatabaseTimelineStore(BaseTimelineStore):
+    """Timelines kept in the ``TimelineEntry`` table.
+
+    A timeline may outgrow ``TIMELINE_MAX_LENGTH`` by an eighth before
+    it is cut back, so that not every push also deletes.
+    """
+
+    batch_size = 1000
+
+    def push(self, user_ids, entry):
+        pub_date, post_id, author_id = entry
+        TimelineEntry.objects.bulk_create(
+            [
+                TimelineEntry(
+                    user_id=user_id, post_id=post_id,
+                    author_id=author_id, pub_date=pub_date
+                )
+                for user_id in user_ids
+            ],
+            batch_size=self.batch_size,
+            ignore_conflicts=True
+        )
+        self.trim(user_ids)
+
+    def backfill(self, user_id, entries):
+        TimelineEntry.objects.bulk_create(
+            [
+                TimelineEntry(
+                    user_id=user_id, post_id=post_id,
+                    author_id=author_id, pub_date=pub_date
+                )
+                for pub_date, post_id, author_id in entries
+            ],
+            batch_size=self.batch_size,
+            ignore_conflicts=True
+        )
+        self.trim([user_id])
+
+    def trim(self, user_ids):
+        """Cut the timelines of ``user_ids`` that grew too long back to
+        their newest ``TIMELINE_MAX_LENGTH`` entries."""
+
+        length = settings.TIMELINE_MAX_LENGTH
+        overflow = length + length // 8
+        entries = TimelineEntry.objects.filter(
+            user=OuterRef('pk')
+        ).order_by('-pub_date', '-post_id')
+        user_ids = list(user_ids)
+        for start in range(0, len(user_ids), self.batch_size):
+            oldest_kept = User.objects.filter(
+                pk__in=user_ids[start:start + self.batch_size]
+            ).filter(
+                Exists(entries[overflow:overflow + 1])
+            ).annotate(
+                kept_pub_date=Subquery(
+                    entries.values('pub_date')[length - 1:length]
+                ),
+                kept_post_id=Subquery(
+                    entries.values('post_id')[length - 1:length]
+                ),
+            ).values_list('pk', 'kept_pub_date', 'kept_post_id')
+
+            for user_id, pub_date, post_id in oldest_kept:
+                TimelineEntry.objects.filter(user_id=user_id).filter(
+                    Q(pub_date__lt=pub_date)
+                    | Q(pub_date=pub_date, post_id__lt=post_id)
+                ).delete()
+
+    def page(self, user_id, position=None, limit=None):
+        queryset = TimelineEntry.objects.filter(user_id=user_id)
+        if position is not None:
+            pub_date, post_id = position
+            queryset = queryset.filter(
+                Q(pub_date__lt=pub_date)
+                | Q(pub_date=pub_date, post_id__lt=post_id)
+            )
+        queryset = queryset.order_by('-pub_date', '-post_id').values_list(
+            'pub_date', 'post_id'
+        )
+        return list(queryset[:limit] if limit is not None else queryset)
+
+    def remove_author(self, user_id, author_id):
+        TimelineEntry.objects.filter(
+            user_id=user_id, author_id=author_id
+        ).delete()
+
+
+class MemoryTimelineStore(BaseTimelineStore):
+    """Per-process timelines, meant for tests and local development."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.timelines = defaultdict(list)
+
+    def insert(self, timeline, entry):
+        index = bisect.bisect_left(timeline, entry)
+        if index == len(timeline) or timeline[index][:2] != entry[:2]:
+            timeline.insert(index, entry)
+
+    def trim(self, timeline):
+        overflow = len(timeline) - settings.TIMELINE_MAX_LENGTH
+        if overflow > 0:
+            del timeline[:overflow]
+
+    def push(self, user_ids, entry):
+        with self.lock:
+            for user_id in user_ids:
+                timeline = self.timelines[user_id]
+                self.insert(timeline, tuple(entry))
+                self.trim(timeline)
+
+    def backfill(self, user_id, entries):
+        with self.lock:
+            timeline = self.timelines[user_id]
+            for entry in entries:
+                self.insert(timeline, tuple(entry))
+            self.trim(timeline)
+
+    def page(self, user_id, position=None, limit=None):
+        with self.lock:
+            timeline = self.timelines.get(user_id, [])
+            end = len(timeline)
+            if position is not None:
+                end = bisect.bisect_left(timeline, tuple(position))
+            start = 0 if limit is None else max(end - limit, 0)
+            return [entry[:2] for entry in reversed(timeline[start:end])]
+
+    def remove_author(self, user_id, author_id):
+        with self.lock:
+            timeline = self.timelines.get(user_id)
+            if timeline:
+                timeline[:] = [
+                    entry for entry in timeline if entry[2] != author_id
+                ]
+
+    def clear(self):
+        with self.lock:
+            self.timelines.clear()
+
+
+_stores = {}
+
+
+def get_store():
+    path = settings.TIMELINE_STORE
+    if path not in _stores:
+        _stores[path] = import_string(path)()
+    return _stores[path]
+
+
+def over_fanout_limit(field='author'):
+    """Whether the author in ``field`` has too many followers to fan out.
+
+    Counting all followers of a popular author would itself be the
+    expensive query, so only look whether a row past the limit exists.
+    """
+
+    limit = settings.TIMELINE_FANOUT_LIMIT
+    return Exists(
+        Follow.objects.filter(
+            author=OuterRef(field)
+        ).order_by()[limit:limit + 1]
+    )
+
+
+def deliver(post):
+    """Fan a freshly created post out to its author's followers."""
+
+    limit = settings.TIMELINE_FANOUT_LIMIT
+    followers = list(
+        Follow.objects.filter(author_id=post.author_id)
+        .order_by()
+        .values_list('user_id', flat=True)[:limit + 1]
+    )
+    if not followers or len(followers) > limit:
+        return
+    get_store().push(followers, (post.pub_date, post.id, post.author_id))
+
+
+def follow_author(user_id, author_id):
+    """Bring the latest posts of a newly followed author into the
+    timeline, unless they are merged in on read."""
+
+    limit = settings.TIMELINE_FANOUT_LIMIT
+    if Follow.objects.filter(
+            author_id=author_id).order_by()[limit:limit + 1].exists():
+        return
+    entries = (
+        Post.objects.filter(author_id=author_id)
+        .order_by('-pub_date', '-id')
+        .values_list('pub_date', 'id', 'author_id')
+        [:settings.TIMELINE_MAX_LENGTH]
+    )
+    get_store().backfill(user_id, list(entries))
+
+
+def unfollow_author(user_id, author_id):
+    get_store().remove_author(user_id, author_id)
+
+
+def pulled_authors(user):
+    """Followed authors whose posts are merged in on read."""
+
+    return list(
+        Follow.objects.filter(user=user)
+        .filter(over_fanout_limit())
+        .values_list('author_id', flat=True)
+    )
+
+
+def home_timeline(user, position=None, limit=None):
+    """Newest ``(pub_date, post_id)`` pairs of the user's home timeline."""
+
+    if position is not None:
+        pub_date, post_id = position
+        if isinstance(pub_date, str):
+            pub_date = parse_datetime(pub_date)
+        if pub_date is None:
+            raise ValueError('Timeline position needs a pub_date')
+        position = (pub_date, int(post_id))
+
+    pushed = get_store().page(user.id, position, limit)
+
+    authors = pulled_authors(user)
+    if not authors:
+        return pushed
+
+    pulled = Post.objects.filter(author_id__in=authors)
+    if position is not None:
+        pulled = pulled.filter(
+            Q(pub_date__lt=position[0])
+            | Q(pub_date=position[0], id__lt=position[1])
+        )
+    pulled = pulled.order_by('-pub_date', '-id').values_list('pub_date', 'id')
+    if limit is not None:
+        pulled = pulled[:limit]
+
+    # Posts fanned out before the author went over the limit come from
+    # both sources.
+    merged = heapq.merge(pushed, list(pulled), reverse=True)
+    return [entry for entry, _ in groupby(merged)][:limit]
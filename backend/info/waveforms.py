@@ -0,0 +1,310 @@
+"""Duration, format and waveform peaks of uploaded audio.
+
+The player draws a waveform and shows a duration before downloading a
+track, so both are computed once after upload and stored on the row.
+Peaks are the largest absolute amplitude of each of ``WAVEFORM_PEAKS``
+equal slices of the track, scaled to ``0..127`` and packed as int8.
+
+WAV samples are read through a memory map and reduced with NumPy a
+block at a time, so long tracks never sit in memory whole. MP3 frames
+are only walked for their headers: without a decoder there are no
+samples, so MP3 uploads get a duration but no peaks.
+"""
+import mmap
+import os
+import struct
+from array import array
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+
+from utils.workers import submit
+
+
+# Frames reduced per NumPy step, bounding the memory a block takes.
+BLOCK_FRAMES = 1 << 16
+
+WAVE_FORMAT_PCM = 1
+WAVE_FORMAT_IEEE_FLOAT = 3
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+META_KEYS = ('duration', 'sample_rate', 'channels', 'peaks')
+
+MP3_BITRATES = {
+    1: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+MP3_SAMPLE_RATES = {
+    3: (44100, 48000, 32000),
+    2: (22050, 24000, 16000),
+    0: (11025, 12000, 8000),
+}
+
+
+def analyze_audio(path, points):
+    """Metadata of the WAV or MP3 file at ``path``, ``None`` if unknown.
+
+    Runs in worker processes, so it only deals with file paths. Returns
+    a dict with ``duration``, ``sample_rate``, ``channels`` and
+    ``peaks``, the latter being ``None`` when it cannot be computed.
+    """
+
+    try:
+        with open(path, 'rb') as audio:
+            head = audio.read(12)
+            if head[:4] == b'RIFF' and head[8:12] == b'WAVE':
+                return analyze_wav(audio, points)
+            return analyze_mp3(audio)
+    except (OSError, ValueError, struct.error):
+        return None
+
+
+def read_wav_chunks(audio):
+    """``(fmt chunk, data offset, data size)`` of an open WAV file."""
+
+    file_size = os.fstat(audio.fileno()).st_size
+    fmt = data = None
+    offset = 12
+    while offset + 8 <= file_size and data is None:
+        audio.seek(offset)
+        chunk_id, size = struct.unpack('<4sI', audio.read(8))
+        if chunk_id == b'fmt ':
+            fmt = audio.read(min(size, 40))
+        elif chunk_id == b'data':
+            # Streamed WAVs may leave the size unset or overstated.
+            data = (offset + 8, min(size, file_size - offset - 8))
+        offset += 8 + size + (size & 1)
+
+    if fmt is None or len(fmt) < 16 or data is None:
+        return None
+    return (fmt,) + data
+
+
+def wav_sample_type(audio_format, bits):
+    """NumPy dtype of a WAV sample and its full scale amplitude."""
+
+    if audio_format == WAVE_FORMAT_PCM:
+        return {
+            8: ('u1', 128.0),
+            16: ('<i2', 32768.0),
+            24: ('u1', 8388608.0),
+            32: ('<i4', 2147483648.0),
+        }.get(bits)
+    if audio_format == WAVE_FORMAT_IEEE_FLOAT:
+        return {32: ('<f4', 1.0), 64: ('<f8', 1.0)}.get(bits)
+    return None
+
+
+def analyze_wav(audio, points):
+    chunks = read_wav_chunks(audio)
+    if chunks is None:
+        return None
+    fmt, data_offset, data_size = chunks
+
+    audio_format, channels, sample_rate, _, block_align, bits = (
+        struct.unpack('<HHIIHH', fmt[:16])
+    )
+    if audio_format == WAVE_FORMAT_EXTENSIBLE and len(fmt) >= 26:
+        audio_format, = struct.unpack('<H', fmt[24:26])
+    if not channels or not sample_rate:
+        return None
+
+    frames = data_size // block_align if block_align else 0
+    meta = {
+        'duration': frames / sample_rate,
+        'sample_rate': sample_rate,
+        'channels': channels,
+        'peaks': None,
+    }
+    sample_type = wav_sample_type(audio_format, bits)
+    if not frames or sample_type is None or (
+            block_align != channels * bits // 8):
+        return meta
+
+    dtype, full_scale = sample_type
+    if bits == 24:
+        # No 24-bit dtype: map the bytes and widen a block at a time.
+        samples = np.memmap(
+            audio, dtype='u1', mode='r', offset=data_offset,
+            shape=(frames * channels, 3)
+        )
+    else:
+        samples = np.memmap(
+            audio, dtype=dtype, mode='r', offset=data_offset,
+            shape=(frames * channels,)
+        )
+
+    def widen(block):
+        block = block.astype(np.int32)
+        block = block[:, 0] | block[:, 1] << 8 | block[:, 2] << 16
+        return (block ^ 0x800000) - 0x800000
+
+    meta['peaks'] = compute_peaks(
+        samples, channels, points,
+        center=128 if bits == 8 else 0,
+        full_scale=full_scale,
+        convert=widen if bits == 24 else None
+    )
+    return meta
+
+
+def compute_peaks(samples, channels, points, center=0, full_scale=1.0,
+                  convert=None):
+    """Max amplitude of ``points`` equal slices of ``samples`` as int8.
+
+    ``samples`` are interleaved, so the channels of a frame are simply
+    reduced together. Slices are reduced a block at a time with
+    ``reduceat`` in the samples' own dtype, keeping the largest and the
+    smallest value of each, which avoids converting every sample.
+    """
+
+    frames = len(samples) // channels
+    points = min(points, frames)
+    edges = np.linspace(0, frames, points + 1).astype(np.int64) * channels
+    peaks = np.empty(points, dtype=np.float64)
+
+    step = max(1, BLOCK_FRAMES * points // frames)
+    for first in range(0, points, step):
+        last = min(first + step, points)
+        block = samples[edges[first]:edges[last]]
+        if convert is not None:
+            block = convert(block)
+        starts = edges[first:last] - edges[first]
+        highest = np.maximum.reduceat(block, starts).astype(np.float64)
+        lowest = np.minimum.reduceat(block, starts).astype(np.float64)
+        peaks[first:last] = np.maximum(highest - center, center - lowest)
+
+    peaks = np.clip(peaks / full_scale, 0, 1)
+    return np.rint(peaks * 127).astype(np.int8).tobytes()
+
+
+def skip_id3(view):
+    """Offset of the first byte after a leading ID3v2 tag."""
+
+    if view[:3] != b'ID3' or len(view) < 10:
+        return 0
+    size = 0
+    for byte in view[6:10]:
+        size = size << 7 | byte & 0x7F
+    footer = 10 if view[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def mp3_frame(view, offset):
+    """``(length, samples, sample rate, channels)`` of the frame at
+    ``offset`` or ``None`` if no MPEG layer III frame starts there."""
+
+    if offset + 4 > len(view) or view[offset] != 0xFF:
+        return None
+    b1, b2, b3 = view[offset + 1], view[offset + 2], view[offset + 3]
+    version = b1 >> 3 & 3
+    if b1 & 0xE0 != 0xE0 or b1 >> 1 & 3 != 1 or version == 1:
+        return None
+    bitrate_index, rate_index = b2 >> 4, b2 >> 2 & 3
+    if bitrate_index in (0, 15) or rate_index == 3:
+        return None
+
+    bitrate = MP3_BITRATES[1 if version == 3 else 2][bitrate_index] * 1000
+    sample_rate = MP3_SAMPLE_RATES[version][rate_index]
+    samples = 1152 if version == 3 else 576
+    length = samples // 8 * bitrate // sample_rate + (b2 >> 1 & 1)
+    channels = 1 if b3 >> 6 == 3 else 2
+    return length, samples, sample_rate, channels
+
+
+def xing_frames(view, offset, version_bits, channels):
+    """Frame count from a Xing/Info header in the first frame, if any."""
+
+    if version_bits == 3:
+        side_info = 17 if channels == 1 else 32
+    else:
+        side_info = 9 if channels == 1 else 17
+    tag = offset + 4 + side_info
+    if view[tag:tag + 4] not in (b'Xing', b'Info'):
+        return None
+    flags, = struct.unpack('>I', view[tag + 4:tag + 8])
+    if not flags & 1:
+        return None
+    frames, = struct.unpack('>I', view[tag + 8:tag + 12])
+    return frames
+
+
+def analyze_mp3(audio):
+    if not os.fstat(audio.fileno()).st_size:
+        return None
+    with mmap.mmap(audio.fileno(), 0, access=mmap.ACCESS_READ) as view:
+        offset = skip_id3(view)
+        frame = None
+        # Tolerate junk before the first frame.
+        while offset < len(view):
+            frame = mp3_frame(view, offset)
+            if frame is not None:
+                break
+            offset = view.find(b'\xff', offset + 1)
+            if offset == -1:
+                return None
+        if frame is None:
+            return None
+
+        length, samples, sample_rate, channels = frame
+        meta = {
+            'sample_rate': sample_rate,
+            'channels': channels,
+            'peaks': None,
+        }
+        frames = xing_frames(
+            view, offset, view[offset + 1] >> 3 & 3, channels
+        )
+        if frames is not None:
+            meta['duration'] = frames * samples / sample_rate
+            return meta
+
+        total = 0
+        while frame is not None:
+            length, samples, _, _ = frame
+            total += samples
+            offset += length
+            frame = mp3_frame(view, offset)
+
+    meta['duration'] = total / sample_rate
+    return meta
+
+
+def audio_meta_fields(meta):
+    """Model field values storing the result of ``analyze_audio``."""
+
+    return {
+        f'audio_{key}': meta[key]
+        for key in META_KEYS
+    }
+
+
+def clear_audio_meta(instance):
+    for field in audio_meta_fields(dict.fromkeys(META_KEYS)):
+        setattr(instance, field, None)
+
+
+def peaks_list(peaks):
+    return array('b', bytes(peaks)).tolist()
+
+
+def schedule_analysis(instance):
+    """Analyze the saved audio of a Post or Review once the transaction
+    commits and store the result on its row."""
+
+    if not instance.audio or instance.audio_duration is not None:
+        return
+    model, pk, name = type(instance), instance.pk, instance.audio.name
+    path = instance.audio.path
+
+    def store(meta):
+        if meta is not None:
+            # The audio may have been replaced in the meantime.
+            model.objects.filter(pk=pk, audio=name).update(
+                **audio_meta_fields(meta)
+            )
+
+    transaction.on_commit(lambda: submit(
+        analyze_audio, path, settings.WAVEFORM_PEAKS, callback=store
+    ))
@@ -0,0 +1,106 @@
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from utils.authentication import dump_entry, get_token_cache
+
+
+User = get_user_model()
+
+
+class CachedTokenAuthenticationTests(APITestCase):
+    """Cached Token Authentication Testing."""
+
+    def setUp(self):
+        get_token_cache().clear()
+        self.user = User.objects.create_user(
+            'user', 'user@user.com', 'user1234'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_token_is_looked_up_once(self):
+        """A Known Token Costs no Query."""
+
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/inbox/counts/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/inbox/counts/')
+        self.assertEqual(
+            response.data, {'invites': 0, 'requests': 0}
+        )
+
+    def test_logout_forgets_token(self):
+        """A Token Deleted on Logout Stops Working at Once."""
+
+        self.client.get('/api/inbox/counts/')
+        response = self.client.post('/api/auth/token/logout/')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        response = self.client.get('/api/inbox/counts/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivation_forgets_token(self):
+        """A Deactivated User is Refused at Once."""
+
+        self.client.get('/api/inbox/counts/')
+        self.user.is_active = False
+        self.user.save()
+
+        response = self.client.get('/api/inbox/counts/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_revoked_privileges_forget_token(self):
+        """Privileges Revoked Take Effect at Once."""
+
+        self.user.is_superuser = True
+        self.user.save(update_fields=['is_superuser'])
+        tag = {'title': 'Pop', 'color': '#FFFFFF', 'slug': 'pop'}
+        response = self.client.post('/api/tags/', tag, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertIsNotNone(get_token_cache().get(self.token.key))
+
+        self.user.is_superuser = False
+        self.user.save(update_fields=['is_superuser'])
+        self.assertIsNone(get_token_cache().get(self.token.key))
+        tag['slug'] = tag['title'] = 'rock'
+        response = self.client.post('/api/tags/', tag, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.get('/api/inbox/counts/')
+        self.user.groups.create(name='editors')
+        self.assertIsNone(get_token_cache().get(self.token.key))
+
+    @override_settings(TOKEN_CACHE_SIZE=1)
+    def test_cache_is_bounded(self):
+        """The Least Recently Used Token is Dropped First."""
+
+        other = User.objects.create_user('other', 'o@o.com', 'user1234')
+        other_token = Token.objects.create(user=other)
+        self.client.get('/api/inbox/counts/')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {other_token.key}')
+        self.client.get('/api/inbox/counts/')
+
+        self.assertIsNone(get_token_cache().get(self.token.key))
+        self.assertIsNotNone(get_token_cache().get(other_token.key))
+
+    @override_settings(TOKEN_CACHE='utils.authentication.DjangoTokenCache')
+    def test_shared_cache_keeps_forgotten_tokens_out(self):
+        """A Lookup Finishing after Logout Cannot Cache the Token."""
+
+        token_cache = get_token_cache()
+        entry = dump_entry(self.user, self.token)
+        token_cache.delete([self.token.key])
+        token_cache.set(self.token.key, entry)
+        self.assertIsNone(token_cache.get(self.token.key))
+        token_cache.cache.clear()
+
+    def test_login_keeps_tokens(self):
+        """Saving Other Fields does not Look Tokens up."""
+
+        with self.assertNumQueries(1):
+            self.user.save(update_fields=['last_login'])
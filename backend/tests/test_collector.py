@@ -0,0 +1,116 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from info.models import Post
+from utils.collector import MediaCollector, referenced_names
+from utils.models import StoredFile
+
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+OLD = time.time() - 7 * 24 * 60 * 60
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class MediaCollectorTests(TestCase):
+    """Orphaned Media Collection Testing."""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.checkpoint = os.path.join(TEMP_MEDIA_ROOT, '.checkpoint')
+        author = User.objects.create_user('user', 'u@u.com', 'user1234')
+        Post.objects.create(
+            title='Kept', author=author, image='posts/images/ab/kept.png'
+        )
+        for name in ('posts/images/ab/kept.png',
+                     'posts/images/ab/kept.thumb.webp',
+                     'posts/images/ab/lost.png',
+                     'posts/images/ab/lost.thumb.webp',
+                     'posts/images/ab.png',
+                     'uploads/part.part'):
+            self.write(name)
+        self.write('posts/images/ab/fresh.png', mtime=time.time())
+
+    def tearDown(self):
+        shutil.rmtree(os.path.join(TEMP_MEDIA_ROOT, 'posts'))
+        shutil.rmtree(os.path.join(TEMP_MEDIA_ROOT, 'uploads'))
+
+    def write(self, name, mtime=OLD):
+        path = os.path.join(TEMP_MEDIA_ROOT, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as file:
+            file.write(b'x' * 10)
+        os.utime(path, (mtime, mtime))
+
+    def exists(self, name):
+        return os.path.exists(os.path.join(TEMP_MEDIA_ROOT, name))
+
+    def test_dry_run_reports_orphans(self):
+        out = StringIO()
+        call_command(
+            'collect_media', '--dry-run', '--checkpoint', self.checkpoint,
+            stdout=out
+        )
+        self.assertIn('Orphaned: 3', out.getvalue())
+        self.assertIn('deleted: 0', out.getvalue())
+        self.assertTrue(self.exists('posts/images/ab/lost.png'))
+
+    def test_unreferenced_files_are_deleted(self):
+        stats = MediaCollector(checkpoint=self.checkpoint).run()
+
+        self.assertEqual(stats.files, 6)
+        self.assertEqual(stats.referenced, 2)
+        self.assertEqual(stats.recent, 1)
+        self.assertEqual(stats.deleted, 3)
+        self.assertTrue(self.exists('posts/images/ab/kept.png'))
+        self.assertTrue(self.exists('posts/images/ab/kept.thumb.webp'))
+        self.assertTrue(self.exists('posts/images/ab/fresh.png'))
+        self.assertTrue(self.exists('uploads/part.part'))
+        self.assertFalse(self.exists('posts/images/ab/lost.png'))
+        self.assertFalse(self.exists('posts/images/ab/lost.thumb.webp'))
+        self.assertFalse(self.exists('posts/images/ab.png'))
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_interrupted_run_resumes(self):
+        with open(self.checkpoint, 'w') as checkpoint:
+            json.dump({'after': 'posts/images/ab/kept.png', 'stats': {}},
+                      checkpoint)
+
+        stats = MediaCollector(checkpoint=self.checkpoint).run()
+
+        self.assertEqual(stats.deleted, 2)
+        self.assertTrue(self.exists('posts/images/ab.png'))
+        self.assertTrue(self.exists('posts/images/ab/kept.thumb.webp'))
+        self.assertFalse(self.exists('posts/images/ab/lost.png'))
+        self.assertFalse(self.exists('posts/images/ab/lost.thumb.webp'))
+
+    def test_files_saved_again_before_deletion_are_kept(self):
+        collector = MediaCollector()
+        collector.references = referenced_names()
+        collector.reference = next(collector.references, None)
+        list(collector.collect(''))
+
+        os.utime(os.path.join(TEMP_MEDIA_ROOT, 'posts/images/ab/lost.png'))
+        StoredFile.objects.create(name='posts/images/ab.png', references=1)
+        collector.flush()
+
+        self.assertEqual(collector.stats.deleted, 1)
+        self.assertTrue(self.exists('posts/images/ab/lost.png'))
+        self.assertTrue(self.exists('posts/images/ab.png'))
+        self.assertTrue(StoredFile.objects.filter(
+            name='posts/images/ab.png'
+        ).exists())
+        self.assertFalse(self.exists('posts/images/ab/lost.thumb.webp'))
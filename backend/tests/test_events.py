@@ -0,0 +1,116 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from info.models import (Band, Instrument, InstrumentCategory, Post,
+                         Request)
+from utils.events import EventStream, get_broker
+
+
+User = get_user_model()
+
+
+class EventTests(TestCase):
+    """Pushed Events Testing."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            'user', 'user@user.com', 'user1234'
+        )
+        self.fan = User.objects.create_user('fan', 'fan@fan.com', 'fan12345')
+        self.events = []
+        get_broker().subscribe(self.user.id, self.events.append)
+        self.addCleanup(
+            get_broker().unsubscribe, self.user.id, self.events.append
+        )
+
+    def test_committed_activity_is_published(self):
+        category = InstrumentCategory.objects.create(
+            title='Strings', slug='strings'
+        )
+        instrument = Instrument.objects.create(
+            title='Violin', category=category
+        )
+        band = Band.objects.create(
+            author=self.user, title='Band', description='test', quantity=5
+        )
+        post = Post.objects.create(title='Demo', author=self.user)
+        client = APIClient()
+        client.force_authenticate(user=self.fan)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            client.post(f'/api/posts/{post.id}/like/')
+            client.post(f'/api/posts/{post.id}/like/')
+            request = Request.objects.create(
+                author=self.fan, user=self.user, band=band,
+                instrument=instrument
+            )
+        self.assertEqual(self.events, [
+            {'type': 'like', 'post': post.id, 'user': self.fan.id},
+            {'type': 'request', 'id': request.id, 'band': band.id,
+             'author': self.fan.id},
+        ])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            client = APIClient()
+            client.force_authenticate(user=self.user)
+            client.post(f'/api/posts/{post.id}/like/')
+        self.assertEqual(len(self.events), 2)
+
+    async def test_event_stream(self):
+        token = await sync_to_async(Token.objects.create)(user=self.user)
+        sent = []
+        closed = asyncio.Event()
+
+        async def receive():
+            await closed.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            sent.append(message)
+
+        async def wait_for(count):
+            while len(sent) < count:
+                await asyncio.sleep(0.01)
+
+        scope = {
+            'type': 'http', 'method': 'GET', 'path': '/api/events/',
+            'headers': [], 'query_string': f'token={token.key}'.encode(),
+        }
+        stream = asyncio.ensure_future(EventStream(None)(scope, receive, send))
+        await asyncio.wait_for(wait_for(2), 5)
+        get_broker().publish([
+            (self.fan.id, {'type': 'like', 'post': 2}),
+            (self.user.id, {'type': 'like', 'post': 1}),
+        ])
+        await asyncio.wait_for(wait_for(3), 5)
+        closed.set()
+        await asyncio.wait_for(stream, 5)
+
+        self.assertEqual(sent[0]['status'], 200)
+        self.assertEqual(
+            sent[2]['body'],
+            b'event: like\ndata: {"type": "like", "post": 1}\n\n'
+        )
+        self.assertEqual(len(sent), 3)
+        self.assertEqual(
+            get_broker().listeners[self.user.id], {self.events.append}
+        )
+
+    async def test_event_stream_needs_a_token(self):
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {
+            'type': 'http', 'method': 'GET', 'path': '/api/events/',
+            'headers': [(b'authorization', b'Token nope')],
+            'query_string': b'',
+        }
+        await EventStream(None)(scope, None, send)
+        self.assertEqual(sent[0]['status'], 401)
@@ -0,0 +1,131 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from info.models import Post, Tag, TimelineEntry
+from info.timeline import get_store
+from users.models import Follow
+
+
+User = get_user_model()
+
+
+class FeedTests(APITestCase):
+    """Home Timeline Testing."""
+
+    def setUp(self):
+        self.tag = Tag.objects.create(
+            title='test tag',
+            color='#123456',
+            slug='test_slug'
+        )
+        self.reader = User.objects.create_user(
+            'reader', 'reader@user.com', 'user1234'
+        )
+        self.author_user = User.objects.create_user(
+            'author', 'author@user.com', 'user1234'
+        )
+        self.stranger = User.objects.create_user(
+            'stranger', 'stranger@user.com', 'user1234'
+        )
+        Follow.objects.create(user=self.reader, author=self.author_user)
+
+        self.author = APIClient()
+        self.author.force_authenticate(user=self.author_user)
+        self.client.force_authenticate(user=self.reader)
+
+    def publish(self, client, title):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post(
+                '/api/posts/',
+                {'title': title, 'tags': [self.tag.id]},
+                format='json'
+            )
+        return response.data['id']
+
+    def walk_feed(self, url='/api/feed/?limit=2'):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids += [post['id'] for post in response.data['results']]
+            url = response.data['next']
+        return ids
+
+    def test_feed_is_fanned_out_on_write(self):
+        stranger = APIClient()
+        stranger.force_authenticate(user=self.stranger)
+
+        first = self.publish(self.author, 'first')
+        self.publish(stranger, 'not followed')
+        second = self.publish(self.author, 'second')
+        third = self.publish(self.author, 'third')
+
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.reader).count(), 3
+        )
+        self.assertEqual(self.walk_feed(), [third, second, first])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_feed_is_merged_on_read_for_popular_authors(self):
+        first = self.publish(self.author, 'first')
+        second = self.publish(self.author, 'second')
+
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(self.walk_feed(), [second, first])
+
+    @override_settings(TIMELINE_STORE='info.timeline.MemoryTimelineStore')
+    def test_backfill_into_memory_store(self):
+        store = get_store()
+        store.clear()
+        posts = [
+            Post.objects.create(title=str(i), author=self.author_user)
+            for i in range(3)
+        ]
+
+        self.assertEqual(self.walk_feed(), [])
+
+        call_command('backfill_timelines', stdout=StringIO())
+
+        self.assertEqual(
+            self.walk_feed(), [post.id for post in reversed(posts)]
+        )
+        store.clear()
+
+    @override_settings(TIMELINE_MAX_LENGTH=2)
+    def test_database_timeline_is_trimmed(self):
+        posts = [self.publish(self.author, str(i)) for i in range(4)]
+
+        self.assertEqual(
+            list(TimelineEntry.objects.filter(
+                user=self.reader
+            ).values_list('post_id', flat=True)),
+            posts[:1:-1]
+        )
+
+    def test_pushed_and_pulled_posts_are_not_repeated(self):
+        first = self.publish(self.author, 'first')
+        second = self.publish(self.author, 'second')
+
+        with override_settings(TIMELINE_FANOUT_LIMIT=0):
+            third = self.publish(self.author, 'third')
+            self.assertEqual(self.walk_feed(), [third, second, first])
+
+    @override_settings(TIMELINE_STORE='info.timeline.MemoryTimelineStore')
+    def test_pages_skip_deleted_posts(self):
+        store = get_store()
+        store.clear()
+        first = self.publish(self.author, 'first')
+        second = self.publish(self.author, 'second')
+        third = self.publish(self.author, 'third')
+        Post.objects.filter(id=second).delete()
+
+        response = self.client.get('/api/feed/?limit=2')
+        self.assertEqual(
+            [post['id'] for post in response.data['results']], [third, first]
+        )
+        store.clear()
@@ -0,0 +1,53 @@
+import base64
+
+from django.test import SimpleTestCase
+from rest_framework import serializers
+
+from api.fields import Base64AudioField, Base64ImageField
+
+
+PNG = base64.b64decode(
+    'iVBORw0KGgoAAAANSUhEUgAAAAEAAAABAgMAAABieywaAAAACVBMVEUAAAD///9fX1/S0'
+    'ecCAAAACXBIWXMAAA7EAAAOxAGVKw4bAAAACklEQVQImWNoAAAAggCByxOyYQAAAABJRU'
+    '5ErkJggg=='
+)
+WAV = b'RIFF\x24\x00\x00\x00WAVEfmt ' + bytes(200)
+
+
+def data_uri(prefix, content):
+    return f'{prefix};base64,' + base64.b64encode(content).decode()
+
+
+class Base64FieldTests(SimpleTestCase):
+    """Base64 Media Fields Testing."""
+
+    def test_image_is_decoded(self):
+        image = Base64ImageField().to_internal_value(
+            data_uri('data:image/png', PNG)
+        )
+
+        self.assertEqual(image.name, 'temp.png')
+        image.seek(0)
+        self.assertEqual(image.read(), PNG)
+
+    def test_audio_type_is_sniffed(self):
+        audio = Base64AudioField().to_internal_value(
+            data_uri('data:audio/mp3', WAV * 1000)
+        )
+
+        self.assertEqual(audio.name, 'temp.wav')
+        self.assertEqual(audio.size, len(WAV) * 1000)
+
+    def test_size_limit(self):
+        field = Base64AudioField(max_size=len(WAV) - 1)
+
+        with self.assertRaisesMessage(serializers.ValidationError, 'bytes'):
+            field.to_internal_value(data_uri('data:audio/wav', WAV))
+
+    def test_invalid_payloads(self):
+        field = Base64ImageField()
+
+        with self.assertRaises(serializers.ValidationError):
+            field.to_internal_value(data_uri('data:image/png', WAV))
+        with self.assertRaises(serializers.ValidationError):
+            field.to_internal_value('data:image/png;base64,!!!!')
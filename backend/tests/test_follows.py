@@ -0,0 +1,178 @@
+from django.contrib.auth import get_user_model
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from info.models import Instrument, InstrumentCategory, Post
+from users.graph import Adjacency, get_graph
+from users.models import Follow
+
+
+User = get_user_model()
+
+
+class FollowTests(APITestCase):
+    """Follow Graph Testing."""
+
+    def setUp(self):
+        get_graph().reset()
+        self.reader = User.objects.create_user(
+            'reader', 'reader@user.com', 'user1234'
+        )
+        self.author = User.objects.create_user(
+            'author', 'author@user.com', 'user1234'
+        )
+        self.client.force_authenticate(user=self.reader)
+
+    def usernames(self, response):
+        return [user['username'] for user in response.data]
+
+    def test_follow_and_unfollow(self):
+        """Following Fills the Home Timeline, Unfollowing Empties it."""
+
+        post = Post.objects.create(author=self.author, title='old', text='')
+        url = f'/api/users/{self.author.id}/follow/'
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = self.client.get('/api/feed/')
+        self.assertEqual(
+            [item['id'] for item in response.data['results']], [post.id]
+        )
+
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(f'/api/users/{self.reader.id}/follow/')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.client.force_authenticate(user=None)
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.client.force_authenticate(user=self.reader)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(url)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Follow.objects.exists())
+        response = self.client.get('/api/feed/')
+        self.assertEqual(response.data['results'], [])
+
+        response = self.client.delete(url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_followers_and_following_pages(self):
+        """Followers and Following are Paged Most Recent First."""
+
+        fans = [
+            User.objects.create_user(f'fan{number}', f'f{number}@f.com', 'x')
+            for number in range(5)
+        ]
+        for fan in fans:
+            Follow.objects.create(user=fan, author=self.author)
+        Follow.objects.create(user=fans[0], author=self.reader)
+
+        url = f'/api/users/{self.author.id}/followers/?limit=2'
+        names = []
+        while url:
+            with self.assertNumQueries(3):
+                response = self.client.get(url)
+            names += [user['username'] for user in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(
+            names, [f'fan{number}' for number in range(4, -1, -1)]
+        )
+
+        response = self.client.get(f'/api/users/{fans[0].id}/following/')
+        self.assertEqual(
+            [user['username'] for user in response.data['results']],
+            ['reader', 'author']
+        )
+
+    def test_suggestions(self):
+        """Friends of Friends and Bandmates by Instrument are Suggested."""
+
+        users = {
+            name: User.objects.create_user(name, f'{name}@u.com', 'x')
+            for name in ('friend', 'other', 'popular', 'quiet', 'drummer')
+        }
+        for user, author in (('friend', 'popular'), ('other', 'popular'),
+                             ('friend', 'quiet'), ('popular', 'reader')):
+            Follow.objects.create(
+                user=users.get(user, self.reader),
+                author=users.get(author, self.reader)
+            )
+        Follow.objects.create(user=self.reader, author=users['friend'])
+        Follow.objects.create(user=self.reader, author=users['other'])
+
+        response = self.client.get('/api/users/suggestions/')
+        self.assertEqual(self.usernames(response), ['popular', 'quiet'])
+
+        category = InstrumentCategory.objects.create(
+            title='Drums', slug='drums'
+        )
+        drums = Instrument.objects.create(title='Drums', category=category)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.reader.instruments.add(drums)
+            users['drummer'].instruments.add(drums)
+            drums.users.add(users['quiet'])
+            self.client.delete(f'/api/users/{users["other"].id}/follow/')
+
+        response = self.client.get('/api/users/suggestions/?limit=2')
+        self.assertEqual(self.usernames(response), ['quiet', 'popular'])
+        response = self.client.get('/api/users/suggestions/')
+        self.assertEqual(
+            self.usernames(response), ['quiet', 'popular', 'drummer']
+        )
+
+        # Deactivated without signals, as another process would.
+        User.objects.filter(pk=users['quiet'].pk).update(is_active=False)
+        response = self.client.get('/api/users/suggestions/?limit=2')
+        self.assertEqual(self.usernames(response), ['popular', 'drummer'])
+        self.assertIn(users['quiet'].pk, get_graph().hidden)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            users['popular'].delete()
+        response = self.client.get('/api/users/suggestions/')
+        self.assertEqual(self.usernames(response), ['drummer'])
+
+    def test_adjacency_compaction(self):
+        """Changes Folded into the Arrays Keep the Same Neighbours."""
+
+        adjacency = Adjacency([1, 1, 2, 3], [2, 3, 3, 1])
+        adjacency.add(1, 4)
+        adjacency.add(1, 4)
+        adjacency.remove(1, 2)
+        adjacency.remove(3, 1)
+        adjacency.add(5, 1)
+        adjacency.remove(2, 9)
+        self.assertEqual(adjacency.changes, 4)
+
+        compacted = adjacency.compacted()
+        for source in range(7):
+            self.assertEqual(
+                sorted(adjacency.neighbours(source).tolist()),
+                compacted.neighbours(source).tolist()
+            )
+        self.assertEqual(compacted.neighbours(1).tolist(), [3, 4])
+        self.assertEqual(compacted.changes, 0)
+
+    def test_rebuild_keeps_concurrent_changes(self):
+        """Changes Signalled During a Rebuild Survive the Swap."""
+
+        graph = get_graph()
+        graph.sync()
+        rows = graph.rows
+
+        def rows_with_follow(queryset, *fields):
+            graph.follow(self.reader.pk, self.author.pk)
+            return rows(queryset, *fields)
+
+        graph.rows = rows_with_follow
+        try:
+            graph.rebuild()
+        finally:
+            del graph.rows
+        self.assertEqual(
+            graph.following.neighbours(self.reader.pk).tolist(),
+            [self.author.pk]
+        )
@@ -0,0 +1,123 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from info.inbox import create_pending
+from info.models import Band, Instrument, InstrumentCategory, Invite, Request
+
+
+User = get_user_model()
+
+
+class InboxTests(APITestCase):
+    """Inbox of Pending Invites and Requests Testing."""
+
+    def setUp(self):
+        category = InstrumentCategory.objects.create(
+            title='Strings', slug='strings'
+        )
+        self.instrument = Instrument.objects.create(
+            title='Violin', category=category
+        )
+        self.user = User.objects.create_user(
+            'user', 'user@user.com', 'user1234'
+        )
+        self.band = Band.objects.create(
+            author=self.user, title='Band', description='test', quantity=5
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def send(self, model, number, age):
+        author = User.objects.create_user(f'{model.__name__}{number}')
+        band = self.band
+        if model is Invite:
+            band = Band.objects.create(
+                author=author, title=f'Band {number}', description='test',
+                quantity=5
+            )
+        return model.objects.create(
+            author=author, user=self.user, band=band,
+            instrument=self.instrument,
+            created=timezone.now() - timedelta(hours=age)
+        )
+
+    def counts(self):
+        return self.client.get('/api/inbox/counts/').data
+
+    def test_inbox_merges_invites_and_requests(self):
+        entries = [
+            self.send(Invite, 1, age=5), self.send(Request, 2, age=4),
+            self.send(Request, 3, age=3), self.send(Invite, 4, age=2),
+            self.send(Request, 5, age=1),
+        ]
+        expected = [
+            (type(entry).__name__.lower(), entry.id)
+            for entry in reversed(entries)
+        ]
+
+        seen = []
+        url = '/api/inbox/?limit=2'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen += [
+                (entry['kind'], entry['id'])
+                for entry in response.data['results']
+            ]
+            url = response.data['next']
+        self.assertEqual(seen, expected)
+        self.assertEqual(self.counts(), {'invites': 2, 'requests': 3})
+
+        response = self.client.get('/api/inbox/?cursor=e30=')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_counts_follow_accept_and_delete(self):
+        request = self.send(Request, 1, age=1)
+        self.send(Request, 2, age=1)
+        invite = self.send(Invite, 3, age=1)
+        self.assertEqual(self.counts(), {'invites': 1, 'requests': 2})
+
+        response = self.client.post(f'/api/requests/{request.id}/accept/')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        # Withdrawn by whoever sent it.
+        invite.delete()
+        self.assertEqual(self.counts(), {'invites': 0, 'requests': 1})
+
+    def test_stale_entries_expire(self):
+        self.send(Invite, 1, age=24 * 40)
+        self.send(Request, 2, age=24 * 40)
+        self.send(Request, 3, age=24 * 40)
+        fresh = self.send(Request, 4, age=1)
+
+        out = StringIO()
+        call_command('expire_inbox', '--batch-size', '1', stdout=out)
+
+        self.assertIn('Expired invites: 1, requests: 2', out.getvalue())
+        self.assertEqual(
+            list(Request.objects.values_list('id', flat=True)), [fresh.id]
+        )
+        self.assertFalse(Invite.objects.exists())
+        self.assertEqual(self.counts(), {'invites': 0, 'requests': 1})
+
+    def test_bulk_counts_only_inserted_rows(self):
+        """A Concurrent Duplicate is not Counted Twice."""
+
+        author = User.objects.create_user('author')
+        existing = Request.objects.create(
+            author=author, user=self.user, band=self.band,
+            instrument=self.instrument
+        )
+        duplicate = Request(
+            author=author, user=self.user, band=self.band,
+            instrument=self.instrument
+        )
+
+        ids = create_pending(Request, [duplicate], 'band_id')
+        self.assertEqual(ids, {self.band.id: existing.id})
+        self.assertEqual(duplicate.id, existing.id)
+        self.assertEqual(self.counts(), {'invites': 0, 'requests': 1})
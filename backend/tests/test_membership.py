@@ -0,0 +1,136 @@
+import threading
+
+from django.contrib.auth import get_user_model
+from django.db import OperationalError, connection
+from django.test import TransactionTestCase
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from info.membership import BandFull, join_band
+from info.models import (Band, BandSlot, Instrument, InstrumentCategory,
+                         UserBandInstrument)
+
+
+User = get_user_model()
+
+
+class MembershipMixin:
+
+    def create_band(self, quantity):
+        category = InstrumentCategory.objects.create(
+            title='Strings', slug='strings'
+        )
+        self.instrument = Instrument.objects.create(
+            title='Violin', category=category
+        )
+        self.leader = User.objects.create_user(
+            'leader', 'leader@leader.com', 'leader1234'
+        )
+        self.band = Band.objects.create(
+            author=self.leader, title='Band', description='test',
+            quantity=quantity
+        )
+        join_band(self.band, self.leader, self.instrument)
+
+
+class MembershipTests(MembershipMixin, APITestCase):
+    """Band Membership Testing."""
+
+    def setUp(self):
+        self.create_band(quantity=2)
+        self.user = User.objects.create_user(
+            'user', 'user@user.com', 'user1234'
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_join_fills_band_and_leave_reopens_it(self):
+        BandSlot.objects.create(band=self.band, instrument=self.instrument)
+        join_band(self.band, self.user, self.instrument)
+
+        self.band.refresh_from_db()
+        self.assertEqual(self.band.members_count, 2)
+        self.assertTrue(self.band.is_full)
+        self.assertFalse(self.band.slots.get().is_open)
+        with self.assertRaises(BandFull):
+            join_band(self.band, User.objects.create_user('late'),
+                      self.instrument)
+
+        response = self.client.post(f'/api/bands/{self.band.id}/leave/')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.band.refresh_from_db()
+        self.assertEqual(self.band.members_count, 1)
+        self.assertFalse(self.band.is_full)
+        self.assertTrue(self.band.slots.get().is_open)
+
+        response = self.client.post(f'/api/bands/{self.band.id}/leave/')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_quantity_cannot_drop_below_members(self):
+        join_band(self.band, self.user, self.instrument)
+        self.client.force_authenticate(user=self.leader)
+
+        response = self.client.patch(
+            f'/api/bands/{self.band.id}/', {'quantity': 1}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.patch(
+            f'/api/bands/{self.band.id}/',
+            {'quantity': 3, 'title': 'Renamed'}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.band.refresh_from_db()
+        self.assertEqual(
+            (self.band.title, self.band.quantity, self.band.is_full),
+            ('Renamed', 3, False)
+        )
+        self.assertEqual(self.band.members_count, 2)
+
+
+class ConcurrentJoinTests(MembershipMixin, TransactionTestCase):
+    """Concurrent Band Joins Testing."""
+
+    THREADS = 12
+
+    def test_concurrent_joins_never_overfill(self):
+        self.create_band(quantity=4)
+        users = [
+            User.objects.create_user(f'user{number}')
+            for number in range(self.THREADS)
+        ]
+        barrier = threading.Barrier(self.THREADS)
+        outcomes = []
+
+        def join(user):
+            barrier.wait()
+            try:
+                while True:
+                    try:
+                        join_band(self.band, user, self.instrument)
+                        outcomes.append('joined')
+                    except BandFull:
+                        outcomes.append('full')
+                    except OperationalError:
+                        # SQLite reports a locked table instead of
+                        # waiting for the row lock.
+                        continue
+                    break
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=join, args=(user,)) for user in users
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.band.refresh_from_db()
+        self.assertEqual(outcomes.count('joined'), 3)
+        self.assertEqual(outcomes.count('full'), self.THREADS - 3)
+        self.assertEqual(self.band.members_count, 4)
+        self.assertTrue(self.band.is_full)
+        self.assertEqual(
+            UserBandInstrument.objects.filter(band=self.band).count(), 4
+        )
@@ -1,13 +1,18 @@
+import json
 import shutil
+from base64 import urlsafe_b64encode
+from io import StringIO
 
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.test import TestCase, override_settings
 from rest_framework import status
 from rest_framework.authtoken.models import Token
 from rest_framework.test import APITestCase, APIClient
 
-from info.models import (Band, Instrument, InstrumentCategory, Invite,
-                         Post, Request, Tag)
+from info.models import (Band, BandSlot, Instrument, InstrumentCategory,
+                         Invite, Post, Request, Tag, UserBandInstrument)
+from info.recommendations import get_features
 
 
 User = get_user_model()
@@ -111,6 +116,169 @@ class PostModelTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         self.assertEqual(Post.objects.count(), post_count - 1)
 
+    def test_post_counters(self):
+        """Likes, Reviews and Bookmarks are Counted on the Post."""
+
+        self.author.force_authenticate(user=self.author_user)
+        self.client.force_authenticate(user=self.client_user)
+
+        response = self.author.post(
+            '/api/posts/', self.post_data, format='json'
+        )
+        post_id = response.data.get('id')
+        url = f'/api/posts/{post_id}/'
+
+        self.client.post(url + 'like/')
+        self.client.post(url + 'like/')
+        self.author.post(url + 'like/')
+        self.client.post(url + 'bookmark/')
+        self.client.post(url + 'review/', {'text': 'nice'}, format='json')
+
+        response = self.client.get(url)
+        self.assertEqual(response.data['likes'], 2)
+        self.assertEqual(response.data['bookmarks'], 1)
+        self.assertEqual(response.data['reviews'], 1)
+
+        self.client.delete(url + 'like/')
+        self.client.delete(url + 'like/')
+        self.client.delete(url + 'review/')
+        response = self.client.delete(url + 'review/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        post = Post.objects.get(id=post_id)
+        self.assertEqual(post.likes_count, 1)
+        self.assertEqual(post.reviews_count, 0)
+
+        Post.objects.filter(id=post_id).update(
+            likes_count=10, bookmarks_count=0
+        )
+        call_command('reconcile_counters', stdout=StringIO())
+
+        post.refresh_from_db()
+        self.assertEqual(post.likes_count, 1)
+        self.assertEqual(post.bookmarks_count, 1)
+
+        self.client.delete(url + 'bookmark/')
+        response = self.client.delete(url + 'bookmark/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        post.refresh_from_db()
+        self.assertEqual(post.bookmarks_count, 0)
+
+    def test_posts_keyset_pagination(self):
+        """Posts Feed is Walked by Cursors in Both Directions."""
+
+        self.author.force_authenticate(user=self.author_user)
+        for _ in range(7):
+            self.author.post('/api/posts/', self.post_data, format='json')
+        expected = list(
+            Post.objects.order_by('-pub_date', '-id').values_list(
+                'id', flat=True
+            )
+        )
+
+        pages = []
+        url = '/api/posts/?limit=3'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.data)
+            pages.append([post['id'] for post in response.data['results']])
+            url = response.data['next']
+
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertEqual(sum(pages, []), expected)
+
+        response = self.client.get(response.data['previous'])
+        self.assertEqual(
+            [post['id'] for post in response.data['results']], pages[1]
+        )
+
+        response = self.client.get('/api/posts/?cursor=broken')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        for position in ([None, None], ['notadate', 'x'], [{'a': 1}, 2]):
+            cursor = urlsafe_b64encode(
+                json.dumps({'p': position}).encode()
+            ).decode()
+            for url in ('/api/posts/', '/api/bands/'):
+                response = self.client.get(f'{url}?cursor={cursor}')
+                self.assertEqual(
+                    response.status_code, status.HTTP_404_NOT_FOUND
+                )
+
+    def test_posts_viewer_flags(self):
+        """Viewer Flags are Rendered in a Constant Number of Queries."""
+
+        self.author.force_authenticate(user=self.author_user)
+        self.client.force_authenticate(user=self.client_user)
+        instrument = Instrument.objects.create(
+            title='Cello',
+            category=InstrumentCategory.objects.create(
+                title='Strings', slug='strings'
+            )
+        )
+        self.author_user.instruments.add(instrument)
+
+        response = self.author.post(
+            '/api/posts/', self.post_data, format='json'
+        )
+        liked_id = response.data.get('id')
+        self.client.post(f'/api/posts/{liked_id}/like/')
+        self.client.post(f'/api/posts/{liked_id}/bookmark/')
+
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/posts/')
+        posts = {post['id']: post for post in response.data['results']}
+        self.assertTrue(posts[liked_id]['is_liked'])
+        self.assertTrue(posts[liked_id]['is_bookmarked'])
+        self.assertFalse(posts[liked_id]['has_reviewed'])
+
+        for _ in range(5):
+            self.author.post('/api/posts/', self.post_data, format='json')
+
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/posts/')
+        self.assertEqual(len(response.data['results']), 6)
+        self.assertEqual(
+            sum(post['is_liked'] for post in response.data['results']), 1
+        )
+
+    def test_posts_search(self):
+        """Posts are Searched by Title and Text, Ranked and Filtered."""
+
+        other_tag = Tag.objects.create(
+            title='other tag', color='#654321', slug='other_slug'
+        )
+        in_text = Post.objects.create(
+            title='Weekend', text='Looking for a drummer',
+            author=self.author_user
+        )
+        in_title = Post.objects.create(
+            title='Drummer wanted', text='Rehearsals on fridays',
+            author=self.author_user
+        )
+        in_title.tags.add(other_tag)
+        Post.objects.create(title='Bass for sale', author=self.author_user)
+
+        response = self.client.get('/api/posts/?search=drummers')
+        self.assertEqual(
+            [post['id'] for post in response.data['results']],
+            [in_title.id, in_text.id]
+        )
+
+        response = self.client.get(
+            '/api/posts/?search=drummer&tag=other_slug'
+        )
+        self.assertEqual(
+            [post['id'] for post in response.data['results']], [in_title.id]
+        )
+
+        in_text.text = 'Looking for a singer'
+        in_text.save()
+        response = self.client.get('/api/posts/?search=drummer&limit=1')
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertIsNone(response.data['next'])
+
 
 class BandModelTests(APITestCase):
     """Post Model Testing."""
@@ -269,6 +437,302 @@ class BandModelTests(APITestCase):
 
         self.assertEqual(band.participants.count(), 2)
 
+    def test_bulk_invites(self):
+        """Inviting Many Users in a Fixed Number of Queries."""
+
+        band = Band.objects.create(
+            author=self.author_user, title='Band', description='test',
+            quantity=5
+        )
+        UserBandInstrument.objects.create(
+            user=self.author_user, band=band, instrument=self.instrument
+        )
+        users = [
+            User.objects.create_user(f'invitee{number}')
+            for number in range(20)
+        ]
+        Invite.objects.create(
+            author=self.author_user, user=users[0], band=band,
+            instrument=self.instrument
+        )
+        items = [
+            {'user': user.id, 'instrument': 'Violin'} for user in users
+        ] + [
+            {'user': self.author_user.id, 'instrument': 'Violin'},
+            {'user': self.client_user.id, 'instrument': 'Kazoo'},
+            {'user': users[1].id, 'instrument': 'Violin'},
+        ]
+        self.author.force_authenticate(user=self.author_user)
+
+        with self.assertNumQueries(8):
+            response = self.author.post(
+                '/api/invites/bulk/', items, format='json'
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        errors = [item.get('error') for item in response.data]
+        self.assertEqual(errors[1:20], [None] * 19)
+        self.assertEqual(errors[0], errors[22])
+        self.assertIn('already invited', errors[0])
+        self.assertEqual(errors[20], 'You cannot invite yourself')
+        self.assertEqual(errors[21], 'Fill instrument field correctly')
+        self.assertEqual(
+            response.data[1]['id'],
+            Invite.objects.get(author=self.author_user, user=users[1]).id
+        )
+        self.assertEqual(Invite.objects.filter(band=band).count(), 20)
+
+        response = self.author.post(
+            '/api/invites/bulk/', [{'user': 'x'}], format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_requests(self):
+        """Asking to Join Many Bands at Once."""
+
+        bands = []
+        for number in range(3):
+            leader = User.objects.create_user(f'leader{number}')
+            bands.append(Band.objects.create(
+                author=leader, title=f'Band {number}', description='test',
+                quantity=5
+            ))
+        self.client.force_authenticate(user=self.client_user)
+
+        response = self.client.post('/api/requests/bulk/', [
+            {'band': bands[0].id, 'instrument': 'Violin'},
+            {'band': bands[1].id, 'instrument': 'Violin'},
+            {'band': bands[1].id, 'instrument': 'Violin'},
+            {'band': 0, 'instrument': 'Violin'},
+        ], format='json')
+        self.assertEqual(
+            [item.get('error') for item in response.data],
+            [None, None, 'You have already send request into this band',
+             'There is no such band']
+        )
+        self.assertEqual(
+            Request.objects.filter(author=self.client_user).count(), 2
+        )
+
+    @override_settings(MEDIA_ROOT=(TEMP_MEDIA_ROOT))
+    def test_band_open_slots(self):
+        """Finding Bands by Needed Instrument and Filling Their Slots."""
+
+        Instrument.objects.create(
+            title='Drums', category=self.instrument_category
+        )
+        self.author.force_authenticate(user=self.author_user)
+        self.client.force_authenticate(user=self.client_user)
+
+        band_data = dict(self.band_data, needs=['Violin', 'Drums'])
+        response = self.author.post('/api/bands/', band_data, format='json')
+        band_id = response.data['id']
+        self.assertEqual(response.data['open_slots'], ['Violin', 'Drums'])
+
+        response = self.client.get('/api/bands/?needs=Drums')
+        self.assertEqual(
+            [band['id'] for band in response.data['results']], [band_id]
+        )
+
+        response = self.author.post(
+            f'/api/users/{self.client_user.id}/invite_user/',
+            {'instrument': 'Drums'}, format='json'
+        )
+        self.client.post(f'/api/invites/{response.data["id"]}/accept/')
+
+        response = self.client.get('/api/bands/?needs=Drums')
+        self.assertEqual(response.data['results'], [])
+        response = self.client.get(f'/api/bands/{band_id}/')
+        self.assertEqual(response.data['open_slots'], ['Violin'])
+
+        response = self.author.patch(
+            f'/api/bands/{band_id}/', {'needs': ['Drums']}, format='json'
+        )
+        self.assertEqual(response.data['open_slots'], ['Drums'])
+
+    def test_recommended_bands(self):
+        """Recommending Joinable Bands that Need the User's Instrument."""
+
+        get_features().reset()
+        drums = Instrument.objects.create(
+            title='Drums', category=self.instrument_category
+        )
+        self.client_user.instruments.add(drums)
+        bands = {}
+        for title, need, extra in (('Drums', drums, {}),
+                                   ('Violin', self.instrument, {}),
+                                   ('Hidden', drums, {'is_visible': False}),
+                                   ('Full', drums, {'is_full': True})):
+            bands[title] = Band.objects.create(
+                author=self.author_user, title=title, description='test',
+                quantity=5, **extra
+            )
+            BandSlot.objects.create(band=bands[title], instrument=need)
+        own = Band.objects.create(
+            author=self.client_user, title='Own', description='test',
+            quantity=5
+        )
+        BandSlot.objects.create(band=own, instrument=drums)
+
+        self.client.force_authenticate(user=self.client_user)
+        response = self.client.get('/api/bands/recommended/')
+        self.assertEqual(
+            [band['title'] for band in response.data], ['Drums', 'Violin']
+        )
+
+        slot = bands['Violin'].slots.get()
+        slot.instrument = drums
+        slot.save()
+        UserBandInstrument.objects.create(
+            user=self.author_user, band=bands['Drums'], instrument=drums
+        )
+        response = self.client.get('/api/bands/recommended/?limit=2')
+        self.assertEqual(
+            [band['title'] for band in response.data], ['Violin', 'Drums']
+        )
+        response = self.client.get('/api/bands/recommended/?limit=1')
+        self.assertEqual(len(response.data), 1)
+
+        bands['Violin'].delete()
+        response = self.client.get('/api/bands/recommended/?limit=1')
+        self.assertEqual(
+            [band['title'] for band in response.data], ['Drums']
+        )
+        self.assertNotIn(bands['Violin'].pk, get_features().rows)
+
+        response = self.client.get('/api/bands/recommended/?limit=x')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(MEDIA_ROOT=(TEMP_MEDIA_ROOT), MEDIA_WORKERS=0)
+    def test_poster_renditions(self):
+        """Poster Thumbnail and WebP Variant are Rendered on Upload."""
+
+        self.author.force_authenticate(user=self.author_user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.author.post(
+                '/api/bands/', self.band_data, format='json'
+            )
+        band_id = response.data.get('id')
+
+        response = self.client.get(f'/api/bands/{band_id}/')
+        renditions = response.data['poster_renditions']
+
+        self.assertEqual(set(renditions), {'thumb', 'full'})
+        self.assertTrue(renditions['thumb'].endswith('.thumb.webp'))
+        band = Band.objects.get(id=band_id)
+        self.assertEqual(set(band.poster_renditions), {'thumb', 'full'})
+        poster = band.poster
+        self.assertTrue(poster.storage.exists(
+            poster.name.rsplit('.', 1)[0] + '.thumb.webp'
+        ))
+
+    def test_bands_list_query_count(self):
+        """Listing Bands Costs the Same Number of Queries for Any Page."""
+
+        hidden = Band.objects.create(
+            author=self.client_user, title='Hidden', description='test',
+            quantity=5, is_visible=False
+        )
+        for number in range(6):
+            author = User.objects.create_user(
+                f'author{number}', f'a{number}@a.com', 'user1234'
+            )
+            band = Band.objects.create(
+                author=author, title=f'Band {number}', description='test',
+                quantity=5
+            )
+            for member in (author, self.client_user):
+                UserBandInstrument.objects.create(
+                    user=member, band=band, instrument=self.instrument
+                )
+
+        self.client.force_authenticate(user=self.client_user)
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/bands/?limit=7')
+        bands = response.data['results']
+
+        self.assertEqual(len(bands), 7)
+        self.assertIn(hidden.id, [band['id'] for band in bands])
+        self.assertEqual(
+            bands[0]['participants'][1],
+            {'id': self.client_user.id, 'username': 'user',
+             'first_name': '', 'last_name': '', 'instrument': 'Violin'}
+        )
+        self.assertEqual(bands[0]['author']['instrument'], 'Violin')
+
+        with self.assertNumQueries(3):
+            self.client.get('/api/bands/?limit=3')
+
+        self.author.force_authenticate(user=self.author_user)
+        response = self.author.get('/api/bands/?limit=7')
+        self.assertNotIn(
+            hidden.id, [band['id'] for band in response.data['results']]
+        )
+
+
+class UserModelTests(APITestCase):
+    """User Directory Testing."""
+
+    def setUp(self):
+        category = InstrumentCategory.objects.create(
+            title='Strings', slug='strings'
+        )
+        self.violin = Instrument.objects.create(
+            title='Violin', category=category
+        )
+        self.cello = Instrument.objects.create(
+            title='Cello', category=category
+        )
+        self.client_user = User.objects.create_user(
+            'user', 'user@user.com', 'user1234'
+        )
+        self.client.force_authenticate(user=self.client_user)
+
+    def test_users_list_query_count(self):
+        """Listing Users Costs the Same Number of Queries for Any Page."""
+
+        for number in range(6):
+            user = User.objects.create_user(
+                f'player{number}', f'p{number}@p.com', 'user1234'
+            )
+            user.instruments.add(self.violin, self.cello)
+
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/users/')
+        users = response.data['results']
+
+        self.assertEqual(len(users), 6)
+        self.assertCountEqual(users[0]['instruments'], ['Cello', 'Violin'])
+
+        with self.assertNumQueries(3):
+            self.client.get('/api/users/?page=2')
+
+    def test_users_filter_and_search(self):
+        """Users are Filtered by Instrument and Searched by Prefix."""
+
+        names = ('Alice', 'alfred', 'Bob', 'al_x', 'alx')
+        for name in names:
+            User.objects.create_user(name, f'{name}@a.com', 'user1234')
+        User.objects.get(username='Bob').instruments.add(self.cello)
+        User.objects.get(username='alfred').instruments.add(
+            self.violin, self.cello
+        )
+
+        def usernames(query):
+            response = self.client.get(f'/api/users/?{query}')
+            return [user['username'] for user in response.data['results']]
+
+        self.assertCountEqual(
+            usernames('instrument=Cello'), ['Bob', 'alfred']
+        )
+        self.assertEqual(usernames('instrument=Viola'), [])
+        self.assertCountEqual(
+            usernames('search=AL'), ['Alice', 'al_x', 'alfred', 'alx']
+        )
+        self.assertEqual(usernames('search=al_'), ['al_x'])
+        self.assertEqual(usernames('search=al&instrument=Cello'), ['alfred'])
+        self.assertEqual(usernames('search=zz'), [])
+
 
 class InstrumentTagModelTesting(APITestCase):
     """Testing for Instrument and Tag Model."""
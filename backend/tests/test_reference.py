@@ -0,0 +1,107 @@
+import gzip
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from api.models import ReferenceVersion
+from api.reference import VERSION_PK
+from info.models import Genre, Instrument, InstrumentCategory, Tag
+
+
+User = get_user_model()
+
+
+class ReferenceTests(APITestCase):
+    """Reference Data Bootstrap Testing."""
+
+    def setUp(self):
+        category = InstrumentCategory.objects.create(
+            title='Strings', slug='strings'
+        )
+        Instrument.objects.create(title='Violin', category=category)
+        Tag.objects.create(title='Rock', color='#000000', slug='rock')
+        Genre.objects.create(title='Jazz', color='#FFFFFF', slug='jazz')
+        self.admin = APIClient()
+        self.admin.force_authenticate(user=User.objects.create_superuser(
+            'admin', 'admin@admin.com', 'admin123'
+        ))
+
+    def test_reference_payload(self):
+        """Everything Comes in one Payload Rendered Once."""
+
+        response = self.client.get('/api/reference/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        payload = json.loads(response.content)
+        self.assertEqual(
+            [item['title'] for item in payload['instruments']], ['Violin']
+        )
+        self.assertEqual(payload['categories'][0]['slug'], 'strings')
+        self.assertEqual(payload['tags'][0]['slug'], 'rock')
+        self.assertEqual(payload['genres'][0]['title'], 'Jazz')
+
+        with self.assertNumQueries(0):
+            again = self.client.get('/api/reference/')
+        self.assertEqual(again.content, response.content)
+        self.assertEqual(again['ETag'], response['ETag'])
+
+        with self.assertNumQueries(0):
+            zipped = self.client.get(
+                '/api/reference/', HTTP_ACCEPT_ENCODING='gzip, br'
+            )
+        self.assertEqual(zipped['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(zipped.content), response.content)
+        self.assertNotEqual(zipped['ETag'], response['ETag'])
+
+        for refused in ('gzip;q=0', 'br, gzip; q=0.0', 'identity'):
+            plain = self.client.get(
+                '/api/reference/', HTTP_ACCEPT_ENCODING=refused
+            )
+            self.assertFalse(plain.has_header('Content-Encoding'))
+            self.assertEqual(plain.content, response.content)
+        zipped = self.client.get(
+            '/api/reference/', HTTP_ACCEPT_ENCODING='br;q=1, *;q=0.5'
+        )
+        self.assertEqual(zipped['Content-Encoding'], 'gzip')
+
+    def test_reference_revalidation(self):
+        """Unchanged Data Answers 304, Changes Give a New ETag."""
+
+        etag = self.client.get('/api/reference/')['ETag']
+        response = self.client.get(
+            '/api/reference/', HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response.content, b'')
+
+        self.admin.post(
+            '/api/tags/',
+            {'title': 'Pop', 'color': '#FFFFFF', 'slug': 'pop'},
+            format='json'
+        )
+        response = self.client.get('/api/reference/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(json.loads(response.content)['tags']), 2)
+        etag = response['ETag']
+
+        Genre.objects.get(slug='jazz').delete()
+        response = self.client.get('/api/reference/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(json.loads(response.content)['genres'], [])
+
+    @override_settings(REFERENCE_CHECK_INTERVAL=0)
+    def test_reference_changed_elsewhere(self):
+        """Versions Bumped by Other Processes are Picked up."""
+
+        etag = self.client.get('/api/reference/')['ETag']
+        Tag.objects.filter(slug='rock').update(title='Punk')
+        response = self.client.get('/api/reference/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        ReferenceVersion.objects.filter(pk=VERSION_PK).update(version='x')
+        response = self.client.get('/api/reference/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        tags = json.loads(response.content)['tags']
+        self.assertEqual(tags[0]['title'], 'Punk')
@@ -0,0 +1,116 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from info.models import (Band, Instrument, InstrumentCategory, Invite, Post,
+                         UserBandInstrument)
+from users.models import Follow, UserStats
+
+
+User = get_user_model()
+
+
+class UserStatsTests(APITestCase):
+    """Profile Counters Testing."""
+
+    def setUp(self):
+        category = InstrumentCategory.objects.create(
+            title='Strings', slug='strings'
+        )
+        self.instrument = Instrument.objects.create(
+            title='Violin', category=category
+        )
+        self.user = User.objects.create_user(
+            'user', 'user@user.com', 'user1234'
+        )
+        self.fan = User.objects.create_user('fan', 'fan@fan.com', 'user1234')
+        self.fan_client = APIClient()
+        self.fan_client.force_authenticate(user=self.fan)
+        self.client.force_authenticate(user=self.user)
+
+    def stats(self, user=None, client=None):
+        user = user or self.user
+        response = (client or self.client).get(f'/api/users/{user.id}/stats/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def fill(self):
+        posts = [
+            Post.objects.create(author=self.user, title=f'{number}', text='')
+            for number in range(3)
+        ]
+        self.fan_client.post(f'/api/posts/{posts[0].id}/like/')
+        self.fan_client.post(f'/api/posts/{posts[0].id}/like/')
+        posts[1].likes.add(self.fan, self.user)
+        self.fan.posts_liked.add(posts[2])
+        Follow.objects.create(user=self.fan, author=self.user)
+        Follow.objects.create(user=self.user, author=self.fan)
+
+        band = Band.objects.create(
+            author=self.fan, title='Band', description='test', quantity=5
+        )
+        UserBandInstrument.objects.create(
+            user=self.user, band=band, instrument=self.instrument
+        )
+        Invite.objects.create(
+            author=self.fan, user=self.user, band=band,
+            instrument=self.instrument
+        )
+        return posts
+
+    def test_stats_follow_activity(self):
+        """Counters Move with Posts, Likes, Follows and Bands."""
+
+        posts = self.fill()
+        with self.assertNumQueries(1):
+            stats = self.stats()
+        self.assertEqual(stats, {
+            'posts': 3, 'likes_received': 4, 'followers': 1,
+            'following': 1, 'bands': 1, 'pending_invites': 1,
+        })
+        self.assertNotIn('pending_invites', self.stats(client=self.fan_client))
+
+        self.fan_client.delete(f'/api/posts/{posts[0].id}/like/')
+        posts[1].likes.remove(self.fan, self.fan)
+        self.user.posts_liked.clear()
+        posts[2].delete()
+        Follow.objects.filter(user=self.fan).delete()
+        UserBandInstrument.objects.filter(user=self.user).delete()
+
+        self.assertEqual(self.stats(), {
+            'posts': 2, 'likes_received': 0, 'followers': 0,
+            'following': 1, 'bands': 0, 'pending_invites': 1,
+        })
+        self.assertEqual(self.stats(self.fan)['following'], 0)
+
+        for pk in ('0', 'abc'):
+            response = self.client.get(f'/api/users/{pk}/stats/')
+            self.assertEqual(
+                response.status_code, status.HTTP_404_NOT_FOUND
+            )
+
+    def test_rebuild_user_stats(self):
+        """Rebuilding Recounts Every User in Batches."""
+
+        self.fill()
+        expected = {self.user.id: self.stats(), self.fan.id: self.stats(
+            self.fan, self.fan_client
+        )}
+        UserStats.objects.update(posts=7, followers=0)
+        UserStats.objects.filter(user=self.fan).delete()
+
+        out = StringIO()
+        call_command('rebuild_user_stats', '--batch-size', '1', stdout=out)
+        self.assertIn('Rebuilt stats: 2', out.getvalue())
+        self.assertEqual(self.stats(), expected[self.user.id])
+        self.assertEqual(
+            self.stats(self.fan, self.fan_client), expected[self.fan.id]
+        )
+
+        UserStats.objects.filter(user=self.fan).delete()
+        self.assertEqual(
+            self.stats(self.fan, self.fan_client), expected[self.fan.id]
+        )
@@ -0,0 +1,97 @@
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from info.models import Post, Tag
+from info.renditions import rendition_name
+from utils.models import StoredFile
+from utils.storage import release
+
+from .test_fields import PNG, WAV, data_uri
+
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, MEDIA_WORKERS=0)
+class ContentAddressedStorageTests(APITestCase):
+    """Content Addressed Storage Testing."""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            'user', 'user@user.com', 'user1234'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.tag = Tag.objects.create(
+            title='test tag', color='#123456', slug='test_slug'
+        )
+
+    def create_post(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                '/api/posts/',
+                {'title': 'Demo', 'tags': [self.tag.id],
+                 'image': data_uri('data:image/png', PNG)},
+                format='json'
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return Post.objects.get(id=response.data['id'])
+
+    def test_identical_uploads_are_stored_once(self):
+        first = self.create_post()
+        second = self.create_post()
+
+        name = first.image.name
+        self.assertEqual(second.image.name, name)
+        self.assertRegex(name, r'^posts/images/(\w\w)/(\w\w)/\1\2\w{60}\.png$')
+        self.assertEqual(StoredFile.objects.get(name=name).references, 2)
+        thumb = rendition_name(name, 'thumb')
+        self.assertTrue(default_storage.exists(thumb))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertEqual(StoredFile.objects.get(name=name).references, 1)
+        self.assertTrue(default_storage.exists(name))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                f'/api/posts/{second.id}/',
+                {'audio': data_uri('data:audio/wav', WAV)},
+                format='json'
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(default_storage.exists(name))
+
+        second.refresh_from_db()
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(StoredFile.objects.filter(name=name).exists())
+        self.assertFalse(default_storage.exists(name))
+        self.assertFalse(default_storage.exists(thumb))
+        self.assertFalse(StoredFile.objects.exists())
+
+    def test_rolled_back_release_keeps_file(self):
+        name = self.create_post().image.name
+
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    release(name)
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertEqual(StoredFile.objects.get(name=name).references, 1)
+        self.assertTrue(default_storage.exists(name))
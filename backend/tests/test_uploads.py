@@ -0,0 +1,105 @@
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from info.models import Post, Tag, Upload
+
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+WAV = b'RIFF\x24\x00\x00\x00WAVEfmt ' + bytes(range(256)) * 40
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class UploadTests(APITestCase):
+    """Resumable Upload Testing."""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            'user', 'user@user.com', 'user1234'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.tag = Tag.objects.create(
+            title='test tag', color='#123456', slug='test_slug'
+        )
+
+    def send(self, upload_id, offset, chunk):
+        return self.client.generic(
+            'PATCH', f'/api/uploads/{upload_id}/', chunk,
+            content_type='application/offset+octet-stream',
+            HTTP_UPLOAD_OFFSET=str(offset)
+        )
+
+    def test_resumed_upload_is_attached_to_post(self):
+        response = self.client.post(
+            '/api/uploads/', {'size': len(WAV)}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        upload_id = response.data['id']
+        half = len(WAV) // 2
+
+        response = self.send(upload_id, 0, WAV[:half])
+        self.assertEqual(response.data['offset'], half)
+
+        response = self.send(upload_id, 0, WAV[:half])
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response['Upload-Offset'], str(half))
+
+        response = self.client.generic(
+            'PATCH', f'/api/uploads/{upload_id}/', WAV,
+            content_type='application/offset+octet-stream'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.send(upload_id, half, WAV)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.head(f'/api/uploads/{upload_id}/')
+        self.assertEqual(response['Upload-Offset'], str(half))
+
+        response = self.send(upload_id, half, WAV[half:])
+        self.assertTrue(response.data['is_complete'])
+
+        part_path = Upload.objects.get(id=upload_id).get_path()
+        response = self.client.post(
+            '/api/posts/',
+            {'title': 'Demo', 'tags': [self.tag.id],
+             'audio_upload': upload_id},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        post = Post.objects.get(id=response.data['id'])
+        self.assertTrue(post.audio.name.endswith('.wav'))
+        with post.audio.open('rb') as audio:
+            self.assertEqual(audio.read(), WAV)
+        self.assertFalse(os.path.exists(part_path))
+        self.assertFalse(Upload.objects.filter(id=upload_id).exists())
+
+    def test_incomplete_or_foreign_upload_is_rejected(self):
+        upload = Upload.objects.create(user=self.user, size=10)
+        other = User.objects.create_user('other', 'o@o.com', 'user1234')
+        foreign = Upload.objects.create(
+            user=other, size=10, offset=10, extension='wav', is_complete=True
+        )
+
+        for upload_id in (upload.id, foreign.id):
+            response = self.client.post(
+                '/api/posts/',
+                {'title': 'Demo', 'tags': [self.tag.id],
+                 'audio_upload': upload_id},
+                format='json'
+            )
+            self.assertEqual(
+                response.status_code, status.HTTP_400_BAD_REQUEST
+            )
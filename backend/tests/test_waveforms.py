@@ -0,0 +1,129 @@
+import base64
+import io
+import math
+import shutil
+import tempfile
+import wave
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from info.models import Tag
+from info.waveforms import analyze_audio
+
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def make_wav(seconds, sample_rate=8000, channels=2, width=2):
+    """Sine at half scale on the first channel, silence on the others."""
+
+    full_scale = 2 ** (8 * width - 1)
+    frames = bytearray()
+    for index in range(int(seconds * sample_rate)):
+        value = int(full_scale / 2 * math.sin(index / 10))
+        frames += value.to_bytes(width, 'little', signed=True)
+        frames += bytes(width * (channels - 1))
+
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as audio:
+        audio.setnchannels(channels)
+        audio.setsampwidth(width)
+        audio.setframerate(sample_rate)
+        audio.writeframes(bytes(frames))
+    return buffer.getvalue()
+
+
+def make_mp3(frames):
+    """MPEG-1 layer III, 128 kbit/s, 44.1 kHz frames without payload."""
+
+    frame = b'\xff\xfb\x90\x64'.ljust(417, b'\x00')
+    tag = b'ID3\x03\x00\x00\x00\x00\x00\x0a' + bytes(10)
+    return tag + frame * frames + b'TAG' + bytes(125)
+
+
+class WaveformTests(SimpleTestCase):
+    """Audio Analysis Testing."""
+
+    def analyze(self, content, points=100):
+        with tempfile.NamedTemporaryFile() as audio:
+            audio.write(content)
+            audio.flush()
+            return analyze_audio(audio.name, points)
+
+    def test_wav_peaks(self):
+        meta = self.analyze(make_wav(0.5, channels=1, width=3))
+        self.assertEqual(meta['duration'], 0.5)
+        self.assertEqual(meta['sample_rate'], 8000)
+        self.assertEqual(meta['channels'], 1)
+        self.assertEqual(len(meta['peaks']), 100)
+        self.assertAlmostEqual(max(meta['peaks']), 64, delta=1)
+
+    def test_mp3_duration(self):
+        meta = self.analyze(make_mp3(50))
+        self.assertAlmostEqual(meta['duration'], 50 * 1152 / 44100)
+        self.assertEqual(meta['sample_rate'], 44100)
+        self.assertEqual(meta['channels'], 2)
+        self.assertIsNone(meta['peaks'])
+
+    def test_unreadable_audio(self):
+        self.assertIsNone(self.analyze(b'RIFF\x24\x00\x00\x00WAVEfmt '))
+        self.assertIsNone(self.analyze(b'not audio at all'))
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, MEDIA_WORKERS=0)
+class AudioMetaTests(APITestCase):
+    """Stored Audio Metadata Testing."""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            'user', 'user@user.com', 'user1234'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.tag = Tag.objects.create(
+            title='test tag', color='#123456', slug='test_slug'
+        )
+
+    def create_post(self, seconds):
+        audio = base64.b64encode(make_wav(seconds)).decode('ascii')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                '/api/posts/',
+                {'title': 'Demo', 'tags': [self.tag.id],
+                 'audio': f'data:audio/wav;base64,{audio}'},
+                format='json'
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data['id']
+
+    def test_post_audio_meta(self):
+        short = self.create_post(1)
+        long = self.create_post(3)
+
+        response = self.client.get(f'/api/posts/{short}/')
+        meta = response.data['audio_meta']
+        self.assertEqual(meta['duration'], 1.0)
+        self.assertEqual(meta['sample_rate'], 8000)
+        self.assertEqual(meta['channels'], 2)
+        self.assertEqual(len(meta['peaks']), 1600)
+        self.assertAlmostEqual(max(meta['peaks']), 64, delta=1)
+
+        response = self.client.get('/api/posts/?min_duration=2')
+        self.assertEqual(
+            [post['id'] for post in response.data['results']], [long]
+        )
+        response = self.client.get('/api/posts/?max_duration=2')
+        self.assertEqual(
+            [post['id'] for post in response.data['results']], [short]
+        )
+        response = self.client.get('/api/posts/?max_duration=long')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
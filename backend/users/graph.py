@@ -0,0 +1,329 @@
+"""An in-memory snapshot of who follows whom and who plays what.
+
+Each relation is an ``Adjacency``: rows sorted by source in compressed
+sparse row form, a ``keys`` array searched with ``searchsorted`` and the
+targets of every row side by side in one ``indices`` array. Changes
+made since the arrays were built are kept aside as small sets and folded
+in once there are ``COMPACT_THRESHOLD`` of them.
+
+Changes made by this process reach the snapshot through signals. Rows
+other processes add are picked up by id on every sync, and the whole
+snapshot is rebuilt every ``FOLLOW_GRAPH_MAX_AGE`` seconds, which is
+also when deletions made elsewhere show up. A rebuild reads the database
+without holding the lock: requests keep using the old snapshot, and the
+changes signalled meanwhile are replayed on the new one before the swap.
+
+Deleted and inactive users are never suggested. Signals and rebuilds
+keep track of them, and users found missing elsewhere are reported with
+``hide_users()``.
+
+Suggestions walk the snapshot instead of joining ``Follow`` to itself:
+a user scores ``FRIEND_WEIGHT`` for every followed user following them
+and ``INSTRUMENT_WEIGHT`` for every instrument they share.
+"""
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+from .models import Follow
+
+
+User = get_user_model()
+
+FRIEND_WEIGHT = 1.0
+INSTRUMENT_WEIGHT = 0.5
+
+COMPACT_THRESHOLD = 10_000
+
+# Rows committed after a sync may have a lower id than rows it saw.
+SYNC_OVERLAP_ROWS = 50
+
+
+class Adjacency:
+    """Targets of every source of one relation."""
+
+    def __init__(self, sources=(), targets=()):
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+        order = np.lexsort((targets, sources))
+        sources, targets = sources[order], targets[order]
+        self.keys, starts = np.unique(sources, return_index=True)
+        self.indptr = np.append(starts, len(sources))
+        self.indices = targets
+        self.added = {}
+        self.removed = {}
+        self.changes = 0
+
+    def base(self, source):
+        row = np.searchsorted(self.keys, source)
+        if row == len(self.keys) or self.keys[row] != source:
+            return self.indices[:0]
+        return self.indices[self.indptr[row]:self.indptr[row + 1]]
+
+    def in_base(self, source, target):
+        targets = self.base(source)
+        position = np.searchsorted(targets, target)
+        return position < len(targets) and targets[position] == target
+
+    def add(self, source, target):
+        if target in self.added.get(source, ()):
+            return
+        if self.in_base(source, target):
+            if target not in self.removed.get(source, ()):
+                return
+            self.removed[source].discard(target)
+        else:
+            self.added.setdefault(source, set()).add(target)
+        self.changes += 1
+
+    def remove(self, source, target):
+        if target in self.added.get(source, ()):
+            self.added[source].discard(target)
+        elif self.in_base(source, target):
+            self.removed.setdefault(source, set()).add(target)
+        else:
+            return
+        self.changes += 1
+
+    def neighbours(self, source):
+        targets = self.base(source)
+        removed = self.removed.get(source)
+        if removed:
+            targets = targets[~np.isin(targets, list(removed))]
+        added = self.added.get(source)
+        if added:
+            targets = np.concatenate([
+                targets, np.fromiter(added, dtype=np.int64, count=len(added))
+            ])
+        return targets
+
+    def compacted(self):
+        """The same relation with every change folded into the arrays."""
+
+        sources = np.repeat(self.keys, np.diff(self.indptr))
+        keep = np.ones(len(sources), dtype=bool)
+        for source, targets in self.removed.items():
+            row = np.searchsorted(self.keys, source)
+            start, end = self.indptr[row], self.indptr[row + 1]
+            keep[start:end] &= ~np.isin(self.indices[start:end], list(targets))
+
+        added = [
+            (source, target)
+            for source, targets in self.added.items() for target in targets
+        ]
+        added = np.array(added, dtype=np.int64).reshape(-1, 2)
+        return Adjacency(
+            np.concatenate([sources[keep], added[:, 0]]),
+            np.concatenate([self.indices[keep], added[:, 1]])
+        )
+
+
+class FollowGraph:
+    """Follows and instruments of every user, kept in sync with the
+    database."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.rebuild_lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Forget the snapshot, the next sync rebuilds it."""
+
+        with self.lock:
+            self.following = Adjacency()
+            self.user_instruments = Adjacency()
+            self.instrument_users = Adjacency()
+            self.hidden = set()
+            self.follows_seen = 0
+            self.instruments_seen = 0
+            self.built = None
+            # Changes made while a rebuild reads the database.
+            self.journal = None
+
+    def stale(self):
+        return self.built is None or (
+            time.monotonic() - self.built > settings.FOLLOW_GRAPH_MAX_AGE
+        )
+
+    def sync(self):
+        # Only the first build makes requests wait, later ones are done
+        # by one request while the others use the old snapshot.
+        if self.stale() and self.rebuild_lock.acquire(
+                blocking=self.built is None):
+            try:
+                if self.stale():
+                    self.rebuild()
+                    return
+            finally:
+                self.rebuild_lock.release()
+        self.catch_up()
+
+    def rebuild(self):
+        started = time.monotonic()
+        with self.lock:
+            self.journal = []
+
+        follows = self.rows(Follow.objects, 'user_id', 'author_id')
+        following = Adjacency(follows[:, 1], follows[:, 2])
+        played = self.rows(
+            User.instruments.through.objects, 'user_id', 'instrument_id'
+        )
+        user_instruments = Adjacency(played[:, 1], played[:, 2])
+        instrument_users = Adjacency(played[:, 2], played[:, 1])
+        hidden = set(User.objects.filter(is_active=False).values_list(
+            'pk', flat=True
+        ))
+
+        with self.lock:
+            self.following = following
+            self.user_instruments = user_instruments
+            self.instrument_users = instrument_users
+            self.hidden = hidden
+            self.follows_seen = int(follows[:, 0].max(initial=0))
+            self.instruments_seen = int(played[:, 0].max(initial=0))
+            journal, self.journal = self.journal, None
+            for apply, args in journal or ():
+                apply(*args)
+            self.built = started
+
+    def catch_up(self):
+        with self.lock:
+            follows_seen = self.follows_seen
+            instruments_seen = self.instruments_seen
+
+        follows = self.rows(
+            Follow.objects.filter(pk__gt=follows_seen - SYNC_OVERLAP_ROWS),
+            'user_id', 'author_id'
+        )
+        played = self.rows(
+            User.instruments.through.objects.filter(
+                pk__gt=instruments_seen - SYNC_OVERLAP_ROWS
+            ), 'user_id', 'instrument_id'
+        )
+
+        with self.lock:
+            for _, user_id, author_id in follows.tolist():
+                self.following.add(user_id, author_id)
+            self.follows_seen = max(
+                self.follows_seen, int(follows[:, 0].max(initial=0))
+            )
+            for _, user_id, instrument_id in played.tolist():
+                self.user_instruments.add(user_id, instrument_id)
+                self.instrument_users.add(instrument_id, user_id)
+            self.instruments_seen = max(
+                self.instruments_seen, int(played[:, 0].max(initial=0))
+            )
+
+            for name in ('following', 'user_instruments', 'instrument_users'):
+                relation = getattr(self, name)
+                if relation.changes >= COMPACT_THRESHOLD:
+                    setattr(self, name, relation.compacted())
+
+    def rows(self, queryset, *fields):
+        rows = queryset.order_by().values_list('pk', *fields)
+        return np.array(list(rows), dtype=np.int64).reshape(-1, 3)
+
+    def change(self, apply, *args):
+        """Apply a change, and again on the snapshot being rebuilt."""
+
+        with self.lock:
+            apply(*args)
+            if self.journal is not None:
+                self.journal.append((apply, args))
+
+    def follow(self, user_id, author_id):
+        self.change(self.following_add, user_id, author_id)
+
+    def unfollow(self, user_id, author_id):
+        self.change(self.following_remove, user_id, author_id)
+
+    def play(self, user_id, instrument_id):
+        self.change(self.instruments_add, user_id, instrument_id)
+
+    def stop_playing(self, user_id, instrument_id):
+        self.change(self.instruments_remove, user_id, instrument_id)
+
+    def hide_users(self, user_ids):
+        """Never suggest ``user_ids``, deleted or inactive users."""
+
+        self.change(self.hidden_add, list(user_ids))
+
+    def show_user(self, user_id):
+        self.change(self.hidden_remove, user_id)
+
+    def following_add(self, user_id, author_id):
+        self.following.add(user_id, author_id)
+
+    def following_remove(self, user_id, author_id):
+        self.following.remove(user_id, author_id)
+
+    def instruments_add(self, user_id, instrument_id):
+        self.user_instruments.add(user_id, instrument_id)
+        self.instrument_users.add(instrument_id, user_id)
+
+    def instruments_remove(self, user_id, instrument_id):
+        self.user_instruments.remove(user_id, instrument_id)
+        self.instrument_users.remove(instrument_id, user_id)
+
+    def hidden_add(self, user_ids):
+        self.hidden.update(user_ids)
+
+    def hidden_remove(self, user_id):
+        self.hidden.discard(user_id)
+
+    def suggestions(self, user_id):
+        """Ids and scores of users worth following, unordered."""
+
+        with self.lock:
+            following = self.following.neighbours(user_id)
+            friends = [self.following.neighbours(pk) for pk in following]
+            players = [
+                self.instrument_users.neighbours(pk)
+                for pk in self.user_instruments.neighbours(user_id)
+            ]
+            hidden = list(self.hidden)
+
+        empty = np.empty(0, dtype=np.int64)
+        candidates = np.concatenate([empty, *friends, *players])
+        weights = np.concatenate([
+            np.empty(0),
+            np.full(sum(map(len, friends)), FRIEND_WEIGHT),
+            np.full(sum(map(len, players)), INSTRUMENT_WEIGHT),
+        ])
+        user_ids, inverse = np.unique(candidates, return_inverse=True)
+        scores = np.bincount(
+            inverse, weights=weights, minlength=len(user_ids)
+        )
+        known = np.isin(user_ids, following) | (user_ids == user_id)
+        known |= np.isin(user_ids, np.array(hidden, dtype=np.int64))
+        return user_ids[~known], scores[~known]
+
+
+_graph = FollowGraph()
+
+
+def get_graph():
+    return _graph
+
+
+def suggest_users(user, limit):
+    """Ids of the ``limit`` users ``user`` is most likely to follow,
+    best first.
+
+    Users deleted or deactivated by other processes may still be among
+    them until they are reported with ``hide_users()``.
+    """
+
+    graph = get_graph()
+    graph.sync()
+    user_ids, scores = graph.suggestions(user.id)
+
+    if len(user_ids) > limit:
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        user_ids, scores = user_ids[top], scores[top]
+    order = np.lexsort((user_ids, -scores))
+    return user_ids[order].tolist()
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from users.stats import REBUILD_BATCH_SIZE, rebuild_stats
+
+
+class Command(BaseCommand):
+    """Recounting the profile counters of users."""
+
+    help = 'Recount UserStats rows from posts, likes, follows and bands.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', type=int, action='append', dest='users',
+            help='Only rebuild the stats of this user id.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=REBUILD_BATCH_SIZE,
+            help='Number of users recounted per transaction.'
+        )
+
+    def handle(self, **options):
+        rebuilt = rebuild_stats(
+            user_ids=options['users'], batch_size=options['batch_size']
+        )
+        self.stdout.write(f'Rebuilt stats: {rebuilt}')
+        self.stdout.write(self.style.SUCCESS('SUCCESS'))
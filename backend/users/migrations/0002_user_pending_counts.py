@@ -0,0 +1,23 @@
+# Generated by Django 4.1.3 on 2026-10-18 08:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='pending_invites',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='pending invites'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='pending_requests',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='pending requests'),
+        ),
+    ]
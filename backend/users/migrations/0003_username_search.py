@@ -0,0 +1,24 @@
+from django.db import migrations
+
+
+def install(apps, schema_editor):
+    from users.search import install_search
+
+    install_search(schema_editor.connection)
+
+
+def uninstall(apps, schema_editor):
+    from users.search import uninstall_search
+
+    uninstall_search(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_user_pending_counts'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
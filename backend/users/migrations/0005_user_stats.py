@@ -0,0 +1,62 @@
+# Generated by Django 4.1.3 on 2026-10-18 08:25
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_user_stats(apps, schema_editor):
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    UserStats = apps.get_model('users', 'UserStats')
+    Follow = apps.get_model('users', 'Follow')
+    Post = apps.get_model('info', 'Post')
+    UserBandInstrument = apps.get_model('info', 'UserBandInstrument')
+
+    def counted(queryset, field):
+        return Coalesce(Subquery(
+            queryset.filter(**{field: OuterRef('user_id')}).order_by().values(
+                field
+            ).annotate(total=Count('*')).values('total'),
+            output_field=IntegerField()
+        ), 0)
+
+    UserStats.objects.bulk_create(
+        UserStats(user_id=pk)
+        for pk in User.objects.values_list('pk', flat=True)
+    )
+    UserStats.objects.update(
+        posts=counted(Post.objects, 'author'),
+        likes_received=counted(Post.likes.through.objects, 'post__author'),
+        followers=counted(Follow.objects, 'author'),
+        following=counted(Follow.objects, 'user'),
+        bands=counted(UserBandInstrument.objects, 'user'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('info', '0018_inbox'),
+        ('users', '0004_follow_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='user')),
+                ('posts', models.PositiveIntegerField(default=0, verbose_name='posts')),
+                ('likes_received', models.PositiveIntegerField(default=0, verbose_name='likes received')),
+                ('followers', models.PositiveIntegerField(default=0, verbose_name='followers')),
+                ('following', models.PositiveIntegerField(default=0, verbose_name='following')),
+                ('bands', models.PositiveIntegerField(default=0, verbose_name='bands')),
+            ],
+            options={
+                'verbose_name': 'User Stats',
+                'verbose_name_plural': 'User Stats',
+            },
+        ),
+        migrations.RunPython(fill_user_stats, migrations.RunPython.noop),
+    ]
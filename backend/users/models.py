@@ -12,6 +12,12 @@ class User(AbstractUser):
         related_name='users',
         verbose_name='instruments'
     )
+    pending_invites = models.PositiveIntegerField(
+        verbose_name='pending invites', default=0, editable=False
+    )
+    pending_requests = models.PositiveIntegerField(
+        verbose_name='pending requests', default=0, editable=False
+    )
 
     class Meta:
         ordering = ['username']
@@ -39,6 +45,41 @@ class Follow(models.Model):
                 name='unique_follow'
             )
         ]
+        indexes = [
+            models.Index(
+                fields=['author', '-id'], name='follow_followers_idx'
+            ),
+            models.Index(
+                fields=['user', '-id'], name='follow_following_idx'
+            ),
+        ]
 
     def __str__(self):
         return f'{self.user.username} - {self.author.username}'
+
+
+class UserStats(models.Model):
+    """Profile Counters of a User Model."""
+
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True,
+        related_name='stats', verbose_name='user'
+    )
+    posts = models.PositiveIntegerField(verbose_name='posts', default=0)
+    likes_received = models.PositiveIntegerField(
+        verbose_name='likes received', default=0
+    )
+    followers = models.PositiveIntegerField(
+        verbose_name='followers', default=0
+    )
+    following = models.PositiveIntegerField(
+        verbose_name='following', default=0
+    )
+    bands = models.PositiveIntegerField(verbose_name='bands', default=0)
+
+    class Meta:
+        verbose_name = 'User Stats'
+        verbose_name_plural = 'User Stats'
+
+    def __str__(self):
+        return f'{self.user_id} stats'
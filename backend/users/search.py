@@ -0,0 +1,91 @@
+"""Username prefix search for the user directory.
+
+PostgreSQL answers ``LIKE 'prefix%'`` on ``lower(username)`` from a
+trigram GIN index, which unlike a btree does not depend on the database
+collation. SQLite compares with ``BINARY`` collation, so there a plain
+index on ``lower(username)`` serves the prefix as a range scan; its
+``lower()`` only folds ASCII letters.
+"""
+from django.db import connections
+from django.db.models.functions import Lower
+
+
+POSTGRESQL_SETUP = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    """
+    CREATE INDEX IF NOT EXISTS user_username_trgm_idx
+    ON users_user USING gin (lower(username) gin_trgm_ops)
+    """,
+]
+
+POSTGRESQL_TEARDOWN = [
+    'DROP INDEX IF EXISTS user_username_trgm_idx',
+]
+
+SQLITE_SETUP = [
+    """
+    CREATE INDEX IF NOT EXISTS user_username_lower_idx
+    ON users_user (lower(username))
+    """,
+]
+
+SQLITE_TEARDOWN = [
+    'DROP INDEX IF EXISTS user_username_lower_idx',
+]
+
+
+def install_search(connection):
+    statements = {
+        'postgresql': POSTGRESQL_SETUP,
+        'sqlite': SQLITE_SETUP,
+    }.get(connection.vendor, [])
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def reinstall_search(sender, using, **kwargs):
+    """``post_migrate`` receiver restoring the SQLite index lost whenever
+    a migration rebuilds ``users_user``."""
+
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    if 'users_user' in connection.introspection.table_names():
+        install_search(connection)
+
+
+def uninstall_search(connection):
+    statements = {
+        'postgresql': POSTGRESQL_TEARDOWN,
+        'sqlite': SQLITE_TEARDOWN,
+    }.get(connection.vendor, [])
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def prefix_end(prefix):
+    """The smallest string greater than every string starting with
+    ``prefix``, or ``None`` when there is none."""
+
+    while prefix and prefix[-1] == chr(0x10FFFF):
+        prefix = prefix[:-1]
+    if not prefix:
+        return None
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def search_users(queryset, prefix):
+    """Users whose username starts with ``prefix``, ignoring case."""
+
+    prefix = prefix.lower()
+    queryset = queryset.alias(username_lower=Lower('username'))
+
+    if connections[queryset.db].vendor == 'sqlite':
+        queryset = queryset.filter(username_lower__gte=prefix)
+        end = prefix_end(prefix)
+        if end is not None:
+            queryset = queryset.filter(username_lower__lt=end)
+        return queryset
+    return queryset.filter(username_lower__startswith=prefix)
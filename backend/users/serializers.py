@@ -1,22 +1,17 @@
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from rest_framework import serializers
 
+from info.inbox import create_pending
 from info.models import Instrument, UserBandInstrument, Invite, Band
+from info.timeline import follow_author
 
+from .models import Follow, UserStats
 
-User = get_user_model()
-
-
-class UserInstrumentSerializer(serializers.ModelSerializer):
-    """User Serializer."""
-    instrument = serializers.SerializerMethodField()
 
-    class Meta:
-        model = User
-        fields = ('id', 'username', 'first_name', 'last_name', 'instrument')
+User = get_user_model()
 
-    def get_instrument(self, obj):
-        return UserBandInstrument.objects.get(user=obj).instrument.title
+BULK_LIMIT = 100
 
 
 class InstrumentUserSerializer(serializers.ModelSerializer):
@@ -50,6 +45,50 @@ class UserListSerializer(serializers.ModelSerializer):
         return user
 
 
+class FollowSerializer(serializers.ModelSerializer):
+    """Follow Serializer."""
+
+    class Meta:
+        model = Follow
+        fields = ('id', 'user', 'author')
+
+    def validate(self, attrs):
+        if attrs['user'] == attrs['author']:
+            raise serializers.ValidationError('You cannot follow yourself')
+        if Follow.objects.filter(**attrs).exists():
+            raise serializers.ValidationError(
+                'You already follow this user'
+            )
+        return attrs
+
+    def create(self, validated_data):
+        follow = super().create(validated_data)
+        transaction.on_commit(
+            lambda: follow_author(follow.user_id, follow.author_id)
+        )
+        return follow
+
+
+class UserStatsSerializer(serializers.ModelSerializer):
+    """Profile Counters Serializer, pending invites are only shown to
+    the user themselves."""
+
+    pending_invites = serializers.IntegerField(source='user.pending_invites')
+
+    class Meta:
+        model = UserStats
+        fields = (
+            'posts', 'likes_received', 'followers', 'following', 'bands',
+            'pending_invites'
+        )
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        if self.context['request'].user.id != instance.user_id:
+            del data['pending_invites']
+        return data
+
+
 class InviteSerializer(serializers.ModelSerializer):
     """Invite Serializer."""
     band = serializers.StringRelatedField()
@@ -90,3 +129,69 @@ class InviteSerializer(serializers.ModelSerializer):
             )
 
         return attrs
+
+
+class BulkInviteListSerializer(serializers.ListSerializer):
+    """Inviting many users at once with a fixed number of queries."""
+
+    def create(self, validated_data):
+        author = self.context['request'].user
+        band = Band.objects.filter(author=author).first()
+        if band is None:
+            raise serializers.ValidationError('You dont own your band')
+
+        user_ids = {item['user'] for item in validated_data}
+        instruments = Instrument.objects.in_bulk(
+            {item['instrument'] for item in validated_data},
+            field_name='title'
+        )
+        users = set(User.objects.filter(pk__in=user_ids).values_list(
+            'pk', flat=True
+        ))
+        invited = set(Invite.objects.filter(
+            author=author, user__in=user_ids
+        ).values_list('user_id', flat=True))
+        members = set(UserBandInstrument.objects.filter(
+            band=band, user__in=user_ids
+        ).values_list('user_id', flat=True))
+
+        results = []
+        invites = []
+        for item in validated_data:
+            user = item['user']
+            result = dict(item)
+            if user not in users:
+                result['error'] = 'There is no such user'
+            elif user == author.pk:
+                result['error'] = 'You cannot invite yourself'
+            elif item['instrument'] not in instruments:
+                result['error'] = 'Fill instrument field correctly'
+            elif user in invited:
+                result['error'] = (
+                    'You have already invited this user into your band'
+                )
+            elif user in members:
+                result['error'] = 'This user is already in your band'
+            else:
+                invited.add(user)
+                invites.append(Invite(
+                    author=author, user_id=user, band=band,
+                    instrument=instruments[item['instrument']]
+                ))
+            results.append(result)
+
+        ids = create_pending(Invite, invites, 'user_id')
+        for result in results:
+            if 'error' not in result:
+                result['id'] = ids.get(result['user'])
+        return results
+
+
+class BulkInviteSerializer(serializers.Serializer):
+    """One ``(user, instrument)`` pair of a bulk invite."""
+
+    user = serializers.IntegerField()
+    instrument = serializers.CharField()
+
+    class Meta:
+        list_serializer_class = BulkInviteListSerializer
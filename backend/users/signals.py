@@ -0,0 +1,131 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_save, pre_delete
+)
+from django.dispatch import receiver
+
+from info.models import Post, UserBandInstrument
+
+from .graph import get_graph
+from .models import Follow, UserStats
+from .stats import change_stats
+
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Follow)
+def graph_follow(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(lambda: get_graph().follow(
+            instance.user_id, instance.author_id
+        ))
+
+
+@receiver(post_delete, sender=Follow)
+def graph_unfollow(sender, instance, **kwargs):
+    transaction.on_commit(lambda: get_graph().unfollow(
+        instance.user_id, instance.author_id
+    ))
+
+
+@receiver(m2m_changed, sender=User.instruments.through)
+def graph_instruments(sender, instance, action, reverse, pk_set, **kwargs):
+    graph = get_graph()
+    if action == 'post_clear':
+        # What was cleared is gone already, have the graph rebuilt.
+        transaction.on_commit(graph.reset)
+        return
+    if action not in ('post_add', 'post_remove'):
+        return
+
+    if reverse:
+        pairs = [(user_id, instance.pk) for user_id in pk_set]
+    else:
+        pairs = [(instance.pk, instrument_id) for instrument_id in pk_set]
+    change = graph.play if action == 'post_add' else graph.stop_playing
+
+    def apply():
+        for user_id, instrument_id in pairs:
+            change(user_id, instrument_id)
+
+    transaction.on_commit(apply)
+
+
+@receiver(post_save, sender=User)
+def graph_user_saved(sender, instance, created, **kwargs):
+    if created:
+        return
+    graph = get_graph()
+    if instance.is_active:
+        transaction.on_commit(lambda: graph.show_user(instance.pk))
+    else:
+        transaction.on_commit(lambda: graph.hide_users([instance.pk]))
+
+
+@receiver(post_delete, sender=User)
+def graph_user_deleted(sender, instance, **kwargs):
+    # Rows of the through table go without signals.
+    pk = instance.pk
+    transaction.on_commit(lambda: get_graph().hide_users([pk]))
+
+
+@receiver(post_save, sender=User)
+def create_stats(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        UserStats.objects.create(user=instance)
+
+
+@receiver(post_save, sender=Post)
+def count_post(sender, instance, created, **kwargs):
+    if created:
+        change_stats('posts', [instance.author_id])
+
+
+@receiver(pre_delete, sender=Post)
+def uncount_post(sender, instance, **kwargs):
+    change_stats('posts', [instance.author_id], -1)
+    # Its likes go with it, without signals.
+    change_stats(
+        'likes_received', [instance.author_id], -instance.likes.count()
+    )
+
+
+@receiver(m2m_changed, sender=Post.likes.through)
+def count_likes(sender, instance, action, reverse, pk_set, **kwargs):
+    delta = {'post_add': 1, 'pre_remove': -1, 'pre_clear': -1}.get(action)
+    if delta is None:
+        return
+    owner, other = ('user', 'post_id') if reverse else ('post', 'user_id')
+    likes = sender.objects.filter(**{owner: instance})
+    if pk_set is not None:
+        likes = likes.filter(**{f'{other}__in': pk_set})
+    change_stats(
+        'likes_received',
+        likes.values_list('post__author_id', flat=True), delta
+    )
+
+
+@receiver(post_save, sender=Follow)
+def count_follow(sender, instance, created, **kwargs):
+    if created:
+        change_stats('followers', [instance.author_id])
+        change_stats('following', [instance.user_id])
+
+
+@receiver(post_delete, sender=Follow)
+def uncount_follow(sender, instance, **kwargs):
+    change_stats('followers', [instance.author_id], -1)
+    change_stats('following', [instance.user_id], -1)
+
+
+@receiver(post_save, sender=UserBandInstrument)
+def count_band(sender, instance, created, **kwargs):
+    if created:
+        change_stats('bands', [instance.user_id])
+
+
+@receiver(post_delete, sender=UserBandInstrument)
+def uncount_band(sender, instance, **kwargs):
+    change_stats('bands', [instance.user_id], -1)
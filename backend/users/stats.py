@@ -0,0 +1,86 @@
+"""Profile counters of every user, kept in one ``UserStats`` row.
+
+Signals shift the counters as posts, likes, follows and band rosters
+change. Likes written through the ``likes`` table directly, as the like
+endpoint does, skip the signals and call ``change_stats`` themselves.
+Rows deleted in bulk, such as the likes of a deleted user, are only
+accounted for by ``rebuild_stats``, which recounts users from the
+source tables one batch of primary keys at a time.
+"""
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from info.models import Post, UserBandInstrument
+
+from .models import Follow, UserStats
+
+
+User = get_user_model()
+
+REBUILD_BATCH_SIZE = 1000
+
+
+def change_stats(field, user_ids, delta=1):
+    """Shift ``field`` of every user in ``user_ids`` by ``delta`` per
+    occurrence."""
+
+    by_change = {}
+    for user_id, times in Counter(user_ids).items():
+        by_change.setdefault(delta * times, []).append(user_id)
+    for change, users in by_change.items():
+        UserStats.objects.filter(user_id__in=users).update(
+            **{field: Greatest(F(field) + change, 0)}
+        )
+
+
+def counted(queryset, field):
+    """Correlated ``COUNT(*)`` of ``queryset`` rows whose ``field`` is
+    the user being updated."""
+
+    return Coalesce(Subquery(
+        queryset.filter(**{field: OuterRef('user_id')}).order_by().values(
+            field
+        ).annotate(total=Count('*')).values('total'),
+        output_field=IntegerField()
+    ), 0)
+
+
+def recount(stats):
+    stats.update(
+        posts=counted(Post.objects, 'author'),
+        likes_received=counted(Post.likes.through.objects, 'post__author'),
+        followers=counted(Follow.objects, 'author'),
+        following=counted(Follow.objects, 'user'),
+        bands=counted(UserBandInstrument.objects, 'user'),
+    )
+
+
+def rebuild_stats(user_ids=None, batch_size=REBUILD_BATCH_SIZE):
+    """Recount the stats of ``user_ids``, or of every user, returning
+    how many rows were rebuilt."""
+
+    users = User.objects.order_by('pk')
+    if user_ids is not None:
+        users = users.filter(pk__in=user_ids)
+
+    rebuilt = 0
+    last = None
+    while True:
+        batch = users if last is None else users.filter(pk__gt=last)
+        batch = list(batch.values_list('pk', flat=True)[:batch_size])
+        if not batch:
+            return rebuilt
+        with transaction.atomic():
+            UserStats.objects.bulk_create(
+                [UserStats(user_id=pk) for pk in batch],
+                ignore_conflicts=True
+            )
+            recount(UserStats.objects.filter(
+                user_id__gte=batch[0], user_id__lte=batch[-1]
+            ))
+        rebuilt += len(batch)
+        last = batch[-1]
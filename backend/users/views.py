@@ -1,29 +1,60 @@
 from django.contrib.auth import get_user_model
-from django.core.exceptions import ValidationError
-from django.shortcuts import get_object_or_404
+from django.db import transaction
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.generics import get_object_or_404
+from rest_framework.exceptions import ParseError, ValidationError
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
 
 from api.permissions import IsAuthorOrReadOnly
-from info.models import Invite, Band, UserBandInstrument
+from info.membership import MembershipError, join_band
+from info.models import Invite
+from info.timeline import unfollow_author
+from utils.pagination import FollowPagination
 
-from .serializers import UserListSerializer, InviteSerializer
+from .graph import get_graph, suggest_users
+from .models import Follow, UserStats
+from .serializers import (BULK_LIMIT, BulkInviteSerializer, FollowSerializer,
+                          InviteSerializer, UserListSerializer,
+                          UserStatsSerializer)
+from .search import search_users
+from .stats import rebuild_stats
 
 
 User = get_user_model()
 
+SUGGESTIONS_LIMIT = 10
+SUGGESTIONS_MAX_LIMIT = 50
+
 
 class UserViewSet(viewsets.ModelViewSet):
-    queryset = User.objects.all()
     serializer_class = UserListSerializer
+    permission_classes = (IsAuthenticated,)
+
+    def get_queryset(self):
+        queryset = User.objects.prefetch_related('instruments')
+        if self.action != 'list':
+            return queryset
+
+        instrument = self.request.query_params.get('instrument')
+        if instrument:
+            queryset = queryset.filter(
+                pk__in=User.instruments.through.objects.filter(
+                    instrument__title=instrument
+                ).values('user')
+            )
+
+        search = self.request.query_params.get('search', '').strip()
+        if search:
+            queryset = search_users(queryset, search)
+        return queryset
 
     def get_permissions(self):
-        if self.request.method == 'POST':
+        if self.action == 'create':
             return (AllowAny(),)
 
-        return (IsAuthenticated(),)
+        return super().get_permissions()
 
     @action(
         methods=['POST', 'DELETE'],
@@ -46,6 +77,105 @@ class UserViewSet(viewsets.ModelViewSet):
 
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    @action(
+        methods=['POST', 'DELETE'],
+        detail=True,
+        permission_classes=[IsAuthenticated]
+    )
+    def follow(self, request, pk):
+        """Following a user, their posts join your home timeline."""
+
+        author = get_object_or_404(User, id=pk)
+        if request.method == 'POST':
+            data = {'user': request.user.id, 'author': author.id}
+            serializer = FollowSerializer(data=data)
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+        deleted, _ = Follow.objects.filter(
+            user=request.user, author=author
+        ).delete()
+        if not deleted:
+            raise ValidationError('You do not follow this user')
+        transaction.on_commit(
+            lambda: unfollow_author(request.user.id, author.id)
+        )
+
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    def paginate_follows(self, follows, field):
+        paginator = FollowPagination()
+        page = paginator.paginate_queryset(
+            follows.select_related(field).prefetch_related(
+                f'{field}__instruments'
+            ), self.request, view=self
+        )
+        serializer = self.get_serializer(
+            [getattr(follow, field) for follow in page], many=True
+        )
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(detail=True, permission_classes=[IsAuthenticated])
+    def followers(self, request, pk):
+        """Users following this user, most recent first."""
+
+        user = get_object_or_404(User, id=pk)
+        return self.paginate_follows(
+            Follow.objects.filter(author=user), 'user'
+        )
+
+    @action(detail=True, permission_classes=[IsAuthenticated])
+    def following(self, request, pk):
+        """Users this user follows, most recent first."""
+
+        user = get_object_or_404(User, id=pk)
+        return self.paginate_follows(
+            Follow.objects.filter(user=user), 'author'
+        )
+
+    @action(detail=True, permission_classes=[IsAuthenticated])
+    def stats(self, request, pk):
+        """Profile counters of the user."""
+
+        user = get_object_or_404(User.objects.select_related('stats'), pk=pk)
+        try:
+            instance = user.stats
+        except UserStats.DoesNotExist:
+            # Users created in bulk have no row until one is rebuilt.
+            rebuild_stats([user.pk])
+            instance = UserStats.objects.select_related('user').get(user=user)
+        serializer = UserStatsSerializer(
+            instance, context=self.get_serializer_context()
+        )
+        return Response(serializer.data)
+
+    @action(detail=False, permission_classes=[IsAuthenticated])
+    def suggestions(self, request):
+        """Users you may want to follow, best match first."""
+
+        try:
+            limit = int(request.query_params.get('limit', SUGGESTIONS_LIMIT))
+        except ValueError:
+            raise ParseError('limit must be a whole number')
+        limit = min(max(limit, 1), SUGGESTIONS_MAX_LIMIT)
+
+        queryset = User.objects.filter(is_active=True).prefetch_related(
+            'instruments'
+        )
+        while True:
+            ids = suggest_users(request.user, limit)
+            users = queryset.in_bulk(ids)
+            missing = [pk for pk in ids if pk not in users]
+            if not missing:
+                break
+            # Gone in another process: keep them out and top up.
+            get_graph().hide_users(missing)
+        users = [users[pk] for pk in ids]
+        serializer = self.get_serializer(users, many=True)
+        return Response(serializer.data)
+
 
 class InviteViewSet(viewsets.ModelViewSet):
     serializer_class = InviteSerializer
@@ -54,6 +184,21 @@ class InviteViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         return Invite.objects.filter(user=self.request.user)
 
+    @action(
+        methods=['POST'],
+        detail=False,
+        permission_classes=[IsAuthenticated]
+    )
+    def bulk(self, request):
+        """Inviting many users, each item succeeding on its own."""
+
+        serializer = BulkInviteSerializer(
+            data=request.data, many=True, max_length=BULK_LIMIT,
+            context={'request': request}
+        )
+        serializer.is_valid(raise_exception=True)
+        return Response(serializer.save())
+
     @action(
         methods=['POST'],
         detail=True,
@@ -62,9 +207,6 @@ class InviteViewSet(viewsets.ModelViewSet):
     def accept(self, request, pk):
         """Accepting your invites."""
 
-        if UserBandInstrument.objects.filter(user=request.user).exists():
-            raise ValidationError("ARE YOU FKING MAD? YOU ALREADY HAVE A BAND")
-
         try:
             invite = Invite.objects.get(id=pk)
         except Invite.DoesNotExist:
@@ -73,13 +215,11 @@ class InviteViewSet(viewsets.ModelViewSet):
         if invite.user != request.user:
             raise ValidationError('hey, its not yours')
 
-        band = Band.objects.get(author=invite.author)
-        band.participants.add(request.user)
-        UserBandInstrument.objects.create(
-            user=request.user,
-            instrument=invite.instrument,
-            band=band
-        )
-        invite.delete()
+        with transaction.atomic():
+            try:
+                join_band(invite.band, request.user, invite.instrument)
+            except MembershipError as error:
+                raise ValidationError(str(error))
+            invite.delete()
 
         return Response(status=status.HTTP_204_NO_CONTENT)
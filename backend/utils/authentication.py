@@ -0,0 +1,190 @@
+"""Token authentication that remembers which user a token belongs to.
+
+DRF's ``TokenAuthentication`` looks the token and its user up on every
+request. ``CachedTokenAuthentication`` keeps what that lookup found for
+``TOKEN_CACHE_TTL`` seconds in a store chosen by the ``TOKEN_CACHE``
+setting: ``MemoryTokenCache`` is a per-process LRU of at most
+``TOKEN_CACHE_SIZE`` tokens, ``DjangoTokenCache`` shares entries through
+the ``TOKEN_CACHE_ALIAS`` cache.
+
+Signals forget a token when it is deleted, as on logout, and when its
+user is saved with a new password or active flag, as on deactivation.
+Writes that skip signals, such as ``QuerySet.update()``, are only
+picked up once the entry expires.
+Password hashes are never cached; reading one loads it from the
+database.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.module_loading import import_string
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+
+User = get_user_model()
+
+
+class BaseTokenCache:
+    """Interface every token cache implements."""
+
+    def get(self, key):
+        """The entry cached for ``key``, or ``None``."""
+        raise NotImplementedError
+
+    def set(self, key, entry, stamp=None):
+        """Cache ``entry`` unless ``key`` was forgotten since ``stamp``."""
+        raise NotImplementedError
+
+    def delete(self, keys):
+        raise NotImplementedError
+
+    def stamp(self):
+        """A marker taken before reading what will be cached."""
+        return None
+
+
+class MemoryTokenCache(BaseTokenCache):
+    """A least recently used cache private to this process."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.deletions = 0
+
+    def get(self, key):
+        with self.lock:
+            cached = self.entries.get(key)
+            if cached is None:
+                return None
+            expires, entry = cached
+            if expires < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry, stamp=None):
+        expires = time.monotonic() + settings.TOKEN_CACHE_TTL
+        with self.lock:
+            # A deletion while the entry was read may have made it stale.
+            if stamp is not None and stamp != self.deletions:
+                return
+            self.entries[key] = (expires, entry)
+            self.entries.move_to_end(key)
+            while len(self.entries) > settings.TOKEN_CACHE_SIZE:
+                self.entries.popitem(last=False)
+
+    def delete(self, keys):
+        with self.lock:
+            self.deletions += 1
+            for key in keys:
+                self.entries.pop(key, None)
+
+    def stamp(self):
+        with self.lock:
+            return self.deletions
+
+    def clear(self):
+        with self.lock:
+            self.deletions += 1
+            self.entries.clear()
+
+
+class DjangoTokenCache(BaseTokenCache):
+    """Entries shared by every process through a Django cache.
+
+    Tokens are stored under their digest so the cache never holds them.
+    Forgetting a token leaves a tombstone under its key for
+    ``TOKEN_CACHE_TTL`` seconds, and entries are only written with
+    ``add()``, so a request that read the token before it was deleted
+    cannot cache it again afterwards.
+    """
+
+    prefix = 'auth-token:'
+    tombstone = 'forgotten'
+
+    @property
+    def cache(self):
+        return caches[settings.TOKEN_CACHE_ALIAS]
+
+    def cache_key(self, key):
+        return self.prefix + hashlib.sha256(key.encode()).hexdigest()
+
+    def get(self, key):
+        entry = self.cache.get(self.cache_key(key))
+        if entry == self.tombstone:
+            return None
+        return entry
+
+    def set(self, key, entry, stamp=None):
+        self.cache.add(
+            self.cache_key(key), entry, timeout=settings.TOKEN_CACHE_TTL
+        )
+
+    def delete(self, keys):
+        self.cache.set_many(
+            {self.cache_key(key): self.tombstone for key in keys},
+            timeout=settings.TOKEN_CACHE_TTL
+        )
+
+
+_caches = {}
+
+
+def get_token_cache():
+    path = settings.TOKEN_CACHE
+    if path not in _caches:
+        _caches[path] = import_string(path)()
+    return _caches[path]
+
+
+def forget_tokens(keys):
+    """Drop ``keys`` from the cache now and again once the transaction
+    commits, so a request reading before the commit cannot keep them."""
+
+    keys = list(keys)
+    if keys:
+        get_token_cache().delete(keys)
+        transaction.on_commit(lambda: get_token_cache().delete(keys))
+
+
+def dump_entry(user, token):
+    values = {
+        field.attname: getattr(user, field.attname)
+        for field in User._meta.concrete_fields
+        if field.attname != 'password'
+    }
+    return values, token.created
+
+
+def load_entry(key, entry):
+    values, created = entry
+    user = User.from_db(User.objects.db, list(values), list(values.values()))
+    token = Token.from_db(
+        Token.objects.db, ['key', 'user_id', 'created'],
+        [key, user.pk, created]
+    )
+    token.user = user
+    return user, token
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """``TokenAuthentication`` answering repeated tokens from a cache."""
+
+    def authenticate_credentials(self, key):
+        token_cache = get_token_cache()
+        entry = token_cache.get(key)
+        if entry is not None:
+            return load_entry(key, entry)
+
+        stamp = token_cache.stamp()
+        user, token = super().authenticate_credentials(key)
+        token_cache.set(key, dump_entry(user, token), stamp)
+        return user, token
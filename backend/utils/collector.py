@@ -0,0 +1,282 @@
+"""Collecting media files no row references any more.
+
+The storage tree and the file names stored in every ``FileField`` are
+both streamed in the same byte order and merge-joined, so memory use
+does not grow with the number of files: the tree is walked one
+directory at a time with ``os.scandir`` and every column is read with a
+server-side iterator.
+
+Image renditions (``photo.thumb.webp``) have no column of their own and
+are kept as long as their original is. Files younger than the grace
+period are never touched, which covers uploads whose rows are not
+committed yet. The last path handled is written to a checkpoint file
+from time to time, so an interrupted run resumes where it stopped.
+"""
+import heapq
+import json
+import os
+import re
+import time
+from dataclasses import asdict, dataclass
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connection, models, transaction
+from django.db.models.functions import Collate
+
+from .models import StoredFile
+
+
+CHECKPOINT_EVERY = 1000
+VERIFY_BATCH_SIZE = 500
+
+
+@dataclass
+class CollectorStats:
+    files: int = 0
+    bytes: int = 0
+    referenced: int = 0
+    recent: int = 0
+    orphaned: int = 0
+    orphaned_bytes: int = 0
+    deleted: int = 0
+    seconds: float = 0.0
+
+    @property
+    def files_per_second(self):
+        return self.files / self.seconds if self.seconds else 0.0
+
+
+def file_fields():
+    """``(model, field name)`` of every file column of installed apps."""
+
+    for model in apps.get_models():
+        for field in model._meta.concrete_fields:
+            if isinstance(field, models.FileField):
+                yield model, field.name
+
+
+def referenced_names(after=None):
+    """Every stored file name in byte order, with repeats."""
+
+    streams = []
+    for model, field in file_fields():
+        queryset = model._default_manager.exclude(
+            **{field: ''}
+        ).exclude(**{f'{field}__isnull': True})
+        key = models.F(field)
+        if connection.vendor == 'postgresql':
+            # Database collations do not sort like Python strings do.
+            key = Collate(field, 'C')
+        queryset = queryset.alias(sort_key=key)
+        if after is not None:
+            queryset = queryset.filter(sort_key__gt=after)
+        streams.append(
+            queryset.order_by('sort_key')
+            .values_list(field, flat=True)
+            .iterator(chunk_size=2000)
+        )
+    return heapq.merge(*streams)
+
+
+def still_referenced(names):
+    """Which of ``names`` a row started pointing at since they were
+    read."""
+
+    found = set()
+    for model, field in file_fields():
+        found.update(
+            model._default_manager.filter(**{f'{field}__in': names})
+            .values_list(field, flat=True)
+        )
+    return found
+
+
+class MediaCollector:
+    """Finding and deleting unreferenced files under ``MEDIA_ROOT``."""
+
+    def __init__(self, grace_period=None, dry_run=False,
+                 checkpoint=None, root=None):
+        if grace_period is None:
+            grace_period = settings.MEDIA_GC_GRACE_PERIOD
+        self.root = str(root or settings.MEDIA_ROOT)
+        self.cutoff = time.time() - grace_period
+        self.dry_run = dry_run
+        # A dry run must not make the next real run skip files.
+        self.checkpoint = None if dry_run else checkpoint
+        self.skipped_dirs = {settings.UPLOAD_SESSION_DIR + '/'}
+        self.rendition_re = re.compile(r'^(.*)\.({})\.webp$'.format(
+            '|'.join(re.escape(name) for name in settings.IMAGE_RENDITIONS)
+        ))
+        self.stats = CollectorStats()
+        self.candidates = []
+
+    def run(self):
+        self.started = time.monotonic()
+        after = self.load_checkpoint()
+        self.references = referenced_names(after)
+        self.reference = next(self.references, None)
+
+        for handled, path in enumerate(self.collect('', after), 1):
+            if handled % CHECKPOINT_EVERY == 0:
+                self.flush()
+                self.save_checkpoint(path)
+        self.flush()
+
+        self.stats.seconds += time.monotonic() - self.started
+        self.clear_checkpoint()
+        return self.stats
+
+    def is_referenced(self, name):
+        """Advance the reference stream up to ``name``."""
+
+        while self.reference is not None and self.reference < name:
+            self.reference = next(self.references, None)
+        return self.reference == name
+
+    def entries(self, directory):
+        """Entries of ``directory`` in the order of their full paths.
+
+        Directories sort as ``name/``, so that ``a.b`` comes before
+        everything inside ``a/`` just like the stored names do.
+        """
+
+        with os.scandir(os.path.join(self.root, directory)) as scan:
+            entries = [
+                (entry.name + '/' if entry.is_dir(follow_symlinks=False)
+                 else entry.name, entry)
+                for entry in scan
+            ]
+        entries.sort(key=lambda item: item[0])
+        return entries
+
+    def collect(self, directory, after=None):
+        """Check every file under ``directory``, yield the paths done."""
+
+        kept_stems = set()
+        renditions = []
+        for key, entry in self.entries(directory):
+            path = directory + key
+            if after is not None and path <= after and not (
+                    key.endswith('/') and after.startswith(path)):
+                if self.rendition_re.match(key) is None:
+                    # Checked before resuming: keep its renditions.
+                    kept_stems.add(os.path.splitext(key)[0])
+                continue
+            if key.endswith('/'):
+                if path not in self.skipped_dirs:
+                    yield from self.collect(path, after)
+                continue
+            if key.startswith('.') or not entry.is_file(
+                    follow_symlinks=False):
+                continue
+
+            match = self.rendition_re.match(key)
+            if match is not None:
+                renditions.append((path, match.group(1), entry))
+                continue
+
+            if self.check(path, entry, self.is_referenced(path)):
+                kept_stems.add(os.path.splitext(key)[0])
+            yield path
+
+        for path, stem, entry in renditions:
+            self.check(path, entry, stem in kept_stems)
+            yield path
+
+    def check(self, path, entry, referenced):
+        """Count a file and queue it for deletion unless it is kept."""
+
+        stats = entry.stat(follow_symlinks=False)
+        self.stats.files += 1
+        self.stats.bytes += stats.st_size
+        if referenced:
+            self.stats.referenced += 1
+            return True
+        if stats.st_mtime > self.cutoff:
+            self.stats.recent += 1
+            return True
+
+        self.stats.orphaned += 1
+        self.stats.orphaned_bytes += stats.st_size
+        self.candidates.append(path)
+        return False
+
+    def flush(self):
+        candidates, self.candidates = self.candidates, []
+        if self.dry_run or not candidates:
+            return
+
+        for start in range(0, len(candidates), VERIFY_BATCH_SIZE):
+            batch = candidates[start:start + VERIFY_BATCH_SIZE]
+            with transaction.atomic():
+                # Saving the same content again waits for these locks.
+                references = dict(
+                    StoredFile.objects.select_for_update()
+                    .filter(name__in=batch)
+                    .values_list('name', 'references')
+                )
+                referenced = still_referenced(batch)
+                removed = []
+                for path in batch:
+                    if path in referenced or references.get(path):
+                        continue
+                    if self.remove(path):
+                        removed.append(path)
+                StoredFile.objects.filter(
+                    name__in=removed, references=0
+                ).delete()
+
+    def remove(self, path):
+        """Delete a queued file unless it was saved again meanwhile."""
+
+        full_path = os.path.join(self.root, path)
+        try:
+            # An upload of the same content refreshes the file.
+            if os.stat(full_path).st_mtime > self.cutoff:
+                return False
+            os.remove(full_path)
+        except FileNotFoundError:
+            return False
+        self.stats.deleted += 1
+        return True
+
+    def load_checkpoint(self):
+        if not self.checkpoint:
+            return None
+        try:
+            with open(self.checkpoint) as checkpoint:
+                saved = json.load(checkpoint)
+            after = saved['after']
+            self.stats = CollectorStats(**saved['stats'])
+        except (FileNotFoundError, ValueError, KeyError, TypeError):
+            return None
+        return after
+
+    def save_checkpoint(self, path):
+        if not self.checkpoint:
+            return
+        self.stats.seconds += time.monotonic() - self.started
+        self.started = time.monotonic()
+        temporary = f'{self.checkpoint}.tmp'
+        with open(temporary, 'w') as checkpoint:
+            json.dump({'after': path, 'stats': asdict(self.stats)},
+                      checkpoint)
+        os.replace(temporary, self.checkpoint)
+
+    def clear_checkpoint(self):
+        if self.checkpoint:
+            try:
+                os.remove(self.checkpoint)
+            except FileNotFoundError:
+                pass
+
+
+def collect_media(grace_period=None, dry_run=False, checkpoint=None):
+    """Run one collection, for cron or any job scheduler."""
+
+    if checkpoint is None:
+        checkpoint = settings.MEDIA_GC_CHECKPOINT
+    return MediaCollector(
+        grace_period=grace_period, dry_run=dry_run, checkpoint=checkpoint
+    ).run()
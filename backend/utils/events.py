@@ -0,0 +1,268 @@
+"""Events pushed to users as they happen, over Server-Sent Events.
+
+``EventStream`` wraps the Django ASGI application and answers
+``EVENTS_PATH`` itself: it keeps the response open and writes every
+event addressed to the authenticated user as it arrives, with a comment
+line every ``EVENTS_HEARTBEAT`` seconds so proxies keep the connection.
+Browsers reconnect on their own. EventSource cannot send headers, so
+the token may also be given as ``?token=``.
+
+Events are ``(user_id, event)`` deliveries sent through a pluggable
+broker chosen by the ``EVENTS_BROKER`` setting. ``MemoryEventBroker``
+only reaches connections of the same process; ``PostgresEventBroker``
+reaches every worker through ``LISTEN``/``NOTIFY``.
+"""
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.utils.module_loading import import_string
+from rest_framework.authtoken.models import Token
+
+
+logger = logging.getLogger(__name__)
+
+
+class BaseEventBroker:
+    """Fans deliveries out to the listeners of this process."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.listeners = defaultdict(set)
+
+    def publish(self, deliveries):
+        """Send ``(user_id, event)`` pairs to wherever users listen."""
+        raise NotImplementedError
+
+    def subscribe(self, user_id, listener):
+        with self.lock:
+            self.listeners[user_id].add(listener)
+
+    def unsubscribe(self, user_id, listener):
+        with self.lock:
+            listeners = self.listeners.get(user_id)
+            if listeners is not None:
+                listeners.discard(listener)
+                if not listeners:
+                    del self.listeners[user_id]
+
+    def deliver(self, deliveries):
+        for user_id, event in deliveries:
+            with self.lock:
+                listeners = list(self.listeners.get(user_id, ()))
+            for listener in listeners:
+                listener(event)
+
+
+class MemoryEventBroker(BaseEventBroker):
+    """Per-process delivery, meant for tests and a single worker."""
+
+    def publish(self, deliveries):
+        self.deliver(deliveries)
+
+
+class PostgresEventBroker(BaseEventBroker):
+    """Delivery to every worker through PostgreSQL ``NOTIFY``.
+
+    Each process holds one extra connection that ``LISTEN``s, started
+    by the first subscriber.
+    """
+
+    channel = 'events'
+    # NOTIFY payloads must stay below 8000 bytes.
+    payload_limit = 7000
+
+    def __init__(self):
+        super().__init__()
+        self.listener_thread = None
+
+    def publish(self, deliveries):
+        payloads = []
+        batch = []
+        size = 2
+        for user_id, event in deliveries:
+            item = json.dumps([user_id, event], cls=DjangoJSONEncoder)
+            if batch and size + len(item) > self.payload_limit:
+                payloads.append('[' + ','.join(batch) + ']')
+                batch = []
+                size = 2
+            batch.append(item)
+            size += len(item) + 1
+        if batch:
+            payloads.append('[' + ','.join(batch) + ']')
+
+        with connection.cursor() as cursor:
+            for payload in payloads:
+                cursor.execute(
+                    'SELECT pg_notify(%s, %s)', [self.channel, payload]
+                )
+
+    def subscribe(self, user_id, listener):
+        with self.lock:
+            if self.listener_thread is None:
+                self.listener_thread = threading.Thread(
+                    target=self.listen, name='events-listener', daemon=True
+                )
+                self.listener_thread.start()
+        super().subscribe(user_id, listener)
+
+    def listen(self):
+        while True:
+            try:
+                self.listen_until_error()
+            except Exception:
+                logger.exception('Event listener lost its connection')
+                time.sleep(1)
+
+    def listen_until_error(self):
+        import psycopg2
+        from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+
+        listener = psycopg2.connect(**connection.get_connection_params())
+        try:
+            listener.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+            with listener.cursor() as cursor:
+                cursor.execute(f'LISTEN {self.channel}')
+            while True:
+                select.select([listener], [], [], 60)
+                listener.poll()
+                while listener.notifies:
+                    notify = listener.notifies.pop(0)
+                    self.deliver(json.loads(notify.payload))
+        finally:
+            listener.close()
+
+
+_brokers = {}
+
+
+def get_broker():
+    path = settings.EVENTS_BROKER
+    if path not in _brokers:
+        _brokers[path] = import_string(path)()
+    return _brokers[path]
+
+
+def send_events(deliveries):
+    """Publish ``(user_id, event)`` pairs once the transaction commits."""
+
+    deliveries = list(deliveries)
+    if deliveries:
+        transaction.on_commit(lambda: get_broker().publish(deliveries))
+
+
+def format_event(event):
+    data = json.dumps(event, cls=DjangoJSONEncoder)
+    return f'event: {event["type"]}\ndata: {data}\n\n'.encode('utf-8')
+
+
+def token_user_id(key):
+    user_id, is_active = Token.objects.filter(key=key).values_list(
+        'user_id', 'user__is_active'
+    ).first() or (None, False)
+    return user_id if is_active else None
+
+
+class EventStream:
+    """ASGI application answering ``EVENTS_PATH`` with an event stream
+    and handing every other request to ``application``."""
+
+    def __init__(self, application):
+        self.application = application
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['path'] != settings.EVENTS_PATH:
+            return await self.application(scope, receive, send)
+        if scope['method'] != 'GET':
+            return await self.refuse(send, 405, 'Method not allowed.')
+
+        user_id = await sync_to_async(token_user_id)(self.token(scope))
+        if user_id is None:
+            return await self.refuse(
+                send, 401, 'Invalid token.',
+                [(b'www-authenticate', b'Token')]
+            )
+        await self.stream(user_id, receive, send)
+
+    def token(self, scope):
+        for name, value in scope['headers']:
+            if name == b'authorization':
+                keyword, _, key = value.decode('latin-1').partition(' ')
+                if keyword == 'Token':
+                    return key.strip()
+        query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+        return query.get('token', [None])[0]
+
+    async def refuse(self, send, status, detail, headers=()):
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(b'content-type', b'application/json'), *headers],
+        })
+        await send({
+            'type': 'http.response.body',
+            'body': json.dumps({'detail': detail}).encode('utf-8'),
+        })
+
+    async def stream(self, user_id, receive, send):
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+
+        def put(event):
+            # A client this far behind loses events rather than memory.
+            if queue.qsize() < settings.EVENTS_QUEUE_SIZE:
+                queue.put_nowait(event)
+
+        def listener(event):
+            loop.call_soon_threadsafe(put, event)
+
+        broker = get_broker()
+        broker.subscribe(user_id, listener)
+        disconnected = asyncio.ensure_future(self.disconnect(receive))
+        try:
+            await send({
+                'type': 'http.response.start',
+                'status': 200,
+                'headers': [
+                    (b'content-type', b'text/event-stream'),
+                    (b'cache-control', b'no-cache'),
+                    (b'x-accel-buffering', b'no'),
+                ],
+            })
+            await self.write(send, b': connected\n\n')
+            while True:
+                received = asyncio.ensure_future(queue.get())
+                done, _ = await asyncio.wait(
+                    {received, disconnected},
+                    timeout=settings.EVENTS_HEARTBEAT,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                if disconnected in done:
+                    received.cancel()
+                    break
+                if received in done:
+                    await self.write(send, format_event(received.result()))
+                else:
+                    received.cancel()
+                    await self.write(send, b': ping\n\n')
+        finally:
+            broker.unsubscribe(user_id, listener)
+            disconnected.cancel()
+
+    async def write(self, send, body):
+        await send({
+            'type': 'http.response.body', 'body': body, 'more_body': True
+        })
+
+    async def disconnect(self, receive):
+        while (await receive())['type'] != 'http.disconnect':
+            pass
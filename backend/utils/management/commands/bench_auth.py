@@ -0,0 +1,104 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from utils.authentication import CachedTokenAuthentication, get_token_cache
+
+
+User = get_user_model()
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    """Measuring what token authentication costs per request."""
+
+    help = (
+        'Create users with tokens inside a transaction, authenticate '
+        'requests with and without the token cache and roll everything '
+        'back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10_000)
+        parser.add_argument('--active', type=int, default=1_000)
+        parser.add_argument('--requests', type=int, default=20_000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, **options):
+        self.random = random.Random(options['seed'])
+        try:
+            with transaction.atomic():
+                self.run(options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, options):
+        users = User.objects.bulk_create(
+            User(username=f'bench_auth_{number}')
+            for number in range(options['users'])
+        )
+        tokens = Token.objects.bulk_create(
+            Token(key=Token.generate_key(), user=user) for user in users
+        )
+        # Most traffic comes from the users active right now.
+        active = self.random.sample(
+            tokens, min(options['active'], len(tokens))
+        )
+        keys = [
+            self.random.choice(active).key
+            for _ in range(options['requests'])
+        ]
+
+        factory = APIRequestFactory()
+        requests = [
+            Request(factory.get('/', HTTP_AUTHORIZATION=f'Token {key}'))
+            for key in keys
+        ]
+
+        get_token_cache().clear()
+        for authentication in (TokenAuthentication(),
+                               CachedTokenAuthentication()):
+            queries = []
+            with connection.execute_wrapper(self.counter(queries)):
+                timings = [
+                    self.timed(lambda request=request: (
+                        authentication.authenticate(request)
+                    ))
+                    for request in requests
+                ]
+            self.report(
+                type(authentication).__name__, timings,
+                len(queries) / len(requests)
+            )
+
+    def counter(self, queries):
+        def count(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+        return count
+
+    def timed(self, function):
+        started = time.perf_counter()
+        function()
+        return (time.perf_counter() - started) * 1000
+
+    def report(self, name, timings, queries):
+        timings.sort()
+        p95 = timings[max(int(len(timings) * 0.95) - 1, 0)]
+        self.stdout.write(
+            f'{name}: runs={len(timings)} queries/request={queries:.3f} '
+            f'p50={statistics.median(timings):.3f}ms '
+            f'p95={p95:.3f}ms total={sum(timings):.0f}ms'
+        )
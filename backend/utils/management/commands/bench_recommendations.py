@@ -0,0 +1,202 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from info.models import (Band, BandSlot, Instrument, InstrumentCategory,
+                         Post, Tag, UserBandInstrument)
+from info.recommendations import (RECENCY_HALF_LIFE, RECENCY_WEIGHT,
+                                  get_features, mark_bands_changed,
+                                  recommend_bands)
+
+
+User = get_user_model()
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    """Measuring band recommendation latency on synthetic tables."""
+
+    help = (
+        'Fill Band, its slots, rosters and member posts with synthetic '
+        'rows inside a transaction, time recommendations against them '
+        'and roll everything back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bands', type=int, default=100_000)
+        parser.add_argument('--users', type=int, default=20_000)
+        parser.add_argument('--instruments', type=int, default=40)
+        parser.add_argument('--tags', type=int, default=500)
+        parser.add_argument('--posts', type=int, default=50_000)
+        parser.add_argument('--queries', type=int, default=50)
+        parser.add_argument('--changed', type=int, default=100)
+        parser.add_argument('--batch-size', type=int, default=10_000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, **options):
+        self.random = random.Random(options['seed'])
+        try:
+            with transaction.atomic():
+                self.run(options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def bulk(self, model, rows, batch_size):
+        created = []
+        for start in range(0, len(rows), batch_size):
+            created += model.objects.bulk_create(
+                rows[start:start + batch_size]
+            )
+        return created
+
+    def populate(self, options):
+        batch_size = options['batch_size']
+        category = InstrumentCategory.objects.create(
+            title='Bench', slug='bench-recommendations'
+        )
+        instruments = self.bulk(Instrument, [
+            Instrument(title=f'bench instrument {number}', category=category)
+            for number in range(options['instruments'])
+        ], batch_size)
+        tags = self.bulk(Tag, [
+            Tag(title=f'bench tag {number}', slug=f'bench-tag-{number}',
+                color='#123456')
+            for number in range(options['tags'])
+        ], batch_size)
+        users = self.bulk(User, [
+            User(username=f'bench_recommendations_{number}')
+            for number in range(options['users'])
+        ], batch_size)
+
+        # Rows older than the sync overlap, as on a live site.
+        now = timezone.now()
+        bands = self.bulk(Band, [
+            Band(
+                author=self.random.choice(users), title=f'Band {number}',
+                description='bench', quantity=5,
+                pub_date=now - timedelta(days=self.random.random() * 365),
+                features_updated=now - timedelta(hours=1)
+            )
+            for number in range(options['bands'])
+        ], batch_size)
+        self.bulk(UserBandInstrument, [
+            UserBandInstrument(
+                band=band, user=band.author,
+                instrument=self.random.choice(instruments)
+            )
+            for band in bands
+        ], batch_size)
+        self.bulk(BandSlot, [
+            BandSlot(band=band, instrument=instrument)
+            for band in bands
+            for instrument in self.random.sample(
+                instruments, self.random.randint(0, 3)
+            )
+        ], batch_size)
+
+        posts = self.bulk(Post, [
+            Post(title=f'Post {number}', author=self.random.choice(users))
+            for number in range(options['posts'])
+        ], batch_size)
+        self.bulk(Post.tags.through, [
+            Post.tags.through(post=post, tag=tag)
+            for post in posts
+            for tag in self.random.sample(tags, self.random.randint(1, 3))
+        ], batch_size)
+        queriers = self.random.sample(users, options['queries'])
+        for user in queriers:
+            user.instruments.set(self.random.sample(instruments, 2))
+        return bands, queriers
+
+    def run(self, options):
+        started = time.perf_counter()
+        bands, queriers = self.populate(options)
+        self.stdout.write(
+            f'Inserted {len(bands)} bands in '
+            f'{time.perf_counter() - started:.1f}s'
+        )
+
+        features = get_features()
+        features.reset()
+        self.stdout.write(
+            f'full build: {self.timed(features.sync):.1f}ms'
+        )
+        changed = [band.pk for band in self.random.sample(
+            bands, options['changed']
+        )]
+        mark_bands_changed(pk__in=changed)
+        self.stdout.write(
+            f'incremental sync of {len(changed)} bands: '
+            f'{self.timed(features.sync):.1f}ms'
+        )
+
+        vectors = [features.user_vector(user) for user in queriers]
+        self.report('scores', [
+            self.timed(lambda vector=vector: top(*features.scores(vector)))
+            for vector in vectors
+        ])
+        rows = [
+            dict(zip(columns.tolist(), values.tolist()))
+            for columns, values in zip(features.columns, features.values)
+        ]
+        self.report('python loop', [
+            self.timed(lambda vector=vector: naive(
+                features, rows, vector.tolist()
+            ))
+            for vector in vectors[:5]
+        ])
+        self.report('recommend_bands', [
+            self.timed(lambda user=user: recommend_bands(user, 10))
+            for user in queriers
+        ])
+
+    def timed(self, function):
+        started = time.perf_counter()
+        function()
+        return (time.perf_counter() - started) * 1000
+
+    def report(self, name, timings):
+        timings.sort()
+        p95 = timings[max(int(len(timings) * 0.95) - 1, 0)]
+        self.stdout.write(
+            f'{name}: runs={len(timings)} '
+            f'p50={statistics.median(timings):.1f}ms '
+            f'p95={p95:.1f}ms max={timings[-1]:.1f}ms'
+        )
+
+
+def top(band_ids, scores, limit=10):
+    best = np.argpartition(-scores, limit - 1)[:limit]
+    return band_ids[best[np.argsort(-scores[best])]]
+
+
+def naive(features, rows, vector, limit=10):
+    """The same ranking one band at a time, for comparison."""
+
+    now = timezone.now().timestamp()
+    half_life = RECENCY_HALF_LIFE.total_seconds()
+    scored = []
+    for band_id, row, pub_date, eligible in zip(
+            features.band_ids.tolist(), rows, features.pub_dates.tolist(),
+            features.eligible.tolist()):
+        if not eligible:
+            continue
+        score = sum(
+            value * vector[column]
+            for column, value in row.items() if column >= 0
+        )
+        score += RECENCY_WEIGHT * 0.5 ** (max(now - pub_date, 0) / half_life)
+        scored.append((score, band_id))
+    scored.sort(reverse=True)
+    return scored[:limit]
@@ -0,0 +1,107 @@
+import itertools
+import random
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from info.models import Post
+from info.search import search_posts
+
+
+User = get_user_model()
+
+VOCABULARY_SIZE = 20_000
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    """Measuring post search latency on a synthetic table."""
+
+    help = (
+        'Fill Post with synthetic rows inside a transaction, time search '
+        'queries against it and roll everything back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=1_000_000)
+        parser.add_argument('--vocabulary', type=int, default=VOCABULARY_SIZE)
+        parser.add_argument('--queries', type=int, default=50)
+        parser.add_argument('--batch-size', type=int, default=10_000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, **options):
+        self.random = random.Random(options['seed'])
+        # Word frequencies of natural text roughly follow Zipf's law, which
+        # keeps the selectivity of the benchmark queries realistic.
+        self.words = [f'word{rank}' for rank in range(options['vocabulary'])]
+        self.weights = list(itertools.accumulate(
+            1 / (rank + 1) for rank in range(options['vocabulary'])
+        ))
+        try:
+            with transaction.atomic():
+                self.run(options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def sentence(self, length):
+        return ' '.join(self.random.choices(
+            self.words, cum_weights=self.weights, k=length
+        ))
+
+    def run(self, options):
+        author = User.objects.create(username='bench_search_author')
+        started = time.perf_counter()
+        remaining = options['posts']
+        while remaining > 0:
+            size = min(remaining, options['batch_size'])
+            Post.objects.bulk_create(
+                Post(
+                    title=self.sentence(4),
+                    text=self.sentence(40),
+                    author=author
+                )
+                for _ in range(size)
+            )
+            remaining -= size
+        self.stdout.write(
+            f'Inserted {options["posts"]} posts in '
+            f'{time.perf_counter() - started:.1f}s'
+        )
+
+        terms = [self.sentence(2) for _ in range(options['queries'])]
+        self.report('search_posts', [
+            self.timed(lambda term=term: list(
+                search_posts(Post.objects.all(), term)[:6]
+            ))
+            for term in terms
+        ])
+        self.report('icontains', [
+            self.timed(lambda term=term: list(
+                Post.objects.filter(
+                    Q(title__icontains=term) | Q(text__icontains=term)
+                ).order_by('-pub_date')[:6]
+            ))
+            for term in terms[:5]
+        ])
+
+    def timed(self, function):
+        started = time.perf_counter()
+        function()
+        return (time.perf_counter() - started) * 1000
+
+    def report(self, name, timings):
+        timings.sort()
+        p95 = timings[max(int(len(timings) * 0.95) - 1, 0)]
+        self.stdout.write(
+            f'{name}: runs={len(timings)} '
+            f'p50={statistics.median(timings):.1f}ms '
+            f'p95={p95:.1f}ms max={timings[-1]:.1f}ms'
+        )
@@ -0,0 +1,78 @@
+import base64
+import multiprocessing
+import os
+
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand
+
+from api.fields import Base64AudioField
+
+
+WAV_HEADER = b'RIFF\x00\x00\x00\x00WAVEfmt '
+
+
+def buffered_decode(data):
+    """How the fields decoded uploads before streaming."""
+
+    format, audstr = data.split(';base64,')
+    return ContentFile(base64.b64decode(audstr), name='temp.wav')
+
+
+def streamed_decode(data):
+    return Base64AudioField(max_size=len(data)).to_internal_value(data)
+
+
+DECODERS = {
+    'buffered': buffered_decode,
+    'streamed': streamed_decode,
+}
+
+
+def memory_status(field):
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith(field + ':'):
+                return int(line.split()[1]) * 1024
+
+
+def measure(decoder, size, results):
+    """Peak RSS growth of one decode, measured in a fresh process."""
+
+    payload = WAV_HEADER + os.urandom(size - len(WAV_HEADER))
+    data = 'data:audio/wav;base64,' + base64.b64encode(payload).decode()
+    del payload
+    # Building the payload raised the high-water mark, reset it (Linux).
+    with open('/proc/self/clear_refs', 'w') as clear_refs:
+        clear_refs.write('5')
+    before = memory_status('VmRSS')
+    decoded = DECODERS[decoder](data)
+    decoded.file.close()
+    results.put(memory_status('VmHWM') - before)
+
+
+class Command(BaseCommand):
+    """Measuring memory used to decode base64 audio uploads."""
+
+    help = 'Report peak RSS growth per upload size for both decoders.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=[1, 5, 10, 30],
+            help='Upload sizes in MB.'
+        )
+
+    def handle(self, **options):
+        context = multiprocessing.get_context('fork')
+        for size in options['sizes']:
+            row = [f'{size:>4} MB']
+            for decoder in DECODERS:
+                results = context.Queue()
+                process = context.Process(
+                    target=measure,
+                    args=(decoder, size * 1024 * 1024, results)
+                )
+                process.start()
+                growth = results.get()
+                process.join()
+                row.append(f'{decoder}={growth / 1024 / 1024:7.1f} MB')
+            self.stdout.write('  '.join(row))
@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from utils.collector import MediaCollector
+
+
+class Command(BaseCommand):
+    """Deleting media files that no row references."""
+
+    help = 'Report or delete unreferenced files under MEDIA_ROOT.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace-period', type=int,
+            default=settings.MEDIA_GC_GRACE_PERIOD,
+            help='Seconds a file must be unchanged before it is deleted.'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Only report what would be deleted.'
+        )
+        parser.add_argument(
+            '--checkpoint', default=str(settings.MEDIA_GC_CHECKPOINT),
+            help='File recording progress to resume an interrupted run.'
+        )
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Ignore the checkpoint of an interrupted run.'
+        )
+
+    def handle(self, **options):
+        collector = MediaCollector(
+            grace_period=options['grace_period'],
+            dry_run=options['dry_run'],
+            checkpoint=options['checkpoint'] or None
+        )
+        if options['restart']:
+            collector.clear_checkpoint()
+        stats = collector.run()
+
+        mib = 1024 * 1024
+        self.stdout.write(
+            f'Files: {stats.files} ({stats.bytes / mib:.1f} MiB), '
+            f'referenced: {stats.referenced}, recent: {stats.recent}'
+        )
+        self.stdout.write(
+            f'Orphaned: {stats.orphaned} '
+            f'({stats.orphaned_bytes / mib:.1f} MiB), '
+            f'deleted: {stats.deleted}'
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Scanned in {stats.seconds:.1f}s, '
+            f'{stats.files_per_second:.0f} files/s'
+        ))
@@ -0,0 +1,18 @@
+from django.db import models
+
+
+class StoredFile(models.Model):
+    """Content Addressed Media File Model."""
+
+    name = models.CharField(verbose_name='name', max_length=255, unique=True)
+    references = models.PositiveIntegerField(
+        verbose_name='references', default=0
+    )
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Stored File'
+        verbose_name_plural = 'Stored Files'
+
+    def __str__(self):
+        return self.name
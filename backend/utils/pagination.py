@@ -1,7 +1,264 @@
-from rest_framework.pagination import PageNumberPagination
+import binascii
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (BasePagination, PageNumberPagination,
+                                       _positive_int)
 from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 
 class ResponseOnlyPagination(PageNumberPagination):
     def get_paginated_response(self, data):
         return Response(data)
+
+
+class KeysetPagination(BasePagination):
+    """Opaque cursor pagination keyed on a unique tuple of ordering fields.
+
+    Unlike ``PageNumberPagination`` no ``COUNT(*)`` and no ``OFFSET`` are
+    issued: every page is a single indexed range scan that starts right
+    after the row the cursor points at. Rows inserted while a client is
+    scrolling never shift or repeat items on the following pages.
+    """
+
+    ordering = ('-pub_date', '-id')
+    page_size = 6
+    max_page_size = 50
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'limit'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.limit = self.get_page_size(request)
+        position, self.reverse = self.decode_cursor(request)
+        if position is not None and len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        ordering = self.ordering
+        if self.reverse:
+            ordering = tuple(invert(field) for field in ordering)
+
+        queryset = queryset.order_by(*ordering)
+        try:
+            # Values of a tampered cursor may not fit their fields.
+            if position is not None:
+                queryset = queryset.filter(self.after(position, ordering))
+            results = list(queryset[:self.limit + 1])
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        has_more = len(results) > self.limit
+        results = results[:self.limit]
+
+        if self.reverse:
+            results.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+
+        self.page = results
+        return results
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def get_position(self, instance):
+        position = []
+        for field in self.ordering:
+            value = getattr(instance, field.lstrip('-'))
+            if hasattr(value, 'isoformat'):
+                value = value.isoformat()
+            position.append(value)
+        return position
+
+    def after(self, position, ordering):
+        """Lexicographic ``(f1, f2, ...) > position`` for the given ordering.
+
+        Expands to ``f1 < v1 OR (f1 = v1 AND f2 < v2) OR ...`` so that the
+        database can walk the composite index matching ``ordering``.
+        """
+
+        condition = Q()
+        equal = Q()
+        for field, value in zip(ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+
+        try:
+            cursor = json.loads(urlsafe_b64decode(encoded.encode('ascii')))
+            position = cursor['p']
+            reverse = bool(cursor.get('r'))
+        except (TypeError, ValueError, KeyError, UnicodeError,
+                binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+
+        if not isinstance(position, list):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def encode_cursor(self, position, reverse=False):
+        cursor = {'p': position}
+        if reverse:
+            cursor['r'] = 1
+        encoded = urlsafe_b64encode(
+            json.dumps(cursor, separators=(',', ':')).encode('utf-8')
+        ).decode('ascii')
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encoded
+        )
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.get_position(self.page[-1]))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(
+            self.get_position(self.page[0]), reverse=True
+        )
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'The pagination cursor value.',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Number of results to return per page.',
+                'schema': {'type': 'integer'},
+            },
+        ]
+
+
+class TimelinePagination(KeysetPagination):
+    """Forward-only keyset pagination over an already ordered timeline.
+
+    ``fetch(position, limit)`` returns the objects following the cursor
+    position, so the timeline may be assembled from several sources.
+    """
+
+    def paginate_timeline(self, request, fetch):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.limit = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request)
+        if reverse or (position is not None
+                       and len(position) != len(self.ordering)):
+            raise NotFound(self.invalid_cursor_message)
+
+        try:
+            results = fetch(position, self.limit + 1)
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+        self.has_next = len(results) > self.limit
+        self.has_previous = False
+        self.page = results[:self.limit]
+        return self.page
+
+
+class InboxPagination(TimelinePagination):
+    """Forward-only keyset pagination over invites and requests merged."""
+
+    ordering = ('-created', '-kind', '-id')
+
+
+class FollowPagination(KeysetPagination):
+    """Keyset pagination over follows, most recent first."""
+
+    ordering = ('-id',)
+
+
+class RankedPagination(KeysetPagination):
+    """Opaque cursor pagination over results ordered by a computed score.
+
+    Relevance scores are floats that do not survive a round trip through
+    the cursor exactly, so the cursor carries an offset instead of a
+    keyset position. It still avoids the ``COUNT(*)`` of page numbers.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.limit = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request)
+
+        self.offset = 0
+        if position is not None:
+            if reverse or len(position) != 1 or not isinstance(
+                    position[0], int) or position[0] < 0:
+                raise NotFound(self.invalid_cursor_message)
+            self.offset = position[0]
+
+        results = list(queryset[self.offset:self.offset + self.limit + 1])
+        self.has_next = len(results) > self.limit
+        self.has_previous = self.offset > 0
+        self.page = results[:self.limit]
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor([self.offset + self.limit])
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        offset = self.offset - self.limit
+        if offset <= 0:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor([offset])
+
+
+def invert(field):
+    return field[1:] if field.startswith('-') else f'-{field}'
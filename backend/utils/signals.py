@@ -0,0 +1,49 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import forget_tokens
+
+
+User = get_user_model()
+
+# Cached users keep these, so changing one forgets their tokens. Saving
+# only other fields, like ``last_login`` on every login, keeps them.
+CREDENTIAL_FIELDS = {'is_active', 'is_staff', 'is_superuser', 'password'}
+
+
+@receiver(post_delete, sender=Token)
+def forget_deleted_token(sender, instance, **kwargs):
+    forget_tokens([instance.key])
+
+
+@receiver(post_save, sender=User)
+def forget_user_tokens(sender, instance, created, update_fields=None,
+                       **kwargs):
+    if created or (
+            update_fields is not None
+            and not CREDENTIAL_FIELDS.intersection(update_fields)):
+        return
+    forget_tokens(
+        Token.objects.filter(user=instance).values_list('key', flat=True)
+    )
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def forget_regranted_tokens(sender, instance, action, reverse, pk_set,
+                            **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        users = [instance.pk]
+    elif action == 'pre_clear':
+        # A group or permission taken from everyone who had it.
+        other = 'group' if sender is User.groups.through else 'permission'
+        users = sender.objects.filter(**{other: instance}).values('user')
+    else:
+        users = pk_set
+    forget_tokens(
+        Token.objects.filter(user__in=users).values_list('key', flat=True)
+    )
@@ -0,0 +1,159 @@
+"""Content addressed, sharded storage for user uploaded media.
+
+A file is named after the SHA-256 of its content and kept two directory
+levels below its ``upload_to`` directory, so ``posts/images/temp.png``
+is stored as ``posts/images/3f/a1/3fa1...e9.png``. Directories stay
+small however many files there are, names never collide, and identical
+uploads are stored once.
+
+Because one file may back several rows, every ``save()`` counts a
+reference in ``StoredFile`` and files are only removed by ``release()``
+once the last row pointing at them is gone and that deletion has been
+committed, together with the image renditions rendered next to them.
+"""
+import hashlib
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.files.utils import validate_file_name
+from django.db import transaction
+from django.db.models import F
+
+from .models import StoredFile
+
+
+def rendition_name(name, rendition):
+    """Name of the ``rendition`` of the image stored as ``name``."""
+
+    stem, _ = os.path.splitext(name)
+    return f'{stem}.{rendition}.webp'
+
+
+def content_hash(content):
+    digest = hashlib.sha256()
+    for chunk in content.chunks():
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """File system storage naming files by the hash of their content."""
+
+    def hashed_name(self, name, content):
+        directory, filename = os.path.split(name)
+        _, ext = os.path.splitext(filename)
+        digest = content_hash(content)
+        return os.path.join(
+            directory, digest[:2], digest[2:4], digest + ext.lower()
+        )
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        validate_file_name(name, allow_relative_path=True)
+
+        name = self.hashed_name(name, content)
+        with transaction.atomic():
+            retain(name)
+            return self._save(name, content)
+
+    def _save(self, name, content):
+        full_path = self.path(name)
+        if os.path.exists(full_path):
+            # Refresh the file so the media collector's grace period
+            # covers the row about to reference it again.
+            os.utime(full_path)
+            return name
+
+        directory = os.path.dirname(full_path)
+        os.makedirs(directory, exist_ok=True)
+        if self.directory_permissions_mode is not None:
+            os.chmod(directory, self.directory_permissions_mode)
+
+        # Write aside and link into place: a concurrent upload of the
+        # same content finds either no file or a complete one.
+        fd, temporary = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            if hasattr(content, 'temporary_file_path'):
+                os.close(fd)
+                file_move_safe(
+                    content.temporary_file_path(), temporary,
+                    allow_overwrite=True
+                )
+            else:
+                with os.fdopen(fd, 'wb') as file:
+                    for chunk in content.chunks():
+                        file.write(chunk)
+            if self.file_permissions_mode is not None:
+                os.chmod(temporary, self.file_permissions_mode)
+            try:
+                os.link(temporary, full_path)
+            except FileExistsError:
+                pass
+        finally:
+            os.remove(temporary)
+        return name
+
+
+def retain(name):
+    """Count one more row referencing the stored file ``name``."""
+
+    stored, created = StoredFile.objects.select_for_update().get_or_create(
+        name=name, defaults={'references': 1}
+    )
+    if not created:
+        StoredFile.objects.filter(pk=stored.pk).update(
+            references=F('references') + 1
+        )
+
+
+def release(name):
+    """Drop one reference to ``name``, deleting the file with the last.
+
+    Files saved before the storage counted references have no
+    ``StoredFile`` row and are left for the orphaned media collector.
+    """
+
+    with transaction.atomic():
+        stored = StoredFile.objects.select_for_update().filter(
+            name=name
+        ).first()
+        if stored is None:
+            return
+        if stored.references > 1:
+            StoredFile.objects.filter(pk=stored.pk).update(
+                references=F('references') - 1
+            )
+            return
+
+        stored.delete()
+        # A rolled back transaction brings back the rows pointing at the
+        # file, so it may only go once the deletion is committed.
+        transaction.on_commit(lambda: delete_unreferenced(name))
+
+
+def delete_unreferenced(name):
+    """Delete ``name`` and its renditions unless it was stored again."""
+
+    with transaction.atomic():
+        # Holding the row makes a concurrent save of the same content
+        # wait until the file is gone, then write it anew.
+        stored, _ = StoredFile.objects.select_for_update().get_or_create(
+            name=name
+        )
+        if stored.references:
+            return
+        names = [name] + [
+            rendition_name(name, rendition)
+            for rendition in settings.IMAGE_RENDITIONS
+        ]
+        for stale in names:
+            default_storage.delete(stale)
+        stored.delete()
@@ -0,0 +1,190 @@
+"""Serving user uploaded media with range and conditional requests.
+
+Players seek in tracks with ``Range`` requests and browsers revalidate
+cached images with ``If-None-Match``, neither of which Django's
+``static()`` view answers. This view does both and leaves copying the
+bytes to the kernel: with ``MEDIA_SENDFILE_MODE`` unset the response is
+a ``FileResponse`` that gunicorn sends with ``os.sendfile`` through
+``wsgi.file_wrapper``; with ``'x-accel-redirect'`` or ``'x-sendfile'``
+the front proxy reads the file itself and the app only checks the path.
+"""
+import mimetypes
+import os
+import re
+import stat
+
+from django.conf import settings
+from django.core.exceptions import (ImproperlyConfigured,
+                                    SuspiciousFileOperation)
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class FileRange:
+    """Read-only view of ``length`` bytes of an open file.
+
+    It keeps ``fileno()``, so a WSGI server's file wrapper still sends
+    it with ``sendfile`` from the current offset, and reads past the end
+    of the range return nothing for servers that iterate instead.
+    """
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def media_etag(stats):
+    return '"{:x}-{:x}-{:x}"'.format(
+        stats.st_ino, stats.st_size, stats.st_mtime_ns
+    )
+
+
+def parse_range(header, size):
+    """``(start, end)`` of a single byte range, inclusive.
+
+    Returns ``None`` when the whole file should be sent, which is also
+    the answer to multiple ranges, and raises ``ValueError`` when the
+    range cannot be satisfied.
+    """
+
+    match = RANGE_RE.match(header.strip())
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+
+    if not first:
+        # Suffix range: the last N bytes.
+        length = int(last)
+        if not length or not size:
+            raise ValueError('Unsatisfiable range')
+        return max(size - length, 0), size - 1
+
+    start = int(first)
+    end = int(last) if last else size - 1
+    if last and start > end:
+        return None
+    if start >= size:
+        raise ValueError('Unsatisfiable range')
+    return start, min(end, size - 1)
+
+
+def if_range_passes(request, etag, last_modified):
+    """Whether a ``Range`` may be honoured under ``If-Range``."""
+
+    condition = request.META.get('HTTP_IF_RANGE')
+    if not condition:
+        return True
+    if condition.startswith(('"', 'W/')):
+        return condition == etag
+    return parse_http_date_safe(condition) == last_modified
+
+
+def resolve_media(path):
+    """Absolute path of a servable media file, 404 otherwise."""
+
+    parts = path.split('/')
+    if parts[0] == settings.UPLOAD_SESSION_DIR or any(
+            part.startswith('.') for part in parts) or path.endswith('.tmp'):
+        raise Http404('Not found')
+    try:
+        return safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404('Not found')
+
+
+@require_safe
+def serve_media(request, path):
+    full_path = resolve_media(path)
+    try:
+        stats = os.stat(full_path)
+    except OSError:
+        raise Http404('Not found')
+    if not stat.S_ISREG(stats.st_mode):
+        raise Http404('Not found')
+
+    size = stats.st_size
+    etag = media_etag(stats)
+    last_modified = int(stats.st_mtime)
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(last_modified),
+        'Accept-Ranges': 'bytes',
+        'Cache-Control': f'max-age={settings.MEDIA_CACHE_MAX_AGE}',
+    }
+
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is not None:
+        for header in ('ETag', 'Last-Modified', 'Cache-Control'):
+            response.headers[header] = headers[header]
+        return response
+
+    content_type, _ = mimetypes.guess_type(full_path)
+    content_type = content_type or 'application/octet-stream'
+
+    mode = settings.MEDIA_SENDFILE_MODE
+    if mode:
+        # The proxy answers Range itself from the file it is pointed at.
+        response = HttpResponse(content_type=content_type, headers=headers)
+        if mode == 'x-accel-redirect':
+            response['X-Accel-Redirect'] = (
+                settings.MEDIA_ACCEL_PREFIX + path
+            )
+        elif mode == 'x-sendfile':
+            response['X-Sendfile'] = full_path
+        else:
+            raise ImproperlyConfigured(
+                f'Unknown MEDIA_SENDFILE_MODE {mode!r}'
+            )
+        return response
+
+    start, end = 0, size - 1
+    byte_range = None
+    if 'HTTP_RANGE' in request.META and if_range_passes(
+            request, etag, last_modified):
+        try:
+            byte_range = parse_range(request.META['HTTP_RANGE'], size)
+        except ValueError:
+            return HttpResponse(
+                status=416,
+                headers={'Content-Range': f'bytes */{size}', **headers}
+            )
+    if byte_range is not None:
+        start, end = byte_range
+
+    length = end - start + 1 if size else 0
+    if request.method == 'HEAD':
+        response = HttpResponse(content_type=content_type, headers=headers)
+    else:
+        response = FileResponse(
+            FileRange(open(full_path, 'rb'), start, length),
+            content_type=content_type, headers=headers
+        )
+    response['Content-Length'] = str(length)
+    if byte_range is not None:
+        response.status_code = 206
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    return response
@@ -0,0 +1,56 @@
+"""Process pool for CPU-heavy media work kept off the request thread.
+
+Jobs are plain functions of file paths, so workers never touch the
+database. With ``MEDIA_WORKERS = 0`` jobs run inline, which is what the
+tests and the development server use.
+"""
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            # A forked Django process would inherit open sockets and
+            # locks held by other threads, so start workers clean.
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.MEDIA_WORKERS,
+                mp_context=multiprocessing.get_context('forkserver')
+            )
+        return _executor
+
+
+def run_callback(callback, future):
+    try:
+        callback(future.result())
+    except Exception:
+        logger.exception('Media job failed')
+    finally:
+        # Callbacks run on the pool's management thread.
+        close_old_connections()
+
+
+def submit(function, *args, callback=None):
+    """Run ``function(*args)`` in a worker, then ``callback(result)``."""
+
+    if not settings.MEDIA_WORKERS:
+        result = function(*args)
+        if callback is not None:
+            callback(result)
+        return
+
+    future = get_executor().submit(function, *args)
+    if callback is not None:
+        future.add_done_callback(lambda done: run_callback(callback, done))